@@ -0,0 +1,70 @@
+"""Benchmark memory held by file records on a large synthetic tree.
+
+The tree is scanned in a fresh interpreter per mode and peak RSS growth is
+reported. "lazy" keeps the FileRecords a scan returns, whose unchanged
+content is left on disk until rendering; "eager" holds the same records
+as dicts with their full content, the way records used to be kept.
+
+Run from the repository root:
+    python benchmarks/bench_records.py [num_files] [lines_per_file]
+"""
+import json
+import subprocess
+import sys
+import tempfile
+import textwrap
+from pathlib import Path
+
+CHILD = textwrap.dedent('''
+    import gc, json, resource, sys, time
+    sys.path.insert(0, 'src/codeprint')
+    from pathlib import Path
+    from cli import FastFileProcessor, ScannerConfig
+    mode, root = sys.argv[1], Path(sys.argv[2])
+    config = ScannerConfig(show_progress=False, max_files=sys.maxsize, max_lines_per_file=10 ** 6,
+                           use_gitignore=False, auto_detect_project=False)
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    files = FastFileProcessor(config).scan_directory(root)
+    if mode == 'eager':
+        files = [{key: record[key] for key in record.KEYS if key in record} for record in files]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'files': len(files), 'growth_kb': peak - baseline, 'seconds': elapsed}))
+''')
+
+
+def build_tree(root: Path, num_files: int, lines: int):
+    """num_files Python modules, 100 per directory"""
+    body = ''.join(f"value_{j} = compute({j}, 'some representative source text')\n" for j in range(lines))
+    for i in range(num_files):
+        directory = root / f"pkg{i // 100}"
+        directory.mkdir(exist_ok=True)
+        (directory / f"mod{i % 100}.py").write_text(f"# module {i}\n" + body)
+
+
+def measure(mode: str, root: Path) -> dict:
+    result = subprocess.run([sys.executable, '-c', CHILD, mode, str(root)],
+                            stdout=subprocess.PIPE, check=True)
+    return json.loads(result.stdout.decode().strip().splitlines()[-1])
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    lines = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, num_files, lines)
+        source_mb = sum(p.stat().st_size for p in root.rglob('*.py')) / 1024 ** 2
+        print(f"files: {num_files}, source: {source_mb:.1f} MB")
+        for mode in ('eager', 'lazy'):
+            report = measure(mode, root)
+            assert report['files'] == num_files
+            print(f"{mode:5s}: peak RSS growth {report['growth_kb'] / 1024:7.1f} MB, "
+                  f"scan {report['seconds']:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""Benchmark the Directory Structure renderer on a synthetic 100k-file tree.
+
+Run from the repository root:
+    python benchmarks/bench_tree.py [num_files]
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, 'src/codeprint')
+from cli import DirectoryTree
+
+
+def synthetic_files(num_files: int):
+    """Spread files over a 3-level tree with 20 files per leaf directory"""
+    files = []
+    for i in range(num_files):
+        leaf = i // 20
+        rel_path = f"pkg{leaf // 100}/mod{(leaf // 10) % 10}/part{leaf % 10}/file{i}.py"
+        files.append({'path': Path('/nonexistent') / rel_path, 'rel_path': rel_path})
+    return files
+
+
+def main():
+    num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    files = synthetic_files(num_files)
+
+    start = time.perf_counter()
+    tree = DirectoryTree.from_files(files)
+    built = time.perf_counter()
+    lines = tree.render("{indent}📁 {name}", "{indent}📄 {name}")
+    rendered = time.perf_counter()
+
+    print(f"files:  {num_files}")
+    print(f"lines:  {len(lines)}")
+    print(f"build:  {(built - start) * 1000:.1f} ms")
+    print(f"render: {(rendered - built) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
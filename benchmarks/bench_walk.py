@@ -0,0 +1,66 @@
+"""Benchmark the directory walk against a filesystem with slow listings.
+
+Every scandir() is delayed to mimic a network filesystem round trip, and
+the walk is timed with increasing walker thread counts. Each parallel walk
+is checked against the serial result.
+
+Run from the repository root:
+    python benchmarks/bench_walk.py [latency_ms] [num_dirs]
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, 'src/codeprint')
+import cli
+from cli import FastFileProcessor, ScannerConfig
+
+
+def build_tree(root: Path, num_dirs: int):
+    """num_dirs directories spread over three levels, five files each"""
+    for i in range(num_dirs):
+        leaf = root / f"pkg{i // 100}" / f"mod{(i // 10) % 10}" / f"part{i % 10}"
+        leaf.mkdir(parents=True, exist_ok=True)
+        for j in range(5):
+            (leaf / f"file{j}.py").write_text(f"value = {i * 5 + j}\n")
+
+
+def delayed_scandir(latency: float):
+    scandir = os.scandir
+
+    def slow(path='.'):
+        time.sleep(latency)
+        return scandir(path)
+    return slow
+
+
+def walk(root: Path, threads: int):
+    config = ScannerConfig(show_progress=False, max_files=sys.maxsize, walker_threads=threads,
+                           auto_detect_project=False)
+    start = time.perf_counter()
+    files = FastFileProcessor(config).walk_files(root)
+    return files, time.perf_counter() - start
+
+
+def main():
+    latency_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    num_dirs = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, num_dirs)
+        cli.os.scandir = delayed_scandir(latency_ms / 1000)
+
+        serial, serial_time = walk(root, 1)
+        print(f"listing latency: {latency_ms:g} ms, files: {len(serial)}")
+        print(f"threads  1: {serial_time * 1000:8.1f} ms")
+        for threads in (2, 4, 8, 16, 32):
+            files, elapsed = walk(root, threads)
+            assert files == serial, "parallel walk differs from the serial walk"
+            print(f"threads {threads:2d}: {elapsed * 1000:8.1f} ms  ({serial_time / elapsed:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
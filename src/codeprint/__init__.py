@@ -1,3 +1,3 @@
-from .cli import main
+from .cli import main, scan_async, iter_records_async, AsyncScanner
 
 __version__ = "1.0.5"
\ No newline at end of file
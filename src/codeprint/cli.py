@@ -7,19 +7,34 @@ A powerful tool for creating AI-ready project snapshots
 import os
 import sys
 import json
+import re
 import fnmatch
 import argparse
 import datetime
 import subprocess
 import platform
+import io
+import ast
+import tokenize
 import hashlib
+import math
+import mmap
+import struct
+import threading
 import concurrent.futures
-from pathlib import Path
-from typing import Dict, Set, List, Tuple, Optional
+from pathlib import Path, PurePosixPath
+from typing import Dict, Set, List, Tuple, Optional, Iterable, Iterator, Union, Callable, IO, AsyncIterator
+import dataclasses
 from dataclasses import dataclass, field
 from enum import Enum
 import shutil
+import signal
+import collections
+import tempfile
+import tarfile
+import zipfile
 import time
+import asyncio
 
 # For cross-platform clipboard support
 CLIPBOARD_AVAILABLE = False
@@ -96,6 +111,18 @@ ASCII_LOGO = """
 class OutputFormat(Enum):
     TXT = "txt"
     MCP = "mcp"
+    JSONL = "jsonl"
+    ARCHIVE = "archive"
+    
+    @property
+    def extension(self) -> str:
+        """File extension used for generated output names"""
+        return 'cpk' if self is OutputFormat.ARCHIVE else self.value
+
+class SymlinkPolicy(Enum):
+    SKIP = "skip"      # ignore every symlink
+    FILES = "files"    # follow links to files, never into directories
+    FOLLOW = "follow"  # follow links to files and directories
 
 class ProjectType(Enum):
     PYTHON = "python"
@@ -116,6 +143,18 @@ class ProjectType(Enum):
     FLUTTER = "flutter"
     UNKNOWN = "unknown"
 
+# Read first under --deadline: what a reader needs to make sense of a project
+PRIORITY_FILES = {
+    'README', 'README.md', 'README.rst', 'README.txt',
+    'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt', 'package.json', 'tsconfig.json',
+    'go.mod', 'Cargo.toml', 'pom.xml', 'build.gradle', 'build.gradle.kts', 'Gemfile', 'composer.json',
+    'Makefile', 'CMakeLists.txt', 'Dockerfile',
+    'main.py', '__main__.py', 'app.py', 'manage.py', 'index.js', 'index.ts', 'main.go', 'main.rs', 'lib.rs',
+}
+
+# Upper bound for adaptive read concurrency unless --max-io-threads says otherwise
+DEFAULT_IO_THREADS_CAP = 32
+
 @dataclass
 class ScannerConfig:
     """Configuration for the scanner"""
@@ -137,6 +176,23 @@ class ScannerConfig:
     custom_ignore_dirs: Set[str] = field(default_factory=set)
     custom_ignore_files: Set[str] = field(default_factory=set)
     custom_ignore_extensions: Set[str] = field(default_factory=set)
+    batch_mode: bool = False
+    compact: bool = False
+    outline_threshold: Optional[int] = None  # 0 means max_lines_per_file
+    write_index: bool = False
+    focus: List[str] = field(default_factory=list)  # entry points for --focus
+    focus_depth: int = 2
+    symlinks: SymlinkPolicy = SymlinkPolicy.FILES
+    max_io_threads: Optional[int] = None  # hard cap on concurrent reads (default DEFAULT_IO_THREADS_CAP)
+    max_memory: Optional[int] = None  # bytes of file content to hold before spilling to disk
+    checkpoint_file: Optional[str] = None  # state file for resumable scans
+    resume: bool = False
+    deadline: Optional[float] = None  # seconds before a best-effort snapshot is rendered
+    redact_secrets: bool = False
+    redact_patterns: List[str] = field(default_factory=list)  # extra regexes to redact
+    rev: Optional[str] = None  # snapshot this git commit instead of the working tree
+    walker_threads: int = 1  # directories listed concurrently; pays off on high-latency filesystems
+    memoize: bool = False  # reuse the last snapshot of an unchanged tree (--memo)
 
 def copy_to_clipboard(text: str) -> bool:
     """Cross-platform clipboard copy function"""
@@ -200,9 +256,11 @@ def setup_config_interactive():
     print(f"\n{Fore.YELLOW}1. Output Format{Style.RESET_ALL}")
     print(f"   txt - Simple text format")
     print(f"   mcp - Markdown Context Pack format (better for AI)")
-    format_choice = input(f"   Choose format (txt/mcp) [txt]: ").strip().lower()
-    if format_choice == 'mcp':
-        config.output_format = OutputFormat.MCP
+    print(f"   jsonl - JSON Lines, one object per file (for ingestion pipelines)")
+    print(f"   archive - Packed archive with a path index (for random access)")
+    format_choice = input(f"   Choose format (txt/mcp/jsonl/archive) [txt]: ").strip().lower()
+    if format_choice in ['mcp', 'jsonl', 'archive']:
+        config.output_format = OutputFormat(format_choice)
     
     # Clipboard
     print(f"\n{Fore.YELLOW}2. Clipboard{Style.RESET_ALL}")
@@ -310,78 +368,207 @@ def load_user_config() -> ScannerConfig:
     
     return config
 
+@dataclass(frozen=True)
+class DirectoryListing:
+    """Names found by a single scandir of a directory"""
+    mtime_ns: int
+    names: frozenset
+    dirs: frozenset
+    suffixes: frozenset
+
+    @classmethod
+    def from_entries(cls, mtime_ns: int, entries) -> 'DirectoryListing':
+        """Build a listing from (name, is_dir) pairs"""
+        names = set()
+        dirs = set()
+        suffixes = set()
+        for name, is_dir in entries:
+            names.add(name)
+            if is_dir:
+                dirs.add(name)
+            dot = name.rfind('.')
+            if dot > 0:
+                suffixes.add(name[dot:].lower())
+        return cls(mtime_ns, frozenset(names), frozenset(dirs), frozenset(suffixes))
+
 class ProjectDetector:
     """Detects project type based on files present"""
-    
-    @staticmethod
-    def detect_project_type(path: Path) -> ProjectType:
-        """Detect the project type based on characteristic files"""
-        
-        # Check for specific project files - order matters!
-        checks = [
-            # Flutter (check before Dart/Android)
-            (['pubspec.yaml', 'lib/main.dart'], ProjectType.FLUTTER),
-            # Android (check before general Java)
-            (['build.gradle', 'AndroidManifest.xml'], ProjectType.ANDROID),
-            (['gradle.properties', 'AndroidManifest.xml'], ProjectType.ANDROID),
-            # iOS
-            (['Podfile', '*.xcodeproj', '*.xcworkspace'], ProjectType.IOS),
-            # React (check before general JavaScript)
-            (['package.json', 'src/App.js'], ProjectType.REACT),
-            (['package.json', 'src/App.jsx'], ProjectType.REACT),
-            (['package.json', 'src/App.tsx'], ProjectType.REACT),
-            # Vue
-            (['vue.config.js'], ProjectType.VUE),
-            (['nuxt.config.js'], ProjectType.VUE),
-            # Angular
-            (['angular.json'], ProjectType.ANGULAR),
-            (['.angular-cli.json'], ProjectType.ANGULAR),
-            # TypeScript (check before JavaScript)
-            (['tsconfig.json'], ProjectType.TYPESCRIPT),
-            # JavaScript/Node.js
-            (['package.json'], ProjectType.JAVASCRIPT),
-            # Python
-            (['requirements.txt'], ProjectType.PYTHON),
-            (['setup.py'], ProjectType.PYTHON),
-            (['pyproject.toml'], ProjectType.PYTHON),
-            (['Pipfile'], ProjectType.PYTHON),
-            # Java
-            (['pom.xml'], ProjectType.JAVA),
-            (['build.gradle'], ProjectType.JAVA),
-            # .NET
-            (['*.csproj'], ProjectType.DOTNET),
-            (['*.sln'], ProjectType.DOTNET),
-            (['*.vbproj'], ProjectType.DOTNET),
-            (['*.fsproj'], ProjectType.DOTNET),
-            # Go
-            (['go.mod'], ProjectType.GO),
-            (['go.sum'], ProjectType.GO),
-            # Rust
-            (['Cargo.toml'], ProjectType.RUST),
-            (['Cargo.lock'], ProjectType.RUST),
-            # C++
-            (['CMakeLists.txt'], ProjectType.CPP),
-            (['Makefile'], ProjectType.CPP),
-            (['*.cpp'], ProjectType.CPP),
-            # Ruby
-            (['Gemfile'], ProjectType.RUBY),
-            (['Rakefile'], ProjectType.RUBY),
-            # PHP
-            (['composer.json'], ProjectType.PHP),
-            (['composer.lock'], ProjectType.PHP),
-        ]
-        
-        for patterns, project_type in checks:
-            for pattern in patterns:
-                if '*' in pattern:
-                    if list(path.glob(pattern)):
-                        return project_type
-                else:
-                    if (path / pattern).exists():
-                        return project_type
-        
+
+    # Marker table - order matters! Every marker in a rule must be present.
+    # Plain names are matched against the directory listing, '*.ext' entries
+    # against the suffixes in it and 'sub/name' entries against a listing of
+    # the subdirectory (only taken once 'sub' itself is known to exist).
+    MARKER_RULES = [
+        # Flutter (check before Dart/Android)
+        (('pubspec.yaml',), ProjectType.FLUTTER),
+        (('lib/main.dart',), ProjectType.FLUTTER),
+        # Android (check before general Java)
+        (('build.gradle',), ProjectType.ANDROID),
+        (('gradle.properties',), ProjectType.ANDROID),
+        (('AndroidManifest.xml',), ProjectType.ANDROID),
+        # iOS
+        (('Podfile',), ProjectType.IOS),
+        (('*.xcodeproj',), ProjectType.IOS),
+        (('*.xcworkspace',), ProjectType.IOS),
+        # React (check before general JavaScript)
+        (('package.json', 'src/App.js'), ProjectType.REACT),
+        (('package.json', 'src/App.jsx'), ProjectType.REACT),
+        (('package.json', 'src/App.tsx'), ProjectType.REACT),
+        # Vue
+        (('vue.config.js',), ProjectType.VUE),
+        (('nuxt.config.js',), ProjectType.VUE),
+        # Angular
+        (('angular.json',), ProjectType.ANGULAR),
+        (('.angular-cli.json',), ProjectType.ANGULAR),
+        # TypeScript (check before JavaScript)
+        (('tsconfig.json',), ProjectType.TYPESCRIPT),
+        # JavaScript/Node.js
+        (('package.json',), ProjectType.JAVASCRIPT),
+        # Python
+        (('requirements.txt',), ProjectType.PYTHON),
+        (('setup.py',), ProjectType.PYTHON),
+        (('pyproject.toml',), ProjectType.PYTHON),
+        (('Pipfile',), ProjectType.PYTHON),
+        # Java
+        (('pom.xml',), ProjectType.JAVA),
+        # .NET
+        (('*.csproj',), ProjectType.DOTNET),
+        (('*.sln',), ProjectType.DOTNET),
+        (('*.vbproj',), ProjectType.DOTNET),
+        (('*.fsproj',), ProjectType.DOTNET),
+        # Go
+        (('go.mod',), ProjectType.GO),
+        (('go.sum',), ProjectType.GO),
+        # Rust
+        (('Cargo.toml',), ProjectType.RUST),
+        (('Cargo.lock',), ProjectType.RUST),
+        # C++
+        (('CMakeLists.txt',), ProjectType.CPP),
+        (('Makefile',), ProjectType.CPP),
+        (('*.cpp',), ProjectType.CPP),
+        # Ruby
+        (('Gemfile',), ProjectType.RUBY),
+        (('Rakefile',), ProjectType.RUBY),
+        # PHP
+        (('composer.json',), ProjectType.PHP),
+        (('composer.lock',), ProjectType.PHP),
+    ]
+
+    # Every top-level name that can take part in a match, used to skip
+    # directories that cannot possibly be a project root
+    MARKER_NAMES = frozenset(
+        marker.split('/', 1)[0]
+        for markers, _ in MARKER_RULES
+        for marker in markers
+        if not marker.startswith('*')
+    )
+    MARKER_SUFFIXES = frozenset(
+        marker[1:].lower()
+        for markers, _ in MARKER_RULES
+        for marker in markers
+        if marker.startswith('*')
+    )
+
+    CACHE_LIMIT = 4096
+    _listing_cache: Dict[str, DirectoryListing] = {}
+    _type_cache: Dict[str, Tuple[Tuple[Tuple[str, int], ...], ProjectType]] = {}
+
+    @classmethod
+    def list_directory(cls, path: Path) -> Optional[DirectoryListing]:
+        """Return the cached scandir listing of a directory, refreshed on mtime change"""
+        key = str(path)
+        try:
+            mtime_ns = os.stat(key).st_mtime_ns
+        except OSError:
+            return None
+
+        cached = cls._listing_cache.get(key)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            return cached
+
+        entries = []
+        try:
+            with os.scandir(key) as it:
+                for entry in it:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries.append((entry.name, is_dir))
+        except OSError:
+            return None
+
+        listing = DirectoryListing.from_entries(mtime_ns, entries)
+        if len(cls._listing_cache) >= cls.CACHE_LIMIT:
+            cls._listing_cache.clear()
+        cls._listing_cache[key] = listing
+        return listing
+
+    @classmethod
+    def match_markers(cls, path: Path, listing: DirectoryListing,
+                      depends: Optional[List[Tuple[str, int]]] = None) -> ProjectType:
+        """Match the marker table against an already taken directory listing"""
+        if not (listing.names & cls.MARKER_NAMES or listing.suffixes & cls.MARKER_SUFFIXES):
+            return ProjectType.UNKNOWN
+
+        sub_listings: Dict[str, Optional[DirectoryListing]] = {}
+
+        def has_marker(marker: str) -> bool:
+            if marker.startswith('*'):
+                return marker[1:].lower() in listing.suffixes
+            if '/' not in marker:
+                return marker in listing.names
+            sub, name = marker.split('/', 1)
+            if sub not in listing.dirs:
+                return False
+            if sub not in sub_listings:
+                sub_listing = cls.list_directory(path / sub)
+                sub_listings[sub] = sub_listing
+                if sub_listing is not None and depends is not None:
+                    depends.append((str(path / sub), sub_listing.mtime_ns))
+            sub_listing = sub_listings[sub]
+            return sub_listing is not None and name in sub_listing.names
+
+        for markers, project_type in cls.MARKER_RULES:
+            if all(has_marker(marker) for marker in markers):
+                return project_type
+
         return ProjectType.UNKNOWN
 
+    @classmethod
+    def detect_project_type(cls, path: Path) -> ProjectType:
+        """Detect the project type based on characteristic files"""
+        key = str(path)
+        cached = cls._type_cache.get(key)
+        if cached is not None:
+            depends, project_type = cached
+            try:
+                if all(os.stat(dep).st_mtime_ns == mtime_ns for dep, mtime_ns in depends):
+                    return project_type
+            except OSError:
+                pass
+
+        listing = cls.list_directory(path)
+        if listing is None:
+            return ProjectType.UNKNOWN
+
+        depends = [(key, listing.mtime_ns)]
+        project_type = cls.match_markers(path, listing, depends)
+
+        if len(cls._type_cache) >= cls.CACHE_LIMIT:
+            cls._type_cache.clear()
+        cls._type_cache[key] = (tuple(depends), project_type)
+        return project_type
+
+    @classmethod
+    def detect_from_paths(cls, path: Path, rel_paths: Iterable[PurePosixPath]) -> ProjectType:
+        """Detect the project type from a listing of relative file paths instead of the disk"""
+        entries: Dict[str, bool] = {}
+        for rel_path in rel_paths:
+            name = rel_path.parts[0]
+            entries[name] = entries.get(name, False) or len(rel_path.parts) > 1
+        return cls.match_markers(path, DirectoryListing.from_entries(0, entries.items()))
+
     @staticmethod
     def should_ignore_xml(project_type: ProjectType, interactive: bool = True) -> bool:
         """Determine if XML files should be ignored for certain project types"""
@@ -606,14 +793,10 @@ class IgnorePatterns:
     }
     
     @classmethod
-    def get_ignore_patterns(cls, project_type: ProjectType, ignore_xml: bool = False) -> Tuple[Set[str], Set[str]]:
-        """Get ignore patterns for a specific project type"""
-        dirs = cls.UNIVERSAL_IGNORE_DIRS.copy()
-        files = cls.UNIVERSAL_IGNORE_FILES.copy()
-        
-        # Add XML ignore if requested
-        if ignore_xml:
-            files.add('*.xml')
+    def get_project_specific_patterns(cls, project_type: ProjectType) -> Tuple[Set[str], Set[str]]:
+        """Get only the patterns specific to a project type, without the universal ones"""
+        dirs: Set[str] = set()
+        files: Set[str] = set()
         
         if project_type in cls.PROJECT_SPECIFIC:
             specific = cls.PROJECT_SPECIFIC[project_type]
@@ -627,6 +810,22 @@ class IgnorePatterns:
             files.update(js_specific.get('files', set()))
         
         return dirs, files
+    
+    @classmethod
+    def get_ignore_patterns(cls, project_type: ProjectType, ignore_xml: bool = False) -> Tuple[Set[str], Set[str]]:
+        """Get ignore patterns for a specific project type"""
+        dirs = cls.UNIVERSAL_IGNORE_DIRS.copy()
+        files = cls.UNIVERSAL_IGNORE_FILES.copy()
+        
+        # Add XML ignore if requested
+        if ignore_xml:
+            files.add('*.xml')
+        
+        specific_dirs, specific_files = cls.get_project_specific_patterns(project_type)
+        dirs.update(specific_dirs)
+        files.update(specific_files)
+        
+        return dirs, files
 
     @classmethod
     def is_likely_binary(cls, file_path: Path) -> bool:
@@ -640,6 +839,36 @@ class IgnorePatterns:
         }
         return suffix in binary_extensions
 
+class IgnoreMatcher:
+    """Compiled form of a set of fnmatch-style ignore patterns"""
+    
+    def __init__(self, patterns):
+        self.patterns = frozenset(patterns)
+        normalized = {os.path.normcase(p) for p in self.patterns}
+        # Plain names are a set lookup, everything else goes into one regex
+        self.exact = {p for p in normalized if not any(c in p for c in '*?[')}
+        globs = sorted(normalized - self.exact)
+        self.regex = re.compile('|'.join(fnmatch.translate(p) for p in globs)) if globs else None
+    
+    _compiled: Dict[frozenset, 'IgnoreMatcher'] = {}
+    
+    @classmethod
+    def for_patterns(cls, patterns) -> 'IgnoreMatcher':
+        """Get a compiled matcher, shared by every scan using the same pattern set"""
+        key = frozenset(patterns)
+        matcher = cls._compiled.get(key)
+        if matcher is None:
+            matcher = cls(key)
+            cls._compiled[key] = matcher
+        return matcher
+    
+    def matches(self, name: str) -> bool:
+        """Check whether a single path component matches any pattern"""
+        name = os.path.normcase(name)
+        if name in self.exact:
+            return True
+        return self.regex is not None and self.regex.match(name) is not None
+
 class GitignoreParser:
     """Parse and apply .gitignore rules"""
     
@@ -653,206 +882,2626 @@ class GitignoreParser:
         
         try:
             with open(gitignore_path, 'r', encoding='utf-8', errors='ignore') as f:
-                for line in f:
-                    line = line.strip()
-                    # Skip comments and empty lines
-                    if line and not line.startswith('#'):
-                        patterns.add(line)
+                patterns = GitignoreParser.parse_lines(f)
         except Exception:
             pass
         
         return patterns
+    
+    @staticmethod
+    def parse_lines(lines: Iterable[str]) -> Set[str]:
+        """Patterns from the lines of a .gitignore"""
+        patterns = set()
+        for line in lines:
+            line = line.strip()
+            # Skip comments and empty lines
+            if line and not line.startswith('#'):
+                patterns.add(line)
+        return patterns
 
-class FastFileProcessor:
-    """Fast parallel file processing with improved binary detection"""
+class ContentCache:
+    """Thread-safe cache of processed file records keyed by path, size and mtime (blob SHA for --rev).
     
-    def __init__(self, config: ScannerConfig):
-        self.config = config
-        self.processed_files = 0
-        self.total_size = 0
+    With max_entries set, only the most recently used records are kept.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None):
+        self._records: 'collections.OrderedDict[Tuple[str, int, Union[int, str]], FileRecord]' = \
+            collections.OrderedDict()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._records)
+    
+    def get(self, key: Tuple[str, int, Union[int, str]]) -> Optional['FileRecord']:
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._records.move_to_end(key)
+            return record.copy()
+    
+    def put(self, key: Tuple[str, int, Union[int, str]], record: 'FileRecord'):
+        with self._lock:
+            self._records[key] = record.copy()
+            self._records.move_to_end(key)
+            if self.max_entries is not None and len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+class CodeCompactor:
+    """Language-aware removal of comments, docstrings and redundant whitespace.
+    
+    Strippers mark what they removed with a NUL and the continuation lines of
+    multi-line string literals with \\x01 (NUL never survives the binary check,
+    so neither can clash with content); _tidy() then drops lines that only held
+    comments, trims trailing whitespace and collapses blank runs, leaving
+    string contents untouched.
+    """
+    
+    REMOVED = '\x00'
+    PROTECTED = '\x01'
+    
+    C_STYLE_LANGUAGES = {
+        'c', 'cpp', 'csharp', 'java', 'javascript', 'typescript', 'go', 'rust',
+        'kotlin', 'scala', 'swift', 'objective-c', 'groovy', 'dart',
+    }
+    HASH_STYLE_LANGUAGES = {'shell', 'yaml', 'toml', 'make', 'dockerfile'}
+    
+    # Leftmost-match scanning: a string that starts first swallows any comment
+    # markers inside it, and unterminated quotes simply fall through as code
+    C_TOKENS = re.compile(r'''
+        (?P<line>//[^\n]*)
+      | (?P<block>/\*.*?\*/)
+      | (?P<string>"(?:\\.|[^"\\\n])*"
+                  |'(?:\\.|[^'\\\n])*'
+                  |`(?:\\.|[^`\\])*`)
+    ''', re.S | re.X)
+    
+    HEREDOC = re.compile(r'''<<-?\s*['"]?(\w+)['"]?''')
+    
+    CACHE_LIMIT = 20000
+    _cache: Dict[Tuple[str, str], str] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def supports(cls, language: str) -> bool:
+        return (language == 'python' or language in cls.C_STYLE_LANGUAGES
+                or language in cls.HASH_STYLE_LANGUAGES)
+    
+    @classmethod
+    def compact(cls, content: str, language: str, content_hash: Optional[str] = None) -> str:
+        """Compact source text; unsupported languages are returned unchanged"""
+        if not cls.supports(language):
+            return content
         
-    def is_binary_file(self, file_path: Path) -> bool:
-        """Check if a file is binary using multiple methods"""
+        key = (content_hash or hashlib.sha256(content.encode('utf-8')).hexdigest(), language)
+        with cls._lock:
+            cached = cls._cache.get(key)
+        if cached is not None:
+            return cached
         
-        # Method 1: Check by extension first (fastest)
-        if IgnorePatterns.is_likely_binary(file_path):
-            return True
+        if language == 'python':
+            marked = cls._mark_python(content)
+        elif language in cls.C_STYLE_LANGUAGES:
+            marked = cls._mark_c_style(content)
+        else:
+            marked = cls._mark_hash_style(content)
+        result = cls._tidy(marked, content.endswith('\n'))
         
-        # Method 2: Check file size - very large files are likely binary
+        with cls._lock:
+            if len(cls._cache) >= cls.CACHE_LIMIT:
+                cls._cache.clear()
+            cls._cache[key] = result
+        return result
+    
+    @classmethod
+    def _protect(cls, text: str) -> str:
+        return text.replace('\n', '\n' + cls.PROTECTED)
+    
+    @classmethod
+    def _removed(cls, text: str) -> str:
+        """Marker for removed text, keeping its line breaks"""
+        return cls.REMOVED + ('\n' + cls.REMOVED) * text.count('\n')
+    
+    @classmethod
+    def _mark_python(cls, content: str) -> str:
         try:
-            size = file_path.stat().st_size
-            if size > 10 * 1024 * 1024:  # 10MB
-                return True
-        except:
-            return True
+            tokens = list(tokenize.generate_tokens(io.StringIO(content).readline))
+        except (tokenize.TokenError, IndentationError, SyntaxError):
+            # Not valid Python (or Python 2): only tidy whitespace
+            return content
+        
+        line_offsets = [0]
+        for line in content.split('\n'):
+            line_offsets.append(line_offsets[-1] + len(line) + 1)
+        
+        def offset(pos: Tuple[int, int]) -> int:
+            return line_offsets[pos[0] - 1] + pos[1]
+        
+        fstring_start = getattr(tokenize, 'FSTRING_START', None)
+        fstring_end = getattr(tokenize, 'FSTRING_END', None)
+        skip = {tokenize.NL, tokenize.COMMENT}
+        edits = []  # (start, end, replacement)
+        at_statement_start = True
+        after_indent = False
+        open_fstrings = []
+        
+        for i, tok in enumerate(tokens):
+            if tok.type == tokenize.COMMENT:
+                if not (tok.start == (1, 0) and tok.string.startswith('#!')):
+                    edits.append((offset(tok.start), offset(tok.end), cls.REMOVED))
+                continue
+            if tok.type == tokenize.NL:
+                continue
             
-        # Method 3: Sample-based binary detection (for small files)
-        try:
-            with open(file_path, 'rb') as f:
-                # Read first 8192 bytes
-                chunk = f.read(8192)
-                if not chunk:
-                    return False
-                    
-                # Check for null bytes (common in binary files)
-                if b'\x00' in chunk:
-                    return True
-                    
-                # Check for high percentage of non-printable characters
-                printable_chars = sum(1 for byte in chunk if 32 <= byte <= 126 or byte in [9, 10, 13])
-                if len(chunk) > 0 and (printable_chars / len(chunk)) < 0.75:
-                    return True
-                    
-        except Exception:
-            # If we can't read it, assume it's binary
-            return True
+            if tok.type == tokenize.STRING and at_statement_start:
+                following = [t for t in tokens[i + 1:i + 8] if t.type not in skip]
+                if following and following[0].type == tokenize.NEWLINE:
+                    # A bare string statement (docstring); keep the block valid if it was all there was
+                    rest = [t for t in tokens[i + 1:] if t.type not in skip and t.type != tokenize.NEWLINE]
+                    empties_block = after_indent and (not rest or rest[0].type in (tokenize.DEDENT, tokenize.ENDMARKER))
+                    marker = cls._removed(tok.string)
+                    edits.append((offset(tok.start), offset(tok.end), '...' + marker if empties_block else marker))
+                    at_statement_start = False
+                    after_indent = False
+                    continue
             
-        return False
+            if tok.type == tokenize.STRING and tok.start[0] != tok.end[0]:
+                edits.append((offset(tok.start), offset(tok.end), cls._protect(tok.string)))
+            elif fstring_start is not None and tok.type == fstring_start:
+                open_fstrings.append(tok.start)
+            elif fstring_end is not None and tok.type == fstring_end and open_fstrings:
+                start = open_fstrings.pop()
+                if not open_fstrings and start[0] != tok.end[0]:
+                    begin, end = offset(start), offset(tok.end)
+                    edits.append((begin, end, cls._protect(content[begin:end])))
+            
+            if tok.type in (tokenize.NEWLINE, tokenize.DEDENT):
+                at_statement_start = True
+                after_indent = False
+            elif tok.type == tokenize.INDENT:
+                at_statement_start = True
+                after_indent = True
+            elif tok.type != tokenize.ENCODING:
+                at_statement_start = False
+                after_indent = False
         
-    def should_ignore(self, path: Path, is_dir: bool = False) -> bool:
-        """Check if a path should be ignored"""
-        name = path.name
+        # Comments inside a protected f-string span cannot exist, so edits never overlap
+        parts = []
+        position = 0
+        for start, end, replacement in sorted(edits):
+            if start < position:
+                continue
+            parts.append(content[position:start])
+            parts.append(replacement)
+            position = end
+        parts.append(content[position:])
+        return ''.join(parts)
+    
+    @classmethod
+    def _mark_c_style(cls, content: str) -> str:
+        def replace(match):
+            kind = match.lastgroup
+            text = match.group()
+            if kind == 'string':
+                return cls._protect(text)
+            if kind == 'block':
+                # Keep tokens on either side apart: a/**/b must not become ab
+                start, end = match.span()
+                glued = (start > 0 and not content[start - 1].isspace()
+                         and end < len(content) and not content[end].isspace())
+                return (' ' if glued else '') + cls._removed(text)
+            return cls.REMOVED
+        return cls.C_TOKENS.sub(replace, content)
+    
+    @classmethod
+    def _mark_hash_style(cls, content: str) -> str:
+        lines = content.split('\n')
+        heredoc_end = None
+        for n, line in enumerate(lines):
+            if heredoc_end is not None:
+                if line.strip() == heredoc_end:
+                    heredoc_end = None
+                else:
+                    lines[n] = cls.PROTECTED + line
+                continue
+            if n == 0 and line.startswith('#!'):
+                continue
+            
+            quote = None
+            cut = None
+            # Inside $(( ... )) a '#' is base notation (16#ff) or an operand, never a comment
+            arithmetic = 0
+            parens = 0
+            i = 0
+            while i < len(line):
+                char = line[i]
+                if quote:
+                    if char == quote and line[i - 1:i] != '\\':
+                        quote = None
+                elif line.startswith('$((', i):
+                    arithmetic += 1
+                    i += 3
+                    continue
+                elif arithmetic:
+                    if char == ')' and not parens and line.startswith('))', i):
+                        arithmetic -= 1
+                        i += 2
+                        continue
+                    if char == '(':
+                        parens += 1
+                    elif char == ')' and parens:
+                        parens -= 1
+                elif char in '"\'' and (i == 0 or line[i - 1] in ' \t=:[,({'):
+                    quote = char
+                elif char == '#' and (i == 0 or line[i - 1] in ' \t'):
+                    cut = i
+                    break
+                i += 1
+            
+            code = line if cut is None else line[:cut]
+            heredoc = cls.HEREDOC.search(code)
+            if heredoc and not quote:
+                heredoc_end = heredoc.group(1)
+            if cut is not None:
+                lines[n] = code + cls.REMOVED
+        return '\n'.join(lines)
+    
+    @classmethod
+    def _tidy(cls, marked: str, trailing_newline: bool) -> str:
+        out: List[str] = []
+        blank = False
+        for line in marked.split('\n'):
+            touched = cls.REMOVED in line
+            if line.startswith(cls.PROTECTED):
+                # Inside a string literal: keep verbatim unless a comment was cut after it
+                line = line[1:].replace(cls.REMOVED, '')
+                out.append(line.rstrip() if touched else line)
+                blank = False
+                continue
+            line = line.replace(cls.REMOVED, '').rstrip()
+            if not line:
+                if touched or blank or not out:
+                    continue
+                blank = True
+            else:
+                blank = False
+            out.append(line)
+        while out and not out[-1]:
+            out.pop()
+        return '\n'.join(out) + ('\n' if trailing_newline and out else '')
+
+class OutlineExtractor:
+    """Structural outline of a source file: imports, signatures and first docstring lines"""
+    
+    # Declarations worth keeping, per language, matched line by line
+    DECLARATIONS = {
+        'javascript': re.compile(
+            r'^\s*(?:export\s+(?:default\s+)?)?(?:'
+            r'(?:async\s+)?function\b|class\b|interface\b|type\s+\w+|enum\b|abstract\s+class\b'
+            r'|(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?(?:\([^)]*\)|\w+)\s*(?::[^=]+)?=>'
+            r'|(?:(?:static|async|public|private|protected|readonly|get|set)\s+)*'
+            r'(?!(?:if|for|while|switch|catch|return|function)\b)\w+\s*\([^)]*\)\s*(?::\s*[^{;]+)?\{\s*$)'),
+        'go': re.compile(r'^(?:func|type|var|const)\b'),
+        'java': re.compile(
+            r'^\s*(?:@\w+\s+)*(?:(?:public|protected|private|static|final|abstract|sealed|'
+            r'synchronized|native|default)\s+)*(?:'
+            r'(?:class|interface|enum|record)\s+\w+'
+            r'|(?!(?:return|new|else|throw)\b)[\w<>\[\],.?]+(?:\s+[\w<>\[\],.?]+)?\s+\w+\s*\([^;]*\)\s*'
+            r'(?:throws\s+[\w., ]+)?\s*\{?\s*$)'),
+        'rust': re.compile(
+            r'^\s*(?:#\[.*\]\s*)?(?:pub(?:\([\w:]+\))?\s+)?(?:(?:async|unsafe|const|extern(?:\s+"\w+")?)\s+)*'
+            r'(?:fn|struct|enum|trait|impl|type|mod|macro_rules!|union)\b'),
+    }
+    DECLARATIONS['typescript'] = DECLARATIONS['javascript']
+    
+    IMPORTS = {
+        'javascript': re.compile(r'^\s*(?:import\b|export\s+(?:\*|\{[^}]*\})\s+from\b|(?:const|let|var)\s+[\w{}\s,]+=\s*require\()'),
+        'go': re.compile(r'^(?:package|import)\b'),
+        'java': re.compile(r'^\s*(?:package|import)\b'),
+        'rust': re.compile(r'^\s*(?:pub\s+)?(?:use|extern\s+crate|mod\s+\w+\s*;)'),
+    }
+    IMPORTS['typescript'] = IMPORTS['javascript']
+    
+    DOC_COMMENT = re.compile(r'^\s*(?:///|//!|/\*\*|//)')
+    
+    CACHE_LIMIT = 5000
+    _cache: Dict[Tuple[str, str], Optional[str]] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def supports(cls, language: str) -> bool:
+        return language == 'python' or language in cls.DECLARATIONS
+    
+    @classmethod
+    def outline(cls, content: str, language: str, content_hash: Optional[str] = None) -> Optional[str]:
+        """Outline of the content, or None when the language or file is not supported"""
+        if not cls.supports(language):
+            return None
         
-        # Check custom ignore patterns first
-        if name in self.config.custom_ignore_dirs and is_dir:
-            return True
-        if name in self.config.custom_ignore_files and not is_dir:
-            return True
+        key = (content_hash or hashlib.sha256(content.encode('utf-8')).hexdigest(), language)
+        with cls._lock:
+            if key in cls._cache:
+                return cls._cache[key]
         
-        # Check custom extensions
-        if not is_dir and path.suffix.lower() in self.config.custom_ignore_extensions:
-            return True
+        if language == 'python':
+            result = cls._outline_python(content)
+        else:
+            result = cls._outline_regex(content, language)
         
-        # Check if it's a binary file (not for directories)
-        if not is_dir and self.is_binary_file(path):
-            return True
+        with cls._lock:
+            if len(cls._cache) >= cls.CACHE_LIMIT:
+                cls._cache.clear()
+            cls._cache[key] = result
+        return result
+    
+    @staticmethod
+    def _first_doc_line(node) -> Optional[str]:
+        doc = ast.get_docstring(node)
+        if not doc:
+            return None
+        first = doc.strip().splitlines()[0].strip()
+        return first.replace('"""', '\\"\\"\\"')
+    
+    @staticmethod
+    def _signature(lines: List[str], start: int, node: ast.AST) -> List[str]:
+        """Source lines of a def/class header, bounded by where the AST says its body starts"""
+        body = node.body[0]
+        end = body.lineno - 1
+        header = [line.rstrip() for line in lines[start:end]]
+        # Comment and blank lines between the header and the body are not part of it
+        while len(header) > 1 and (not header[-1].strip() or header[-1].lstrip().startswith('#')):
+            header.pop()
+        before_body = lines[end].encode('utf-8')[:body.col_offset].decode('utf-8', errors='ignore')
+        if before_body.strip() or not header:
+            # One-line form (def f(): return 1): keep the header part of the body's line
+            header.append(before_body.rstrip())
+        return header
+    
+    @classmethod
+    def _outline_python(cls, content: str) -> Optional[str]:
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return None
+        lines = content.splitlines()
+        out: List[str] = []
         
-        # Check directory patterns
-        if is_dir:
-            for pattern in self.config.ignore_dirs:
-                if fnmatch.fnmatch(name, pattern) or name == pattern:
-                    return True
+        doc = cls._first_doc_line(tree)
+        if doc:
+            out.append(f'"""{doc}"""')
         
-        # Check file patterns
-        for pattern in self.config.ignore_patterns:
-            if fnmatch.fnmatch(name, pattern):
-                return True
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                out.append('import ' + ', '.join(
+                    a.name + (f' as {a.asname}' if a.asname else '') for a in node.names))
+            elif isinstance(node, ast.ImportFrom):
+                module = '.' * (node.level or 0) + (node.module or '')
+                out.append(f'from {module} import ' + ', '.join(
+                    a.name + (f' as {a.asname}' if a.asname else '') for a in node.names))
         
-        # Check hidden files
-        if not self.config.include_hidden and name.startswith('.'):
-            return True
+        def visit(body, depth: int):
+            for node in body:
+                if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    continue
+                # Python < 3.8 reports the first decorator's line for decorated defs
+                first = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+                header_start = first
+                while header_start < len(lines) and lines[header_start].lstrip().startswith('@'):
+                    header_start += 1
+                if out and depth == 0:
+                    out.append('')
+                out.extend(line.rstrip() for line in lines[first:header_start])
+                header = cls._signature(lines, header_start, node)
+                out.extend(header)
+                
+                indent = ' ' * (len(header[0]) - len(header[0].lstrip()) + 4)
+                doc = cls._first_doc_line(node)
+                if doc:
+                    out.append(f'{indent}"""{doc}"""')
+                if isinstance(node, ast.ClassDef):
+                    before = len(out)
+                    visit(node.body, depth + 1)
+                    if len(out) == before and not doc:
+                        out.append(f'{indent}...')
+                else:
+                    out.append(f'{indent}...')
         
-        return False
+        visit(tree.body, 0)
+        return '\n'.join(out) if out else None
     
-    def process_file(self, file_path: Path) -> Optional[Dict]:
-        """Process a single file with better error handling"""
-        try:
-            # Check file size first
-            size = file_path.stat().st_size
-            if size > self.config.max_file_size:
-                if self.config.verbose:
-                    print(f"Skipping {file_path}: too large ({size/1024:.1f} KB)")
-                return None
+    @classmethod
+    def _outline_regex(cls, content: str, language: str) -> Optional[str]:
+        declaration = cls.DECLARATIONS[language]
+        imports = cls.IMPORTS[language]
+        out: List[str] = []
+        doc_first: Optional[str] = None
+        block_end: Optional[str] = None
+        
+        for line in content.splitlines():
+            stripped = line.strip()
+            if block_end is not None:
+                # Inside a multi-line import: keep it whole
+                out.append(line.rstrip())
+                if block_end in stripped:
+                    block_end = None
+                continue
             
-            # Check if binary
-            if self.is_binary_file(file_path):
-                if self.config.verbose:
-                    print(f"Skipping {file_path}: binary file detected")
-                return None
+            if imports.match(line):
+                out.append(line.rstrip())
+                if stripped.endswith('(') or (stripped.endswith('{') and language != 'rust'):
+                    block_end = ')' if stripped.endswith('(') else '}'
+                doc_first = None
+                continue
             
-            # Try to read file
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    
-                    # Additional check for binary content after reading
-                    if '\x00' in content:
-                        if self.config.verbose:
-                            print(f"Skipping {file_path}: null bytes detected")
-                        return None
-                    
-                    lines = content.splitlines()
-                    
-                    # Truncate if needed
-                    if len(lines) > self.config.max_lines_per_file:
-                        content = '\n'.join(lines[:self.config.max_lines_per_file])
-                        content += f"\n\n# [Truncated at {self.config.max_lines_per_file} lines]"
-                    
-                    return {
-                        'path': file_path,
-                        'content': content,
-                        'size': size,
-                        'lines': len(lines)
-                    }
-            except UnicodeDecodeError:
-                if self.config.verbose:
-                    print(f"Skipping {file_path}: encoding error")
-                return None
-            except Exception as e:
-                if self.config.verbose:
-                    print(f"Skipping {file_path}: read error - {e}")
-                return None
-                
-        except Exception as e:
-            if self.config.verbose:
-                print(f"Error processing {file_path}: {e}")
-            return None
+            if cls.DOC_COMMENT.match(line):
+                if doc_first is None:
+                    doc_first = line.rstrip()
+                continue
+            if doc_first is not None and stripped.startswith('*'):
+                continue
+            
+            if declaration.match(line):
+                if doc_first is not None:
+                    out.append(doc_first)
+                # Signature only: drop the opening brace of the body
+                signature = line.rstrip()
+                if signature.endswith('{'):
+                    signature = signature[:-1].rstrip()
+                out.append(signature)
+            doc_first = None
+        
+        return '\n'.join(out) if out else None
+
+class ImportGraph:
+    """Import/dependency graph over a project's files, for Python and JS/TS"""
     
-    def scan_directory(self, root_path: Path) -> List[Dict]:
-        """Scan directory for files with improved filtering"""
-        files_to_process = []
+    JS_EXTENSIONS = ('.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs')
+    JS_IMPORT = re.compile(
+        r'''(?:\bimport\s*(?:[\w*{}\s,$]+\s*from\s*)?|\bexport\s*[\w*{}\s,$]+\s*from\s*|\brequire\s*\(\s*|\bimport\s*\(\s*)'''
+        r'''['"]([^'"\n]+)['"]''')
+    
+    # Raw import specifiers per file, keyed by (path, size, mtime) so they survive across scans
+    CACHE_LIMIT = 100000
+    _edge_cache: Dict[Tuple[str, int, int], List[Tuple[int, str]]] = {}
+    _lock = threading.Lock()
+    
+    def __init__(self, root_path: Path, files: List[Path]):
+        self.root_path = root_path
+        self.files = set(files)
+        # Dotted module name -> candidate files, registered under every package prefix
+        # so both "src.pkg.mod" and "pkg.mod" resolve
+        self.modules: Dict[str, List[Path]] = {}
+        for path in files:
+            if path.suffix != '.py':
+                continue
+            parts = list(path.relative_to(root_path).with_suffix('').parts)
+            if parts[-1] == '__init__':
+                parts.pop()
+            for i in range(len(parts)):
+                self.modules.setdefault('.'.join(parts[i:]), []).append(path)
+    
+    @classmethod
+    def raw_imports(cls, path: Path) -> List[Tuple[int, str]]:
+        """(relative level, specifier) pairs found in a file, cached by size and mtime"""
+        try:
+            st = path.stat()
+        except OSError:
+            return []
+        key = (str(path), st.st_size, st.st_mtime_ns)
+        with cls._lock:
+            cached = cls._edge_cache.get(key)
+        if cached is not None:
+            return cached
         
-        # Collect files
+        imports: List[Tuple[int, str]] = []
         try:
-            for item in root_path.rglob('*'):
-                if self.processed_files >= self.config.max_files:
+            text = path.read_text(encoding='utf-8', errors='ignore')
+        except OSError:
+            text = ''
+        if path.suffix == '.py':
+            try:
+                tree = ast.parse(text)
+            except (SyntaxError, ValueError):
+                tree = None
+            for node in ast.walk(tree) if tree is not None else ():
+                if isinstance(node, ast.Import):
+                    imports.extend((0, alias.name) for alias in node.names)
+                elif isinstance(node, ast.ImportFrom):
+                    module = node.module or ''
+                    # "from pkg import name" may name a submodule; try that first
+                    imports.extend((node.level, f"{module}.{alias.name}" if module else alias.name)
+                                   for alias in node.names if alias.name != '*')
+                    if module:
+                        imports.append((node.level, module))
+        elif path.suffix in cls.JS_EXTENSIONS:
+            imports.extend((0, spec) for spec in cls.JS_IMPORT.findall(text) if spec.startswith('.'))
+        
+        with cls._lock:
+            if len(cls._edge_cache) >= cls.CACHE_LIMIT:
+                cls._edge_cache.clear()
+            cls._edge_cache[key] = imports
+        return imports
+    
+    def resolve_python(self, importer: Path, level: int, name: str) -> Optional[Path]:
+        if level:
+            base = importer.parent
+            for _ in range(level - 1):
+                base = base.parent
+            target = base.joinpath(*name.split('.')) if name else base
+            for candidate in (target.with_suffix('.py'), target / '__init__.py'):
+                if candidate in self.files:
+                    return candidate
+            return None
+        
+        candidates = self.modules.get(name)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        # Ambiguous short names: prefer the file sharing the longest path prefix with the importer
+        importer_parts = importer.parts
+        def shared(path: Path) -> int:
+            count = 0
+            for a, b in zip(path.parts, importer_parts):
+                if a != b:
                     break
-                    
-                if item.is_file():
-                    # Check if should ignore
-                    should_ignore = False
-                    
-                    # Check parent directories for ignore patterns
-                    for parent in item.parents:
-                        if self.should_ignore(parent, is_dir=True):
-                            should_ignore = True
-                            break
-                    
-                    if not should_ignore and not self.should_ignore(item):
-                        files_to_process.append(item)
-        except Exception as e:
-            if self.config.verbose:
-                print(f"Error scanning directory: {e}")
-            return []
+                count += 1
+            return count
+        return max(candidates, key=lambda p: (shared(p), -len(p.parts)))
+    
+    def resolve_js(self, importer: Path, spec: str) -> Optional[Path]:
+        target = Path(os.path.normpath(str(importer.parent / spec)))
+        candidates = [target]
+        candidates.extend(target.with_name(target.name + ext) for ext in self.JS_EXTENSIONS)
+        candidates.extend(target / f"index{ext}" for ext in self.JS_EXTENSIONS)
+        for candidate in candidates:
+            if candidate in self.files:
+                return candidate
+        return None
+    
+    def edges(self, path: Path) -> List[Path]:
+        """Project files imported by a file, in source order"""
+        targets = []
+        seen = set()
+        for level, spec in self.raw_imports(path):
+            if path.suffix == '.py':
+                target = self.resolve_python(path, level, spec)
+            else:
+                target = self.resolve_js(path, spec)
+            if target is not None and target != path and target not in seen:
+                seen.add(target)
+                targets.append(target)
+        return targets
+    
+    def reachable(self, entries: List[Path], max_hops: int) -> List[Path]:
+        """Files reachable from the entry points within max_hops, in breadth-first order"""
+        order = []
+        visited = set()
+        frontier = []
+        for entry in entries:
+            if entry not in visited:
+                visited.add(entry)
+                order.append(entry)
+                frontier.append(entry)
         
-        # Process files in parallel if enabled
-        results = []
-        if self.config.parallel_processing:
-            with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-                futures = [executor.submit(self.process_file, f) for f in files_to_process]
-                for future in concurrent.futures.as_completed(futures):
-                    try:
-                        result = future.result()
-                        if result:
-                            results.append(result)
-                            self.processed_files += 1
-                            self.total_size += result['size']
-                    except Exception as e:
-                        if self.config.verbose:
-                            print(f"Error in parallel processing: {e}")
-        else:
-            for file_path in files_to_process:
-                try:
-                    result = self.process_file(file_path)
-                    if result:
-                        results.append(result)
-                        self.processed_files += 1
-                        self.total_size += result['size']
-                except Exception as e:
+        for _ in range(max_hops):
+            next_frontier = []
+            for path in frontier:
+                for target in self.edges(path):
+                    if target not in visited:
+                        visited.add(target)
+                        order.append(target)
+                        next_frontier.append(target)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return order
+
+class SecretRedactor:
+    """Single-pass redaction of credentials in file content.
+    
+    Every pattern is a named branch of one compiled alternation. Before
+    matching, plain substring checks for each built-in pattern's trigger
+    literals (a cheap Aho-Corasick-style prefilter) pick the branches a file
+    can match at all, so most files never reach the regex engine, and a
+    leading lookahead on the first characters of those branches lets the
+    engine skip positions that cannot start a match.
+    """
+    
+    # (name, regex, trigger literals, triggers are case-insensitive)
+    PATTERNS = [
+        ('aws_access_key_id', r'(?<![A-Z0-9])(?:AKIA|ASIA|ABIA|ACCA)[0-9A-Z]{16}(?![A-Z0-9])',
+         ('AKIA', 'ASIA', 'ABIA', 'ACCA'), False),
+        ('private_key', r'-----BEGIN[A-Z ]{0,30}PRIVATE KEY(?: BLOCK)?-----[\s\S]*?-----END[A-Z ]{0,30}PRIVATE KEY(?: BLOCK)?-----',
+         ('-----BEGIN',), False),
+        ('jwt', r'eyJ[A-Za-z0-9_-]{8,}\.eyJ[A-Za-z0-9_-]{8,}\.[A-Za-z0-9_-]{8,}',
+         ('eyJ',), False),
+        ('github_token', r'gh[pousr]_[A-Za-z0-9]{36,255}',
+         ('ghp_', 'gho_', 'ghu_', 'ghs_', 'ghr_'), False),
+        ('slack_token', r'xox[abposr]-[A-Za-z0-9-]{10,}',
+         ('xox',), False),
+        # Secret-looking keys assigned a value; the value is redacted only if it looks random
+        ('generic_secret', r'(?i:secret|token|passwd|password|pwd|api[_-]?key|access[_-]?key|auth[_-]?key|credential)'
+                           r'[\w.-]{0,20}["\']?[ \t]*[:=][ \t]*["\']?(?P<generic_value>[A-Za-z0-9/+_=.~-]{16,})',
+         ('secret', 'token', 'passwd', 'password', 'pwd', 'apikey', 'api_key', 'api-key',
+          'accesskey', 'access_key', 'access-key', 'authkey', 'auth_key', 'auth-key', 'credential'), True),
+    ]
+    
+    # Bits per character; random base64 scores 4.5+, English-like identifiers about 3-3.5
+    ENTROPY_THRESHOLD = 3.5
+    
+    # Inline flags at the start of a pattern, which only apply globally there
+    LEADING_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+    # Group references, unless their backslash or parenthesis is itself escaped
+    GROUP_REFERENCE = re.compile(r'(?<!\\)(?:\\\\)*(?:\\[1-9]|\(\?P=|\(\?\()')
+    
+    def __init__(self, custom_patterns: Iterable[str] = ()):
+        self.patterns = list(self.PATTERNS)
+        for i, pattern in enumerate(custom_patterns):
+            self.patterns.append((f'custom_{i + 1}', self.branch(pattern), None, False))
+        self.labels = {name: pattern for name, pattern, _, _ in self.patterns}
+        self._compiled: Dict[frozenset, 're.Pattern'] = {}
+        self._lock = threading.Lock()
+        # Fail at startup, not once per file, if the patterns cannot be combined
+        self.matcher(frozenset(self.labels))
+    
+    @classmethod
+    def branch(cls, pattern: str) -> str:
+        """A --redact-pattern rewritten to be one branch of the combined alternation.
+        
+        Leading inline flags such as (?i) become a scoped group, since global
+        flags are only allowed at the very start of the whole regex. Named
+        groups and references to groups would clash with the other branches'
+        groups, and a pattern matching the empty string would redact between
+        every character, so these are rejected.
+        """
+        compiled = re.compile(pattern)
+        if compiled.groupindex or cls.GROUP_REFERENCE.search(pattern):
+            raise re.error(f"{pattern!r}: named groups and group references are not supported")
+        if compiled.fullmatch('') is not None:
+            raise re.error(f"{pattern!r}: matches the empty string")
+        flags = ''
+        while True:
+            match = cls.LEADING_FLAGS.match(pattern)
+            if match is None:
+                break
+            flags += match.group(1)
+            pattern = pattern[match.end():]
+        if flags:
+            # A newline ends a trailing comment in verbose mode before the group closes
+            pattern = f"(?{flags}:{pattern}{chr(10) if 'x' in flags else ''})"
+        return pattern
+    
+    def active_patterns(self, text: str) -> frozenset:
+        """Names of the patterns whose trigger literals occur in the text"""
+        lowered = None
+        active = set()
+        for name, _, triggers, case_insensitive in self.patterns:
+            if triggers is None:
+                active.add(name)
+                continue
+            if case_insensitive:
+                if lowered is None:
+                    lowered = text.lower()
+                haystack = lowered
+            else:
+                haystack = text
+            if any(trigger in haystack for trigger in triggers):
+                active.add(name)
+        return frozenset(active)
+    
+    def matcher(self, active: frozenset) -> 're.Pattern':
+        """One alternation over the active patterns, compiled once per combination"""
+        with self._lock:
+            compiled = self._compiled.get(active)
+        if compiled is not None:
+            return compiled
+        branches = []
+        first_chars = set()
+        for name, pattern, triggers, case_insensitive in self.patterns:
+            if name not in active:
+                continue
+            branches.append(f'(?P<{name}>{pattern})')
+            if triggers is None:
+                first_chars = None
+            elif first_chars is not None:
+                for trigger in triggers:
+                    first_chars.update({trigger[0].lower(), trigger[0].upper()} if case_insensitive else {trigger[0]})
+        regex = '|'.join(branches)
+        if first_chars:
+            regex = f"(?=[{re.escape(''.join(sorted(first_chars)))}])(?:{regex})"
+        compiled = re.compile(regex)
+        with self._lock:
+            self._compiled[active] = compiled
+        return compiled
+    
+    @staticmethod
+    def entropy(value: str) -> float:
+        counts: Dict[str, int] = {}
+        for char in value:
+            counts[char] = counts.get(char, 0) + 1
+        length = len(value)
+        return -sum(c / length * math.log2(c / length) for c in counts.values())
+    
+    def looks_random(self, value: str) -> bool:
+        """Dotted names, words and placeholders are not secrets; mixed random strings are"""
+        return (any(c.isdigit() for c in value) and any(c.isalpha() for c in value)
+                and self.entropy(value) >= self.ENTROPY_THRESHOLD)
+    
+    def redact(self, text: str) -> Tuple[str, Dict[str, int]]:
+        """Return the text with secrets replaced by [REDACTED:<pattern>] and hits per pattern"""
+        active = self.active_patterns(text)
+        if not active:
+            return text, {}
+        hits: Dict[str, int] = {}
+        pieces = []
+        last = 0
+        for match in self.matcher(active).finditer(text):
+            name = match.lastgroup
+            if name == 'generic_value':
+                name = 'generic_secret'
+            if name == 'generic_secret':
+                value = match.group('generic_value')
+                if not self.looks_random(value):
+                    continue
+                start, end = match.span('generic_value')
+            else:
+                start, end = match.span()
+            pieces.append(text[last:start])
+            pieces.append(f'[REDACTED:{name}]')
+            last = end
+            hits[name] = hits.get(name, 0) + 1
+        if not hits:
+            return text, {}
+        pieces.append(text[last:])
+        return ''.join(pieces), hits
+
+class FileRecord:
+    """One processed file, kept small until the snapshot is written.
+    
+    Content that is exactly the file's text is not held at all: text() reads
+    it back from disk at render time. Only transformed content (redacted,
+    compacted, outlined or truncated) and content with no file behind it
+    (archive members, git blobs) is kept, as UTF-8 bytes or a SpilledContent
+    handle. Paths are two strings, the root shared by every record of a scan.
+    Mapping access (record['content'], record.get('redactions')) works as it
+    did for the dict records this replaces.
+    """
+    
+    __slots__ = ('root', 'rel_path', 'size', 'mtime', 'lines', 'hash', 'truncated', 'outlined',
+                 'redactions', 'data')
+    
+    # Written instead of content that no longer matches the record by the time it is rendered
+    STALE = b'# [File changed or removed after it was scanned; content omitted]'
+    
+    KEYS = ('path', 'rel_path', 'content', 'size', 'mtime', 'lines', 'hash', 'truncated', 'outlined', 'redactions')
+    
+    def __init__(self, path: Path, size: int, mtime: int, lines: int, hash: str,
+                 truncated: bool = False, outlined: bool = False,
+                 redactions: Optional[Dict[str, int]] = None,
+                 data: Union[None, bytes, 'SpilledContent'] = None):
+        # Relative to the file's own directory until add_result() rebases it on the scan root
+        self.root = sys.intern(str(path.parent))
+        self.rel_path = path.name
+        self.size = size
+        self.mtime = mtime
+        self.lines = lines
+        self.hash = hash
+        self.truncated = truncated
+        self.outlined = outlined
+        self.redactions = redactions
+        self.data = data
+    
+    @property
+    def path(self) -> Path:
+        return Path(self.root, self.rel_path)
+    
+    def rebase(self, root: str):
+        """Make rel_path relative to the scan root"""
+        if root != self.root:
+            self.rel_path = self.path.relative_to(root).as_posix()
+            self.root = root
+    
+    @staticmethod
+    def clean_utf8(data: bytes) -> bytes:
+        """data without invalid UTF-8, as decode(errors='ignore') would leave it; valid input is returned as is"""
+        if data.isascii():
+            return data
+        try:
+            # Decoding is the cheapest validation there is; the str is dropped right away
+            data.decode('utf-8')
+            return data
+        except UnicodeDecodeError:
+            return data.decode('utf-8', errors='ignore').encode('utf-8')
+    
+    @classmethod
+    def normalize(cls, data: bytes) -> bytes:
+        """Raw file bytes as a text-mode open would see them, still as UTF-8 bytes.
+        
+        Invalid UTF-8 is dropped and \r\n and lone \r become \n, so the
+        result equals open(path, 'r', encoding='utf-8', errors='ignore').read()
+        encoded again, without decoding valid files at all.
+        """
+        data = cls.clean_utf8(data)
+        if b'\r' in data:
+            data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+        return data
+    
+    def load(self) -> bytes:
+        """The file's content, read again, if it is still the file that was scanned.
+        
+        Size and mtime must match the record and the content its hash, so the
+        snapshot never pairs a record's metadata (lines, hash, limits) with
+        other content. A file changed or removed since the scan gets STALE.
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if st.st_size == self.size and st.st_mtime_ns == self.mtime:
+                    # Same reading as process_file, so the content is what was hashed and counted
+                    data = self.normalize(f.read(self.size + 1))
+                    if self.hash is None or hashlib.sha256(data).hexdigest() == self.hash:
+                        return data
+        except OSError:
+            pass
+        return self.STALE
+    
+    def content_bytes(self) -> bytes:
+        if self.data is None:
+            return self.load()
+        return bytes(self.data)
+    
+    def text(self) -> str:
+        return self.content_bytes().decode('utf-8')
+    
+    def copy(self) -> 'FileRecord':
+        record = FileRecord.__new__(FileRecord)
+        for name in self.__slots__:
+            setattr(record, name, getattr(self, name))
+        return record
+    
+    def state(self) -> Dict:
+        """Plain-data form for checkpoints; content only when it cannot be re-read"""
+        entry = {name: getattr(self, name) for name in self.__slots__ if name not in ('root', 'data')}
+        if self.data is not None:
+            entry['content'] = self.text()
+        return entry
+    
+    @classmethod
+    def from_state(cls, path: Path, entry: Dict) -> 'FileRecord':
+        content = entry.get('content')
+        return cls(path, entry['size'], entry.get('mtime'), entry['lines'], entry.get('hash'),
+                   entry.get('truncated', False), entry.get('outlined', False), entry.get('redactions'),
+                   None if content is None else content.encode('utf-8'))
+    
+    def __getitem__(self, key: str):
+        if key == 'content':
+            return self.text()
+        if key not in self.KEYS or (key == 'redactions' and self.redactions is None):
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key: str) -> bool:
+        return key in self.KEYS and (key != 'redactions' or self.redactions is not None)
+    
+    def get(self, key: str, default=None):
+        return self[key] if key in self else default
+
+
+class RecordContent:
+    """Stand-in for a record's content in rendered lines; str() loads it when written"""
+    
+    __slots__ = ('record',)
+    
+    def __init__(self, record: FileRecord):
+        self.record = record
+    
+    def __str__(self) -> str:
+        return self.record.text()
+    
+    def __bytes__(self) -> bytes:
+        return self.record.content_bytes()
+
+
+def content_of(file_info: Union[FileRecord, Dict]) -> Union[str, RecordContent, 'SpilledContent']:
+    """A record's content for rendering, without loading it yet when it lives on disk"""
+    if isinstance(file_info, FileRecord):
+        return RecordContent(file_info)
+    return file_info['content']
+
+
+def content_bytes(file_info: Union[FileRecord, Dict]) -> bytes:
+    """A record's content as UTF-8 bytes; held or on-disk content is never decoded"""
+    content = content_of(file_info)
+    if isinstance(content, (RecordContent, SpilledContent)):
+        return bytes(content)
+    return content.encode('utf-8')
+
+
+class SpilledContent:
+    """Handle to file content parked in a ContentSpill; str() reads it back"""
+    
+    __slots__ = ('spill', 'offset', 'length')
+    
+    def __init__(self, spill: 'ContentSpill', offset: int, length: int):
+        self.spill = spill
+        self.offset = offset
+        self.length = length
+    
+    def __str__(self) -> str:
+        return self.spill.read(self.offset, self.length).decode('utf-8')
+    
+    def __bytes__(self) -> bytes:
+        return self.spill.read(self.offset, self.length)
+
+class ContentSpill:
+    """Memory ceiling for processed content, with backpressure and a temp-file overflow.
+    
+    Half of the budget is for content kept inline in records; once that is
+    used up, further content is appended to an anonymous temp file and the
+    record holds a SpilledContent handle that is read back at render time.
+    The other half bounds reads in flight: reserve() blocks a reader while
+    earlier reads still hold that much, so the pool cannot outrun the budget.
+    """
+    
+    # Decoded text, its UTF-8 copy for hashing and the line list all live at once
+    READ_OVERHEAD = 4
+    
+    def __init__(self, max_memory: int):
+        self.max_memory = max_memory
+        self.resident = 0
+        self.in_flight = 0
+        self.spilled_files = 0
+        self.spilled_bytes = 0
+        self._file = tempfile.TemporaryFile(prefix='codeprint-spill-')
+        self._file_lock = threading.Lock()
+        self._budget = threading.Condition()
+    
+    def reserve(self, size: int) -> int:
+        """Block until a read of a file this large fits; returns the amount to release()"""
+        amount = size * self.READ_OVERHEAD
+        with self._budget:
+            # A lone reader always proceeds, so oversized files cannot deadlock the scan
+            while self.in_flight and self.in_flight + amount > self.max_memory // 2:
+                self._budget.wait()
+            self.in_flight += amount
+        return amount
+    
+    def release(self, amount: int):
+        with self._budget:
+            self.in_flight -= amount
+            self._budget.notify_all()
+    
+    def store(self, record: FileRecord) -> FileRecord:
+        """Keep the record's content inline while the budget lasts, else move it to disk"""
+        data = record.data
+        if not isinstance(data, bytes):
+            return record  # nothing held: re-read from the file when rendering
+        with self._budget:
+            if self.resident + len(data) <= self.max_memory // 2:
+                self.resident += len(data)
+                return record
+        with self._file_lock:
+            self._file.seek(0, os.SEEK_END)
+            offset = self._file.tell()
+            self._file.write(data)
+            self.spilled_files += 1
+            self.spilled_bytes += len(data)
+        record.data = SpilledContent(self, offset, len(data))
+        return record
+    
+    def read(self, offset: int, length: int) -> bytes:
+        with self._file_lock:
+            self._file.seek(offset)
+            return self._file.read(length)
+
+def parse_size(text: str) -> int:
+    """Parse a size such as 512M, 2G or 800K into bytes; a bare number means megabytes"""
+    text = text.strip().upper().rstrip('B')
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text) * units['M'])
+
+def parse_duration(text: str) -> float:
+    """Parse a duration such as 2s, 500ms, 1.5m or 1h into seconds; a bare number means seconds"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d*)?|\.\d+)\s*(ms|s|m|h)?\s*', text.lower())
+    if match is None:
+        raise ValueError(f"invalid duration: {text}")
+    units = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return float(match.group(1)) * units[match.group(2) or 's']
+
+def read_cgroup_cpu_quota() -> Optional[float]:
+    """CPUs granted by the cgroup CPU quota (v2 or v1), None when unlimited or unknown"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    for base in ('/sys/fs/cgroup/cpu', '/sys/fs/cgroup/cpu,cpuacct'):
+        try:
+            with open(os.path.join(base, 'cpu.cfs_quota_us')) as f:
+                quota = int(f.read())
+            with open(os.path.join(base, 'cpu.cfs_period_us')) as f:
+                period = int(f.read())
+            if quota > 0 and period > 0:
+                return quota / period
+            return None
+        except (OSError, ValueError):
+            continue
+    return None
+
+_available_cpus: Optional[int] = None
+
+def available_cpus() -> int:
+    """CPUs this process may actually use: affinity mask and cgroup quota included"""
+    global _available_cpus
+    if _available_cpus is None:
+        count = os.cpu_count() or 1
+        if hasattr(os, 'sched_getaffinity'):
+            count = len(os.sched_getaffinity(0)) or count
+        quota = read_cgroup_cpu_quota()
+        if quota is not None:
+            count = min(count, max(1, int(quota + 0.5)))
+        _available_cpus = count
+    return _available_cpus
+
+class IOConcurrency:
+    """Limit on in-flight file reads, tuned from what the reads are observed to cost.
+    
+    Each window of completed reads yields the mean wall time per file and the
+    part of it spent on the CPU. A pool keeps the CPUs busy with
+    cpus * (wall / cpu) reads in flight, so slow opens on network or FUSE
+    mounts push the limit up and cached local reads pull it down to about
+    one per CPU. If raising the limit made throughput drop, the previous
+    limit becomes a ceiling.
+    """
+    
+    INITIAL = 4
+    MIN_WINDOW = 16
+    TOLERANCE = 0.1
+    
+    def __init__(self, cap: int, cpus: Optional[int] = None):
+        self.cap = max(1, cap)
+        self.cpus = cpus or available_cpus()
+        self.ceiling = self.cap
+        self.limit = min(self.INITIAL, self.cap)
+        self.peak = self.limit
+        self.throughput = 0.0
+        self._previous: Optional[Tuple[int, float]] = None  # (limit, files/s) of the last window
+        self._lock = threading.Lock()
+        self._reset_window()
+    
+    def _reset_window(self):
+        self._started = time.perf_counter()
+        self._count = 0
+        self._wall = 0.0
+        self._cpu = 0.0
+    
+    def record(self, wall: float, cpu: float):
+        """Account one completed read and retune at the end of each window"""
+        with self._lock:
+            self._count += 1
+            self._wall += wall
+            self._cpu += cpu
+            if self._count < max(self.MIN_WINDOW, 2 * self.limit):
+                return
+            elapsed = time.perf_counter() - self._started
+            throughput = self._count / elapsed if elapsed > 0 else 0.0
+            
+            if (self._previous is not None and self.limit > self._previous[0]
+                    and throughput < self._previous[1] * (1 - self.TOLERANCE)):
+                # More threads made it slower: step back and stay below
+                self.ceiling = self._previous[0]
+            target = round(self.cpus * self._wall / max(self._cpu, 1e-6))
+            
+            self._previous = (self.limit, throughput)
+            self.throughput = throughput
+            self.limit = max(1, min(target, self.ceiling, self.cap))
+            self.peak = max(self.peak, self.limit)
+            self._reset_window()
+
+class ScanCheckpoint:
+    """Append-only state file that lets an interrupted scan continue where it stopped.
+    
+    The first line identifies the root and the scan settings. 'walk' lines
+    carry the walker's pending directory stack, the files found since the
+    previous walk line and the subprojects found so far, a 'walked' line marks
+    the walk as finished, and 'record' lines carry processed files. Nothing
+    is written until a scan has run for INTERVAL seconds, so quick scans
+    never touch disk, and a torn last line from a kill mid-write is ignored.
+    """
+    
+    INTERVAL = 5.0
+    
+    def __init__(self, path: Path, root: Path, config: ScannerConfig):
+        self.path = path
+        self.root = root
+        self.key = self.settings_key(config)
+        self.last_write = time.monotonic()
+        self._file = None
+        # Resumed state
+        self.stack: Optional[List[Tuple[Path, Tuple[ProjectType, ...]]]] = None
+        self.files: List[Path] = []
+        self.subprojects: Dict[str, ProjectType] = {}
+        self.walk_complete = False
+        self.records: Dict[str, Dict] = {}
+        self._pending: List[Dict] = []
+        self._deferred: List[Dict] = []
+        self._walked = 0
+    
+    @staticmethod
+    def default_path(root: Path) -> Path:
+        """State file for a root, kept next to the user configuration"""
+        digest = hashlib.sha256(str(root).encode('utf-8')).hexdigest()[:16]
+        return Path(os.path.dirname(get_config_file_path())) / 'checkpoints' / f"{root.name or 'root'}-{digest}.state"
+    
+    @staticmethod
+    def settings_key(config: ScannerConfig) -> str:
+        """Stable digest of the settings that decide which files are read and how"""
+        def plain(value):
+            if isinstance(value, (set, frozenset)):
+                return sorted(value)
+            if isinstance(value, Enum):
+                return value.value
+            return value
+        signature = [plain(v) for v in WarmIndex.settings_signature(config)]
+        return hashlib.sha256(json.dumps(signature, default=str).encode('utf-8')).hexdigest()
+    
+    def load(self) -> bool:
+        """Read a previous state file; False when there is none or it belongs to other settings"""
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except OSError:
+            return False
+        with f:
+            header = None
+            good_bytes = 0
+            for line in f:
+                if not line.endswith('\n'):
+                    break
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                good_bytes += len(line.encode('utf-8'))
+                kind = entry.get('type')
+                if header is None:
+                    if kind != 'header' or entry.get('root') != str(self.root) or entry.get('settings') != self.key:
+                        return False
+                    header = entry
+                elif kind == 'walk':
+                    self.stack = [(self.root / rel, tuple(ProjectType(t) for t in scope))
+                                  for rel, scope in entry['stack']]
+                    self.files.extend(self.root / rel for rel in entry['files'])
+                    self.subprojects.update((rel, ProjectType(t)) for rel, t in entry['subprojects'].items())
+                elif kind == 'walked':
+                    self.walk_complete = True
+                elif kind == 'record':
+                    self.records[entry['rel_path']] = entry
+        if header is None:
+            return False
+        # Drop a torn tail so appended lines start on a fresh line
+        with open(self.path, 'r+b') as f:
+            f.truncate(good_bytes)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._walked = len(self.files)
+        return True
+    
+    @property
+    def active(self) -> bool:
+        """Whether the state file is being written (the scan outlived INTERVAL or was resumed)"""
+        return self._file is not None
+    
+    def due(self) -> bool:
+        return time.monotonic() - self.last_write >= self.INTERVAL
+    
+    def _write(self, entry: Dict):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._file.write(json.dumps({'type': 'header', 'root': str(self.root), 'settings': self.key}) + '\n')
+            for deferred in self._deferred:
+                self._file.write(json.dumps(deferred, ensure_ascii=False) + '\n')
+            self._deferred = []
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    
+    def save_walk(self, stack, files: List[Path], subprojects: Dict[str, ProjectType],
+                  complete: bool = False, defer: bool = False):
+        """Record the walker's position: pending directories and files found since the last save.
+        
+        With defer, the entries are only written if the file is opened later.
+        """
+        entries = [{
+            'type': 'walk',
+            'stack': [(d.relative_to(self.root).as_posix(), [t.value for t in scope]) for d, scope in stack],
+            'files': [p.relative_to(self.root).as_posix() for p in files[self._walked:]],
+            'subprojects': {rel: t.value for rel, t in subprojects.items()},
+        }]
+        if complete:
+            entries.append({'type': 'walked'})
+        self._walked = len(files)
+        if defer:
+            self._deferred.extend(entries)
+            return
+        for entry in entries:
+            self._write(entry)
+        self.flush()
+    
+    def add_record(self, record: FileRecord, rel_path: str):
+        self._pending.append(record.copy())
+        if self.due():
+            self.flush()
+    
+    def flush(self):
+        """Write queued records and sync the file"""
+        for record in self._pending:
+            entry = record.state()
+            entry['type'] = 'record'
+            self._write(entry)
+        self._pending = []
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self.last_write = time.monotonic()
+    
+    def resumed_record(self, path: Path) -> Optional[FileRecord]:
+        """A record from the previous run for this file, if the file has not changed since"""
+        rel_path = path.relative_to(self.root).as_posix()
+        entry = self.records.get(rel_path)
+        if entry is None:
+            return None
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        if st.st_size != entry['size'] or st.st_mtime_ns != entry.get('mtime'):
+            return None
+        return FileRecord.from_state(path, entry)
+    
+    def discard(self):
+        """Remove the state file once the scan has completed"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+class SnapshotMemo:
+    """Last snapshot of a directory plus a Merkle fingerprint of the tree it came from.
+    
+    Each walked directory gets a hash over the names, sizes and mtimes of
+    its files and the hashes of its subdirectories, so the root hash covers
+    the whole walk. When the root hash and the settings match, the stored
+    output is reused as is. Otherwise comparing the trees top-down finds the
+    changed directories without visiting unchanged subtrees, and the stored
+    records of unchanged files are reused instead of read again.
+    """
+    
+    def __init__(self, path: Path, root: Path, config: ScannerConfig):
+        self.path = path
+        self.root = root
+        self.key = self.settings_key(config)
+        self.loaded = False
+        self.tree: Dict[str, Dict] = {}
+        self.records: Dict[str, List[Dict]] = {}
+        self.project_name = root.name
+        self.files = 0
+    
+    @staticmethod
+    def default_path(root: Path) -> Path:
+        """Memo for a root, kept next to the user configuration"""
+        digest = hashlib.sha256(str(root).encode('utf-8')).hexdigest()[:16]
+        return Path(os.path.dirname(get_config_file_path())) / 'snapshots' / f"{root.name or 'root'}-{digest}.json"
+    
+    @staticmethod
+    def settings_key(config: ScannerConfig) -> str:
+        """Digest of the scan settings plus everything else that shapes the output"""
+        output = [ScanCheckpoint.settings_key(config), config.output_format.value, config.write_index, __version__]
+        return hashlib.sha256(json.dumps(output).encode('utf-8')).hexdigest()
+    
+    @property
+    def output_path(self) -> Path:
+        return self.path.with_suffix('.out')
+    
+    def own_files(self, config: ScannerConfig) -> Set[str]:
+        """Name patterns of files codeprint itself writes, left out of memoized scans.
+        
+        Otherwise a snapshot written into the tree (the default location)
+        would change the fingerprint and the output of every following run.
+        """
+        names = {'project_snapshot_*', self.path.name, self.output_path.name,
+                 SnapshotIndex.sidecar_path(self.output_path).name, self.path.with_suffix('.tmp').name,
+                 Path(config.checkpoint_file or ScanCheckpoint.default_path(self.root)).name}
+        if config.output_file:
+            output = Path(config.output_file)
+            names.update({output.name, SnapshotIndex.sidecar_path(output).name})
+        return names
+    
+    @staticmethod
+    def build_tree(root: Path, files: List[Path]) -> Dict[str, Dict]:
+        """Merkle tree of a walk: root-relative directory -> {'hash', 'dirs'}"""
+        entries: Dict[str, List[str]] = {'': []}
+        dirs: Dict[str, Set[str]] = {'': set()}
+        for path in files:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            parent, _, name = path.relative_to(root).as_posix().rpartition('/')
+            entries.setdefault(parent, []).append(f"f\0{name}\0{st.st_size}\0{st.st_mtime_ns}")
+            # Register the chain of ancestors up to the first one already known
+            while parent not in dirs:
+                dirs[parent] = set()
+                grandparent, _, name = parent.rpartition('/')
+                dirs.setdefault(grandparent, set()).add(name)
+                entries.setdefault(grandparent, [])
+                parent = grandparent
+        
+        tree: Dict[str, Dict] = {}
+        # Deepest first, so every child is hashed before its parent
+        for rel_dir in sorted(dirs, key=lambda d: d.count('/') + bool(d), reverse=True):
+            lines = entries.get(rel_dir, [])
+            for name in dirs[rel_dir]:
+                child = f"{rel_dir}/{name}" if rel_dir else name
+                lines.append(f"d\0{name}\0{tree[child]['hash']}")
+            digest = hashlib.sha256('\n'.join(sorted(lines)).encode('utf-8')).hexdigest()
+            tree[rel_dir] = {'hash': digest, 'dirs': sorted(dirs[rel_dir])}
+        return tree
+    
+    def load(self) -> bool:
+        """Read the stored memo; False when there is none or it belongs to other settings"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if memo.get('root') != str(self.root) or memo.get('settings') != self.key:
+            return False
+        self.tree = memo['tree']
+        self.records = memo['records']
+        self.project_name = memo['project_name']
+        self.files = memo['files']
+        self.loaded = True
+        return True
+    
+    def matches(self, tree: Dict[str, Dict]) -> bool:
+        """Whether the stored output was made from exactly this tree"""
+        return self.loaded and self.tree.get('', {}).get('hash') == tree['']['hash'] and self.output_path.exists()
+    
+    def diff(self, tree: Dict[str, Dict]) -> Tuple[List[str], List[str]]:
+        """(roots of unchanged subtrees, changed directories), descending only where hashes differ"""
+        unchanged, changed = [], []
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            old = self.tree.get(rel_dir)
+            if old is not None and old['hash'] == tree[rel_dir]['hash']:
+                unchanged.append(rel_dir)
+                continue
+            changed.append(rel_dir)
+            stack.extend(f"{rel_dir}/{name}" if rel_dir else name for name in tree[rel_dir]['dirs'])
+        return unchanged, changed
+    
+    def reusable_records(self, tree: Dict[str, Dict]) -> Iterator[Tuple[Tuple[str, int, int], FileRecord]]:
+        """Content-cache entries for stored records in directories still present in the tree.
+        
+        Files in unchanged subtrees are known to match; in changed directories
+        the cache key (path, size, mtime) still filters out the files that changed.
+        """
+        unchanged, changed = self.diff(tree)
+        stack = list(unchanged)
+        while stack:
+            rel_dir = stack.pop()
+            changed.append(rel_dir)
+            stack.extend(f"{rel_dir}/{name}" if rel_dir else name for name in self.tree[rel_dir]['dirs'])
+        for rel_dir in changed:
+            for entry in self.records.get(rel_dir, ()):
+                path = self.root / entry['rel_path']
+                yield (str(path), entry['size'], entry['mtime']), FileRecord.from_state(path, entry)
+    
+    def store(self, tree: Dict[str, Dict], project_name: str, files: List[FileRecord], output_path: Path):
+        """Remember a completed snapshot, its output and the tree it was made from"""
+        records: Dict[str, List[Dict]] = {}
+        for record in files:
+            records.setdefault(record.rel_path.rpartition('/')[0], []).append(record.state())
+        memo = {'root': str(self.root), 'settings': self.key, 'project_name': project_name,
+                'files': len(files), 'tree': tree, 'records': records}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Drop the old memo before replacing its output, so a memo on disk always describes its output
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+        shutil.copyfile(output_path, self.output_path)
+        sidecar = SnapshotIndex.sidecar_path(output_path)
+        if sidecar.exists():
+            shutil.copyfile(sidecar, SnapshotIndex.sidecar_path(self.output_path))
+        temp = self.path.with_suffix('.tmp')
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(memo, f, ensure_ascii=False)
+        os.replace(temp, self.path)
+        self.tree, self.records, self.project_name, self.files = tree, records, project_name, len(files)
+        self.loaded = True
+
+class ArchiveSource:
+    """Regular-file members of a .zip or tar archive, read in place without extraction.
+    
+    members() yields each member's header data (name, size, mtime) with an
+    opener for its contents, so callers can skip members before any of their
+    data is read. Zip members are compressed one by one and skipping them costs
+    nothing; a compressed tarball is one stream, so passing over a member still
+    inflates its bytes, but they are never buffered, decoded or scanned.
+    """
+    
+    TAR_SUFFIXES = ('.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.tar')
+    
+    @classmethod
+    def is_archive(cls, path: Path) -> bool:
+        name = path.name.lower()
+        return path.is_file() and (name.endswith('.zip') or name.endswith(cls.TAR_SUFFIXES))
+    
+    @classmethod
+    def project_name(cls, path: Path) -> str:
+        """Archive name without its suffixes: project-1.0.tar.gz -> project-1.0"""
+        name = path.name
+        for suffix in ('.zip',) + cls.TAR_SUFFIXES:
+            if name.lower().endswith(suffix):
+                return name[:-len(suffix)] or name
+        return name
+    
+    @staticmethod
+    def member_path(name: str) -> Optional[PurePosixPath]:
+        """Normalized relative member path, or None for names that would escape the root"""
+        parts = [part for part in name.replace('\\', '/').split('/') if part not in ('', '.')]
+        if not parts or '..' in parts:
+            return None
+        return PurePosixPath(*parts)
+    
+    @classmethod
+    def detect_project_type(cls, path: Path) -> ProjectType:
+        """Project type from a zip's top-level names; its central directory costs nothing to read.
+        
+        A tarball has no such index, so its type would take a pass over the whole stream.
+        """
+        if not path.name.lower().endswith('.zip'):
+            return ProjectType.UNKNOWN
+        try:
+            with zipfile.ZipFile(path) as zf:
+                names = [p for p in map(cls.member_path, zf.namelist()) if p is not None]
+        except (zipfile.BadZipFile, OSError):
+            return ProjectType.UNKNOWN
+        
+        return ProjectDetector.detect_from_paths(path, cls.unwrap(names))
+    
+    @staticmethod
+    def unwrap(names: List[PurePosixPath]) -> List[PurePosixPath]:
+        """Names relative to the project root: release archives usually wrap everything in one top-level directory"""
+        if len({p.parts[0] for p in names}) == 1 and all(len(p.parts) > 1 for p in names):
+            return [PurePosixPath(*p.parts[1:]) for p in names]
+        return names
+    
+    @classmethod
+    def root_gitignore(cls, path: Path) -> Set[str]:
+        """Patterns of a zip's root .gitignore, read straight from its central directory.
+        
+        Like project detection, this is skipped for tarballs, where finding
+        the member would take an extra pass over the whole stream.
+        """
+        if not path.name.lower().endswith('.zip'):
+            return set()
+        try:
+            with zipfile.ZipFile(path) as zf:
+                members = {cls.member_path(info.filename): info for info in zf.infolist() if not info.is_dir()}
+                members.pop(None, None)
+                names = list(members)
+                for name, rel_path in zip(names, cls.unwrap(names)):
+                    if rel_path == PurePosixPath('.gitignore'):
+                        text = zf.read(members[name]).decode('utf-8', errors='ignore')
+                        return GitignoreParser.parse_lines(text.splitlines())
+        except (zipfile.BadZipFile, OSError):
+            pass
+        return set()
+    
+    @classmethod
+    def members(cls, path: Path) -> Iterator[Tuple[str, int, int, Callable[[], IO[bytes]]]]:
+        """(name, size, mtime_ns, open) for each regular file, in archive order"""
+        if path.name.lower().endswith('.zip'):
+            with zipfile.ZipFile(path) as zf:
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+                    mtime = datetime.datetime(*info.date_time).timestamp()
+                    yield info.filename, info.file_size, int(mtime * 1e9), lambda info=info: zf.open(info)
+        else:
+            # Stream mode: one forward pass, no seeking back through the compressed data
+            with tarfile.open(path, 'r|*') as tf:
+                for member in tf:
+                    if not member.isfile():
+                        continue
+                    yield member.name, member.size, int(member.mtime * 1e9), lambda member=member: tf.extractfile(member)
+
+
+class GitRevision:
+    """The files of one commit, read through git plumbing without touching the working tree.
+    
+    `git ls-tree -r -l` lists every blob with its size, so files are filtered
+    before any object is read, and the survivors stream through a single
+    `git cat-file --batch` process.
+    """
+    
+    def __init__(self, path: Path, rev: str):
+        self.path = path
+        self.rev = rev
+        self.commit = self.git('rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}').decode().strip()
+        self.mtime_ns = int(self.git('show', '-s', '--format=%ct', self.commit)) * 1_000_000_000
+        self.entries = self.list_tree()
+    
+    def git(self, *args: str) -> bytes:
+        result = subprocess.run(['git', *args], cwd=self.path, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            # rev-parse --quiet says nothing about an unknown revision
+            message = result.stderr.decode('utf-8', errors='replace').strip().splitlines()
+            raise ValueError(message[0] if message else f"unknown git revision: {self.rev}")
+        return result.stdout
+    
+    def list_tree(self) -> List[Tuple[PurePosixPath, str, int]]:
+        """(path relative to self.path, blob SHA, size) for each regular file in the commit"""
+        # Run from self.path, ls-tree lists only that subdirectory, with paths relative to it
+        entries = []
+        for line in self.git('ls-tree', '-r', '-l', '-z', self.commit).split(b'\0'):
+            if not line:
+                continue
+            meta, name = line.split(b'\t', 1)
+            mode, kind, sha, size = meta.split()
+            # Symlinks are blobs holding the link target; submodules are commits
+            if kind != b'blob' or mode == b'120000':
+                continue
+            entries.append((PurePosixPath(name.decode('utf-8', errors='surrogateescape')), sha.decode(), int(size)))
+        return entries
+    
+    def read_blobs(self, shas: List[str]) -> Iterator[Tuple[str, bytes]]:
+        """(sha, data) for each requested blob, in request order"""
+        process = subprocess.Popen(['git', 'cat-file', '--batch'], cwd=self.path,
+                                   stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        
+        # Requests are written from a thread so git never blocks on a full pipe while we read
+        def feed():
+            try:
+                for sha in shas:
+                    process.stdin.write(sha.encode() + b'\n')
+                process.stdin.close()
+            except OSError:
+                pass  # the reader stopped early and killed git
+        
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        try:
+            for sha in shas:
+                header = process.stdout.readline().split()
+                if len(header) != 3:
+                    continue  # "<sha> missing"
+                data = process.stdout.read(int(header[2]))
+                process.stdout.read(1)  # trailing newline
+                yield sha, data
+        finally:
+            if process.poll() is None:
+                process.kill()
+            process.wait()
+            process.stdout.close()
+            writer.join()
+
+
+@dataclass
+class TreeListing:
+    """Files a walk found by name and stat alone, before any content was sniffed"""
+    files: List[Path]
+    subprojects: Dict[str, ProjectType] = field(default_factory=dict)
+    duplicates_skipped: int = 0
+
+
+@dataclass
+class WalkedDirectory:
+    """What one read of a directory contributes to a walk, before ordering and dedupe"""
+    dir_id: Optional[Tuple[int, int]]  # None if the directory could not be stat'ed
+    mtime_ns: int = 0
+    listed: bool = False  # False if scandir failed or the directory was already seen
+    subproject: Optional[ProjectType] = None
+    scope: Tuple[ProjectType, ...] = ()
+    # (path, is_dir, file_id) in name order, already filtered by the ignore rules
+    entries: List[Tuple[Path, bool, Optional[Tuple[int, int]]]] = field(default_factory=list)
+
+
+class DirectoryReadAhead:
+    """Reads directories ahead of a walk on worker threads.
+    
+    Workers take directories from a shared queue and queue the subdirectories
+    of each one they read, in the order the walk will want them. The walk asks
+    for directories in its own order through get(); a directory no worker has
+    started yet is read by the caller itself, so the walk never waits behind
+    the queue. Each queued directory carries the ids of its ancestors, which
+    keeps workers out of symlink loops before the walk's own dedupe sees them.
+    """
+    
+    def __init__(self, read: Callable[[Path, Tuple[ProjectType, ...], Set[Tuple[int, int]]], WalkedDirectory],
+                 threads: int, depth_first: bool = True):
+        self.read = read
+        self.depth_first = depth_first
+        self.cond = threading.Condition()
+        self.queue: collections.deque = collections.deque()
+        self.ancestors: Dict[Path, frozenset] = {}
+        self.taken: Set[Path] = set()
+        self.done: Dict[Path, Union[WalkedDirectory, BaseException]] = {}
+        self.stopped = False
+        for _ in range(threads):
+            threading.Thread(target=self.work, daemon=True).start()
+    
+    def queue_subdirs(self, walked: WalkedDirectory, ancestors: frozenset):
+        if not walked.listed:
+            return
+        ancestors = ancestors | {walked.dir_id}
+        subdirs = [(path, walked.scope) for path, is_dir, _ in walked.entries if is_dir]
+        with self.cond:
+            if self.stopped:
+                return
+            for path, _ in subdirs:
+                self.ancestors[path] = ancestors
+            # Workers pop from the right: nearest subdirectory first when depth-first
+            self.queue.extend(reversed(subdirs) if self.depth_first else subdirs)
+            self.cond.notify(len(subdirs))
+    
+    def read_and_queue(self, dir_path: Path, scope: Tuple[ProjectType, ...], ancestors: frozenset) -> WalkedDirectory:
+        walked = self.read(dir_path, scope, ancestors)
+        self.queue_subdirs(walked, ancestors)
+        return walked
+    
+    def work(self):
+        while True:
+            with self.cond:
+                while not self.queue and not self.stopped:
+                    self.cond.wait()
+                if self.stopped:
+                    return
+                dir_path, scope = self.queue.pop() if self.depth_first else self.queue.popleft()
+                if dir_path in self.taken:
+                    continue
+                self.taken.add(dir_path)
+                ancestors = self.ancestors.pop(dir_path, frozenset())
+            try:
+                result = self.read_and_queue(dir_path, scope, ancestors)
+            except Exception as e:
+                result = e
+            with self.cond:
+                self.done[dir_path] = result
+                self.cond.notify_all()
+    
+    def get(self, dir_path: Path, scope: Tuple[ProjectType, ...]) -> WalkedDirectory:
+        """The read of dir_path, waiting for a worker already on it or reading it here"""
+        with self.cond:
+            while dir_path in self.taken and dir_path not in self.done:
+                self.cond.wait()
+            if dir_path in self.done:
+                result = self.done.pop(dir_path)
+                if isinstance(result, BaseException):
+                    raise result
+                return result
+            self.taken.add(dir_path)
+            ancestors = self.ancestors.pop(dir_path, frozenset())
+        return self.read_and_queue(dir_path, scope, ancestors)
+    
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.queue.clear()
+            self.cond.notify_all()
+
+
+class FastFileProcessor:
+    """Fast parallel file processing with improved binary detection"""
+    
+    # Under --deadline, the walk stops at this fraction of the budget so reads get the rest
+    WALK_SHARE = 0.5
+    
+    def __init__(self, config: ScannerConfig,
+                 executor: Optional[concurrent.futures.Executor] = None,
+                 content_cache: Optional[ContentCache] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        self.config = config
+        self.executor = executor
+        self.content_cache = content_cache
+        self.cancel_event = cancel_event
+        self.io = IOConcurrency(config.max_io_threads or DEFAULT_IO_THREADS_CAP)
+        self.spill = ContentSpill(config.max_memory) if config.max_memory else None
+        self.redactor = (SecretRedactor(config.redact_patterns)
+                         if config.redact_secrets or config.redact_patterns else None)
+        self.checkpoint: Optional[ScanCheckpoint] = None
+        # Called on the scanning thread with (record or None if skipped, files_attempted, files_found)
+        self.on_result: Optional[Callable[[Optional[Dict], int, int], None]] = None
+        self.interrupted = False
+        # With a deadline the walk goes breadth-first, so whatever fits in the budget is the top of the tree
+        self.deadline_at: Optional[float] = None
+        self.walk_deadline_at: Optional[float] = None
+        self.deadline_expired = False
+        self.breadth_first = config.deadline is not None
+        self.walk_complete = False
+        self.files_found = 0
+        self.files_attempted = 0
+        self.processed_files = 0
+        self.total_size = 0
+        self.dir_matcher = IgnoreMatcher.for_patterns(config.ignore_dirs)
+        self.file_matcher = IgnoreMatcher.for_patterns(config.ignore_patterns)
+        self.subprojects: Dict[str, ProjectType] = {}
+        self.focus_stats: Optional[Dict] = None
+        self.dir_mtimes: Dict[str, int] = {}  # every directory walked, for warm-index invalidation
+        self.duplicates_skipped = 0
+        # False for a walk that must not open files: binary files are then only caught by name
+        self.sniff_contents = True
+        self.bytes_removed: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        
+    def is_binary_file(self, file_path: Path, content: Optional[bytes] = None) -> bool:
+        """Check if a file is binary using multiple methods; content is the whole file, when already read"""
+        
+        # Method 1: Check by extension first (fastest)
+        if IgnorePatterns.is_likely_binary(file_path):
+            return True
+        
+        try:
+            if content is None:
+                with open(file_path, 'rb') as f:
+                    # Method 2: Check file size - very large files are likely binary
+                    # (fstat on the open file: one path lookup serves both checks)
+                    if os.fstat(f.fileno()).st_size > 10 * 1024 * 1024:  # 10MB
+                        return True
+                    head = f.read(8192)
+            elif len(content) > 10 * 1024 * 1024:
+                return True
+            else:
+                head = content[:8192]
+        except Exception:
+            # If we can't read it, assume it's binary
+            return True
+        
+        # Method 3: Sample-based binary detection (for small files)
+        return self.looks_binary(head)
+    
+    PRINTABLE_BYTES = bytes(range(32, 127)) + b'\t\n\r'
+    
+    @staticmethod
+    def looks_binary(chunk: bytes) -> bool:
+        """Sample-based binary check on the first bytes of a file"""
+        if not chunk:
+            return False
+            
+        # Check for null bytes (common in binary files)
+        if b'\x00' in chunk:
+            return True
+            
+        # Check for high percentage of non-printable characters (counted in C: what deleting them leaves)
+        printable_chars = len(chunk) - len(chunk.translate(None, FastFileProcessor.PRINTABLE_BYTES))
+        return (printable_chars / len(chunk)) < 0.75
+        
+    def should_ignore(self, path: Path, is_dir: bool = False) -> bool:
+        """Check if a path should be ignored"""
+        if self.ignored_by_name(path, is_dir):
+            return True
+        
+        # Check if it's a binary file (not for directories)
+        return not is_dir and self.is_binary_file(path)
+    
+    def ignored_by_name(self, path: Union[Path, PurePosixPath], is_dir: bool = False) -> bool:
+        """The ignore rules that need only the path, not the file itself"""
+        name = path.name
+        
+        # Check custom ignore patterns first
+        if name in self.config.custom_ignore_dirs and is_dir:
+            return True
+        if name in self.config.custom_ignore_files and not is_dir:
+            return True
+        
+        # Check custom extensions
+        if not is_dir and path.suffix.lower() in self.config.custom_ignore_extensions:
+            return True
+        
+        # Check binary extensions
+        if not is_dir and IgnorePatterns.is_likely_binary(path):
+            return True
+        
+        # Check directory patterns
+        if is_dir and self.dir_matcher.matches(name):
+            return True
+        
+        # Check file patterns
+        if self.file_matcher.matches(name):
+            return True
+        
+        # Check hidden files
+        if not self.config.include_hidden and name.startswith('.'):
+            return True
+        
+        return False
+    
+    def process_file(self, file_path: Path) -> Optional[FileRecord]:
+        """Process a single file with better error handling"""
+        try:
+            # Check file size first
+            st = file_path.stat()
+            size = st.st_size
+            if size > self.config.max_file_size:
+                if self.config.verbose:
+                    print(f"Skipping {file_path}: too large ({size/1024:.1f} KB)")
+                return None
+            
+            cache_key = (str(file_path), size, st.st_mtime_ns)
+            if self.content_cache is not None:
+                cached = self.content_cache.get(cache_key)
+                if cached is not None:
+                    return cached
+            
+            # Wait for memory if --max-memory is set and earlier reads still hold it
+            reserved = self.spill.reserve(size) if self.spill is not None else 0
+            
+            # Try to read file; one read serves the binary check and the content
+            try:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+                if self.is_binary_file(file_path, data):
+                    if self.config.verbose:
+                        print(f"Skipping {file_path}: binary file detected")
+                    return None
+                record = self.process_data(file_path, FileRecord.normalize(data), size, st.st_mtime_ns, on_disk=True)
+                if record is None:
+                    return None
+                if self.spill is not None:
+                    record = self.spill.store(record)
+                if self.content_cache is not None:
+                    self.content_cache.put(cache_key, record)
+                return record
+            except Exception as e:
+                if self.config.verbose:
+                    print(f"Skipping {file_path}: read error - {e}")
+                return None
+            finally:
+                if reserved:
+                    self.spill.release(reserved)
+                
+        except Exception as e:
+            if self.config.verbose:
+                print(f"Error processing {file_path}: {e}")
+            return None
+    
+    # Line boundaries str.splitlines() knows besides \n; content with any of them takes the str path.
+    # Separate substring checks run at memchr speed, unlike one regex alternation.
+    OTHER_LINE_BREAKS = (b'\r', b'\x0b', b'\x0c', b'\x1c', b'\x1d', b'\x1e')
+    OTHER_LINE_BREAKS_UTF8 = ('\x85'.encode('utf-8'), '\u2028'.encode('utf-8'), '\u2029'.encode('utf-8'))
+    
+    @classmethod
+    def has_other_line_breaks(cls, data: bytes) -> bool:
+        if any(sep in data for sep in cls.OTHER_LINE_BREAKS):
+            return True
+        return not data.isascii() and any(sep in data for sep in cls.OTHER_LINE_BREAKS_UTF8)
+    
+    def process_data(self, file_path: Path, data: bytes, size: int, mtime_ns: int,
+                     on_disk: bool = False) -> Optional[FileRecord]:
+        """process_content for valid UTF-8 bytes, without decoding them when nothing needs text.
+        
+        Hashing, line counting and truncation work on the bytes; redaction,
+        compaction, outlining and unusual line breaks fall back to process_content.
+        """
+        if b'\x00' in data:
+            if self.config.verbose:
+                print(f"Skipping {file_path}: null bytes detected")
+            return None
+        if self.redactor is not None or self.config.compact or self.has_other_line_breaks(data):
+            return self.process_content(file_path, data.decode('utf-8'), size, mtime_ns, on_disk)
+        
+        total_lines = data.count(b'\n') + (not data.endswith(b'\n') and bool(data))
+        if self.config.outline_threshold is not None:
+            if total_lines > (self.config.outline_threshold or self.config.max_lines_per_file):
+                return self.process_content(file_path, data.decode('utf-8'), size, mtime_ns, on_disk)
+        
+        content_hash = hashlib.sha256(data).hexdigest()
+        limit = self.config.max_lines_per_file
+        truncated = total_lines > limit
+        if truncated:
+            # Up to the limit-th newline, as '\n'.join(lines[:limit]) would give
+            end = -1
+            for _ in range(limit):
+                end = data.find(b'\n', end + 1)
+            data = data[:max(end, 0)] + f"\n\n# [Truncated at {limit} lines]".encode('utf-8')
+        return FileRecord(file_path, size, mtime_ns, total_lines, content_hash, truncated, False, None,
+                          data if truncated or not on_disk else None)
+    
+    def process_content(self, file_path: Path, content: str, size: int, mtime_ns: int,
+                        on_disk: bool = False) -> Optional[FileRecord]:
+        """Turn decoded text into a file record: redaction, compaction, outlining and truncation.
+        
+        With on_disk, content left unchanged is dropped and re-read at render time.
+        """
+        text = content
+        # Additional check for binary content after reading
+        if '\x00' in content:
+            if self.config.verbose:
+                print(f"Skipping {file_path}: null bytes detected")
+            return None
+        
+        # Redact before anything else sees (or caches by hash) the content
+        redactions = None
+        if self.redactor is not None:
+            content, redactions = self.redactor.redact(content)
+        
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        
+        # Compact before truncating, so the line budget goes to code
+        if self.config.compact:
+            content = self.compact(file_path, content, content_hash)
+        
+        lines = content.splitlines()
+        total_lines = len(lines)
+        
+        # Large files become an outline of their structure instead of losing their tail
+        outlined = False
+        if self.config.outline_threshold is not None:
+            threshold = self.config.outline_threshold or self.config.max_lines_per_file
+            if total_lines > threshold:
+                outline = OutlineExtractor.outline(content, detect_language(file_path), content_hash)
+                if outline is not None:
+                    content = f"# [Outline of {total_lines} lines: imports and signatures only]\n{outline}"
+                    lines = content.splitlines()
+                    outlined = True
+        
+        # Truncate if needed
+        truncated = len(lines) > self.config.max_lines_per_file
+        if truncated:
+            content = '\n'.join(lines[:self.config.max_lines_per_file])
+            content += f"\n\n# [Truncated at {self.config.max_lines_per_file} lines]"
+        
+        keep = not on_disk or content is not text and content != text
+        return FileRecord(file_path, size, mtime_ns, total_lines, content_hash, truncated, outlined,
+                          redactions, content.encode('utf-8') if keep else None)
+    
+    def compact(self, file_path: Path, content: str, content_hash: str) -> str:
+        """Run the compaction pass and account the bytes removed per language"""
+        language = detect_language(file_path)
+        if not CodeCompactor.supports(language):
+            return content
+        compacted = CodeCompactor.compact(content, language, content_hash)
+        removed = len(content.encode('utf-8')) - len(compacted.encode('utf-8'))
+        with self._stats_lock:
+            self.bytes_removed[language] = self.bytes_removed.get(language, 0) + removed
+        return compacted
+    
+    def get_project_matchers(self, project_type: ProjectType) -> Tuple[IgnoreMatcher, IgnoreMatcher]:
+        """Get compiled (dirs, files) matchers for a nested project's own ignore rules"""
+        dirs, files = IgnorePatterns.get_project_specific_patterns(project_type)
+        return IgnoreMatcher.for_patterns(dirs), IgnoreMatcher.for_patterns(files)
+    
+    def walk_files(self, root_path: Path, project_type: ProjectType = ProjectType.UNKNOWN,
+                   limit: Optional[int] = None, listing: Optional[TreeListing] = None) -> List[Path]:
+        """Walk the tree with scandir, pruning ignored directories as soon as they are seen.
+        
+        Every directory below the root is checked for project markers, and the
+        project-specific ignore rules of anything found there apply only to
+        that subtree (e.g. node_modules under web/ in a Python monorepo).
+        
+        Symlinks are handled per config.symlinks. Directories and files are
+        identified by (st_dev, st_ino), so following links can never loop and
+        a file reachable through several links or hard links is read once, at
+        the first path the walk reaches it by.
+        
+        With config.walker_threads > 1, directories are read ahead on worker
+        threads while this thread applies them in the same order as a serial
+        walk, so the result is identical.
+        
+        A listing from an earlier walk of the same tree without sniffing
+        (the --memo fingerprint) replaces the walk: only the content sniff
+        is left to do, in walk order, up to the limit.
+        """
+        if limit is None:
+            limit = self.config.max_files
+        policy = self.config.symlinks
+        files_to_process = []
+        visited_dirs: Set[Tuple[int, int]] = set()
+        visited_files: Set[Tuple[int, int]] = set()
+        # Each stack entry carries the project types whose rules are in scope
+        stack = collections.deque([(root_path, (project_type,))])
+        
+        checkpoint = self.checkpoint
+        if checkpoint is not None and (checkpoint.walk_complete or checkpoint.stack is not None):
+            # Continue an interrupted walk
+            self.subprojects.update(checkpoint.subprojects)
+            files_to_process = list(checkpoint.files)
+            if checkpoint.walk_complete:
+                self.walk_complete = True
+                return files_to_process
+            stack = collections.deque(checkpoint.stack)
+            for path in files_to_process:
+                try:
+                    st = path.stat()
+                    visited_files.add((st.st_dev, st.st_ino))
+                except OSError:
+                    pass
+        elif listing is not None:
+            return self.sniff_listing(listing, limit)
+        
+        read_ahead = None
+        if self.config.walker_threads > 1:
+            read_ahead = DirectoryReadAhead(
+                lambda path, scope, ancestors: self.read_directory(root_path, path, scope, policy, ancestors),
+                self.config.walker_threads, depth_first=not self.breadth_first)
+        
+        try:
+            while stack and len(files_to_process) < limit and not self.walk_stopped():
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save_walk(stack, files_to_process, self.subprojects)
+                dir_path, scope = stack.popleft() if self.breadth_first else stack.pop()
+                # Where to roll back to if the walk is interrupted inside this directory
+                resume_point = (len(files_to_process), (dir_path, scope))
+                if read_ahead is not None:
+                    walked = read_ahead.get(dir_path, scope)
+                else:
+                    walked = self.read_directory(root_path, dir_path, scope, policy, visited_dirs)
+                self.walk_directory(root_path, dir_path, walked, stack, files_to_process,
+                                    visited_dirs, visited_files, limit)
+            self.walk_complete = not stack and not self.walk_stopped()
+        except KeyboardInterrupt:
+            self.interrupted = True
+            del files_to_process[resume_point[0]:]
+            if self.breadth_first:
+                stack.appendleft(resume_point[1])
+            else:
+                stack.append(resume_point[1])
+        finally:
+            if read_ahead is not None:
+                read_ahead.stop()
+        
+        if checkpoint is not None:
+            # A quick walk is only written if the read stage later needs a checkpoint
+            checkpoint.save_walk(stack, files_to_process, self.subprojects,
+                                 complete=not self.interrupted and not self.cancelled(),
+                                 defer=not (checkpoint.active or self.interrupted))
+        return files_to_process
+    
+    def sniff_listing(self, listing: TreeListing, limit: int) -> List[Path]:
+        """The files of an unsniffed listing a walk would have kept, as walk_files would return them"""
+        self.subprojects.update(listing.subprojects)
+        self.duplicates_skipped += listing.duplicates_skipped
+        files_to_process = []
+        try:
+            for path in listing.files:
+                if len(files_to_process) >= limit or self.walk_stopped():
+                    break
+                if not self.is_binary_file(path):
+                    files_to_process.append(path)
+            else:
+                self.walk_complete = True
+        except KeyboardInterrupt:
+            self.interrupted = True
+        
+        if self.checkpoint is not None:
+            self.checkpoint.save_walk(collections.deque(), files_to_process, self.subprojects,
+                                      complete=not self.interrupted and not self.cancelled(),
+                                      defer=not (self.checkpoint.active or self.interrupted))
+        return files_to_process
+    
+    def read_directory(self, root_path: Path, dir_path: Path, scope: Tuple[ProjectType, ...],
+                       policy: SymlinkPolicy, skip_ids: Set[Tuple[int, int]]) -> 'WalkedDirectory':
+        """The I/O half of visiting a directory: stat, scandir, marker detection and ignore rules.
+        
+        Changes nothing in the walk itself, so directories can be read ahead on
+        worker threads; walk_directory applies the result in walk order.
+        """
+        try:
+            # Taken before listing, so changes made during the walk still invalidate
+            dir_st = os.stat(dir_path)
+        except OSError as e:
+            if self.config.verbose:
+                print(f"Skipping {dir_path}: {e}")
+            return WalkedDirectory(None)
+        walked = WalkedDirectory((dir_st.st_dev, dir_st.st_ino), dir_st.st_mtime_ns, scope=scope)
+        if walked.dir_id in skip_ids:
+            return walked
+        try:
+            with os.scandir(dir_path) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            if self.config.verbose:
+                print(f"Skipping {dir_path}: {e}")
+            return walked
+        walked.listed = True
+        
+        if self.config.auto_detect_project and dir_path != root_path:
+            listing = DirectoryListing.from_entries(
+                0, ((e.name, e.is_dir()) for e in entries))
+            nested_type = ProjectDetector.match_markers(dir_path, listing)
+            if nested_type != ProjectType.UNKNOWN and nested_type not in scope:
+                scope = scope + (nested_type,)
+                walked.subproject = nested_type
+                walked.scope = scope
+        
+        # The root project's rules are already part of the config matchers
+        scoped = [self.get_project_matchers(t) for t in scope[1:]]
+        
+        for entry in entries:
+            path = Path(entry.path)
+            file_id = None
+            try:
+                is_link = entry.is_symlink()
+                if is_link and policy == SymlinkPolicy.SKIP:
+                    continue
+                is_dir = entry.is_dir(follow_symlinks=policy == SymlinkPolicy.FOLLOW)
+                is_file = not is_dir and entry.is_file()
+                if is_file:
+                    # d_ino is free from the listing; only links need a stat
+                    if is_link:
+                        st = entry.stat()
+                        file_id = (st.st_dev, st.st_ino)
+                    else:
+                        file_id = (dir_st.st_dev, entry.inode())
+                    if not file_id[1]:
+                        file_id = None  # no usable inode numbers on this filesystem
+            except OSError:
+                continue
+            
+            if is_dir:
+                if self.should_ignore(path, is_dir=True):
+                    continue
+                if any(d.matches(entry.name) or f.matches(entry.name) for d, f in scoped):
+                    continue
+                walked.entries.append((path, True, None))
+            elif is_file:
+                if any(f.matches(entry.name) for _, f in scoped):
+                    continue
+                if self.ignored_by_name(path) if not self.sniff_contents else self.should_ignore(path):
+                    continue
+                walked.entries.append((path, False, file_id))
+        return walked
+    
+    def walk_directory(self, root_path: Path, dir_path: Path, walked: 'WalkedDirectory',
+                       stack: collections.deque, files_to_process: List[Path],
+                       visited_dirs: Set[Tuple[int, int]], visited_files: Set[Tuple[int, int]],
+                       limit: int):
+        """Apply one read directory to the walk: queue its files and push its subdirectories onto the stack"""
+        if walked.dir_id is None:
+            return
+        if walked.dir_id in visited_dirs:
+            if self.config.verbose:
+                print(f"Skipping {dir_path}: directory already visited")
+            return
+        visited_dirs.add(walked.dir_id)
+        self.dir_mtimes[str(dir_path)] = walked.mtime_ns
+        if not walked.listed:
+            return
+        
+        if walked.subproject is not None:
+            self.subprojects[dir_path.relative_to(root_path).as_posix()] = walked.subproject
+            if self.config.verbose:
+                print(f"Detected {walked.subproject.value} project in {dir_path}")
+        
+        subdirs = []
+        for path, is_dir, file_id in walked.entries:
+            if is_dir:
+                subdirs.append(path)
+                continue
+            if file_id is not None and file_id in visited_files:
+                self.duplicates_skipped += 1
+                if self.config.verbose:
+                    print(f"Skipping {path}: same file already included")
+                continue
+            visited_files.add(file_id)
+            files_to_process.append(path)
+            if len(files_to_process) >= limit:
+                break
+        
+        # Push so subdirectories are visited in sorted order
+        for subdir in (subdirs if self.breadth_first else reversed(subdirs)):
+            stack.append((subdir, walked.scope))
+    
+    def cancelled(self) -> bool:
+        """Whether outstanding work should stop: cancelled by the caller or past the deadline"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            return True
+        if self.deadline_at is not None and time.monotonic() >= self.deadline_at:
+            self.deadline_expired = True
+            return True
+        return False
+    
+    def walk_stopped(self) -> bool:
+        """Like cancelled(), but the walk leaves part of a deadline to the reads"""
+        if self.walk_deadline_at is not None and time.monotonic() >= self.walk_deadline_at:
+            self.deadline_expired = True
+            return True
+        return self.cancelled()
+    
+    def set_deadline(self, seconds: float, start: Optional[float] = None):
+        """Stop all work `seconds` after start; the walk gets at most WALK_SHARE of that"""
+        start = time.monotonic() if start is None else start
+        self.deadline_at = start + seconds
+        self.walk_deadline_at = start + seconds * self.WALK_SHARE
+    
+    @staticmethod
+    def read_priority(path: Path) -> int:
+        """Read key files (readme, manifests, entry points) first when time is short"""
+        return 0 if path.name in PRIORITY_FILES else 1
+    
+    def timed_process_file(self, file_path: Path) -> Optional[FileRecord]:
+        """process_file, feeding its wall and CPU time to the concurrency controller"""
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            return self.process_file(file_path)
+        finally:
+            self.io.record(time.perf_counter() - wall, time.thread_time() - cpu)
+    
+    def scan_directory(self, root_path: Path, project_type: ProjectType = ProjectType.UNKNOWN,
+                       listing: Optional[TreeListing] = None) -> List[Dict]:
+        """Scan directory for files with improved filtering; a listing from fingerprinting saves the walk"""
+        try:
+            if self.config.focus:
+                # Walk everything the ignore rules allow, then keep what the entry points reach
+                candidates = self.walk_files(root_path, project_type, limit=sys.maxsize, listing=listing)
+                files_to_process = self.focus_files(root_path, candidates)
+            else:
+                files_to_process = self.walk_files(root_path, project_type, listing=listing)
+        except Exception as e:
+            if self.config.verbose:
+                print(f"Error scanning directory: {e}")
+            return []
+        
+        self.files_found = len(files_to_process)
+        results = []
+        if self.checkpoint is not None:
+            # Files the interrupted run already read, unless they changed since
+            remaining = []
+            for file_path in files_to_process:
+                record = self.checkpoint.resumed_record(file_path)
+                if record is None:
+                    remaining.append(file_path)
+                else:
+                    if self.spill is not None:
+                        record = self.spill.store(record)
+                    self.add_result(root_path, results, record, resumed=True)
+        else:
+            remaining = files_to_process
+        if self.deadline_at is not None and not self.config.focus:
+            # The breadth-first walk already orders by depth; key files go first within that
+            remaining = sorted(remaining, key=self.read_priority)
+        
+        # Process files in parallel if enabled
+        if self.interrupted:
+            pass
+        elif self.config.parallel_processing:
+            # Use the shared pool when one is provided (batch mode); threads start lazily,
+            # so sizing an own pool at the cap costs nothing until the limit gets there
+            owns_executor = self.executor is None
+            executor = self.executor or concurrent.futures.ThreadPoolExecutor(max_workers=self.io.cap)
+            queue = iter(remaining)
+            pending: Set[concurrent.futures.Future] = set()
+            try:
+                while True:
+                    # Keep as many reads in flight as the controller currently allows
+                    while len(pending) < self.io.limit and not self.cancelled():
+                        file_path = next(queue, None)
+                        if file_path is None:
+                            break
+                        pending.add(executor.submit(self.timed_process_file, file_path))
+                    if not pending:
+                        break
+                    # Never block past the deadline on a slow read
+                    timeout = None if self.deadline_at is None else max(0.0, self.deadline_at - time.monotonic())
+                    done, pending = concurrent.futures.wait(
+                        pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        try:
+                            self.add_result(root_path, results, future.result())
+                        except Exception as e:
+                            if self.config.verbose:
+                                print(f"Error in parallel processing: {e}")
+                    if self.cancelled():
+                        break
+            except KeyboardInterrupt:
+                self.interrupted = True
+            finally:
+                # Drop queued reads; the few already running finish on their own
+                for future in pending:
+                    future.cancel()
+                if owns_executor:
+                    # Reads still stuck past the deadline are left to finish in the background
+                    executor.shutdown(wait=not self.deadline_expired)
+        else:
+            try:
+                for file_path in remaining:
+                    if self.cancelled():
+                        break
+                    try:
+                        self.add_result(root_path, results, self.process_file(file_path))
+                    except Exception as e:
+                        if self.config.verbose:
+                            print(f"Error processing {file_path}: {e}")
+            except KeyboardInterrupt:
+                self.interrupted = True
+        
+        if self.checkpoint is not None and (self.checkpoint.active or self.interrupted):
+            self.checkpoint.flush()
+        
+        # Order independent of completion
+        if self.config.focus:
+            # Keep breadth-first priority: entry points first, then each hop in turn
+            rank = {path: i for i, path in enumerate(files_to_process)}
+            results.sort(key=lambda r: rank[r.path])
+        else:
+            results.sort(key=lambda r: r['rel_path'])
+        return results
+    
+    def scan_archive(self, archive_path: Path) -> List[Dict]:
+        """Stream an archive's members through the same filters and processing as files on disk"""
+        results = []
+        limit = self.config.max_files
+        try:
+            for name, size, mtime_ns, open_member in ArchiveSource.members(archive_path):
+                if self.cancelled() or self.files_found >= limit:
+                    break
+                rel_path = ArchiveSource.member_path(name)
+                if rel_path is None:
+                    continue
+                
+                # Everything up to here is header data: skip before reading the member
+                if self.ignored_in_tree(rel_path):
+                    continue
+                if size > self.config.max_file_size:
+                    if self.config.verbose:
+                        print(f"Skipping {rel_path}: too large ({size/1024:.1f} KB)")
+                    continue
+                
+                self.files_found += 1
+                self.add_result(archive_path, results,
+                                self.process_member(archive_path / rel_path.as_posix(), size, mtime_ns, open_member))
+            else:
+                self.walk_complete = True
+        except KeyboardInterrupt:
+            self.interrupted = True
+        except (tarfile.TarError, zipfile.BadZipFile, OSError, EOFError) as e:
+            print(f"{Fore.YELLOW}⚠ Stopped reading {archive_path.name}: {e}{Style.RESET_ALL}")
+        
+        results.sort(key=lambda r: r['rel_path'])
+        return results
+    
+    def scan_revision(self, root_path: Path, revision: GitRevision) -> List[Dict]:
+        """Read a commit's files through git, filtered on the tree listing before any blob is read"""
+        results = []
+        # Blob SHA -> paths holding it; identical files are read from git once
+        wanted: Dict[str, List[Tuple[Path, int, Tuple[str, int, str]]]] = {}
+        try:
+            for rel_path, sha, size in revision.entries:
+                if self.files_found >= self.config.max_files:
+                    break
+                if self.ignored_in_tree(rel_path):
+                    continue
+                if size > self.config.max_file_size:
                     if self.config.verbose:
-                        print(f"Error processing {file_path}: {e}")
+                        print(f"Skipping {rel_path}: too large ({size/1024:.1f} KB)")
+                    continue
+                self.files_found += 1
+                
+                # The SHA names the content, so a cached record never needs revalidating
+                file_path = root_path / rel_path.as_posix()
+                cache_key = (str(file_path), size, sha)
+                cached = self.content_cache.get(cache_key) if self.content_cache is not None else None
+                if cached is not None:
+                    self.add_result(root_path, results, cached)
+                else:
+                    wanted.setdefault(sha, []).append((file_path, size, cache_key))
+            
+            for sha, data in revision.read_blobs(list(wanted)):
+                if self.cancelled():
+                    break
+                for file_path, size, cache_key in wanted.pop(sha):
+                    try:
+                        record = self.process_bytes(file_path, data, size, revision.mtime_ns)
+                    except Exception as e:
+                        if self.config.verbose:
+                            print(f"Error processing {file_path}: {e}")
+                        record = None
+                    if record is not None and self.content_cache is not None:
+                        self.content_cache.put(cache_key, record)
+                    self.add_result(root_path, results, record)
+            self.walk_complete = True
+        except KeyboardInterrupt:
+            self.interrupted = True
         
+        results.sort(key=lambda r: r['rel_path'])
         return results
+    
+    def ignored_in_tree(self, rel_path: PurePosixPath) -> bool:
+        """Ignore rules for a file listed by path only, applied to each parent directory too"""
+        if any(self.ignored_by_name(parent, is_dir=True) for parent in list(rel_path.parents)[:-1]):
+            return True
+        return self.ignored_by_name(rel_path)
+    
+    def process_member(self, file_path: Path, size: int, mtime_ns: int,
+                       open_member: Callable[[], IO[bytes]]) -> Optional[FileRecord]:
+        """process_file for an archive member that passed the header checks"""
+        reserved = self.spill.reserve(size) if self.spill is not None else 0
+        try:
+            with open_member() as f:
+                # Never trust the header size: a lying member stops at the limit
+                data = f.read(self.config.max_file_size + 1)
+            if len(data) > self.config.max_file_size:
+                if self.config.verbose:
+                    print(f"Skipping {file_path}: too large")
+                return None
+            return self.process_bytes(file_path, data, size, mtime_ns)
+        except Exception as e:
+            # A broken tar stream also fails the next header read, which ends the scan
+            if self.config.verbose:
+                print(f"Skipping {file_path}: read error - {e}")
+            return None
+        finally:
+            if reserved:
+                self.spill.release(reserved)
+    
+    def process_bytes(self, file_path: Path, data: bytes, size: int, mtime_ns: int) -> Optional[FileRecord]:
+        """Binary check and processing of content that was read without a file on disk.
+        
+        Normalized like files on disk, so archives and --rev give the same text as a checkout.
+        """
+        if self.looks_binary(data[:8192]):
+            if self.config.verbose:
+                print(f"Skipping {file_path}: binary file detected")
+            return None
+        record = self.process_data(file_path, FileRecord.normalize(data), size, mtime_ns)
+        if record is not None and self.spill is not None:
+            record = self.spill.store(record)
+        return record
+    
+    def add_result(self, root_path: Path, results: List[Dict], result: Optional[Dict], resumed: bool = False):
+        """Account one processed file (None when it was skipped) and queue it for the checkpoint"""
+        self.files_attempted += 1
+        if result:
+            # Root-relative path for rendering; every record shares the one root string
+            result.rebase(sys.intern(str(root_path)))
+            results.append(result)
+            self.processed_files += 1
+            self.total_size += result['size']
+            if self.checkpoint is not None and not resumed:
+                self.checkpoint.add_record(result, result['rel_path'])
+        if self.on_result is not None:
+            self.on_result(result or None, self.files_attempted, self.files_found)
+    
+    def focus_files(self, root_path: Path, candidates: List[Path]) -> List[Path]:
+        """Files within focus_depth import hops of the --focus entry points"""
+        entries = []
+        for focus in self.config.focus:
+            # Accept paths relative to the working directory or to the scanned root
+            options = [Path(os.path.normpath(str(base / focus))) for base in (Path.cwd(), root_path)]
+            path = next((p for p in options if p.is_file() and root_path in p.parents), None)
+            if path is None:
+                print(f"{Fore.YELLOW}⚠ Focus entry point not found under {root_path}: {focus}{Style.RESET_ALL}")
+                continue
+            entries.append(path)
+        
+        known = set(candidates)
+        graph = ImportGraph(root_path, candidates + [e for e in entries if e not in known])
+        reachable = graph.reachable(entries, self.config.focus_depth)
+        self.focus_stats = {
+            'entries': [e.relative_to(root_path).as_posix() for e in entries],
+            'depth': self.config.focus_depth,
+            'reachable': len(reachable),
+        }
+        return reachable[:self.config.max_files]
+
+# Language names by file extension, for machine-readable output
+LANGUAGE_BY_EXTENSION = {
+    '.py': 'python', '.pyi': 'python',
+    '.js': 'javascript', '.jsx': 'javascript', '.mjs': 'javascript', '.cjs': 'javascript',
+    '.ts': 'typescript', '.tsx': 'typescript',
+    '.java': 'java', '.kt': 'kotlin', '.kts': 'kotlin', '.scala': 'scala', '.groovy': 'groovy',
+    '.go': 'go', '.rs': 'rust', '.rb': 'ruby', '.php': 'php', '.swift': 'swift',
+    '.m': 'objective-c', '.mm': 'objective-c',
+    '.c': 'c', '.h': 'c', '.cpp': 'cpp', '.cc': 'cpp', '.cxx': 'cpp', '.hpp': 'cpp', '.hh': 'cpp',
+    '.cs': 'csharp', '.fs': 'fsharp', '.vb': 'vbnet', '.dart': 'dart',
+    '.sh': 'shell', '.bash': 'shell', '.zsh': 'shell', '.ps1': 'powershell',
+    '.yml': 'yaml', '.yaml': 'yaml', '.toml': 'toml', '.ini': 'ini', '.cfg': 'ini',
+    '.json': 'json', '.xml': 'xml', '.html': 'html', '.htm': 'html',
+    '.css': 'css', '.scss': 'scss', '.less': 'less', '.vue': 'vue',
+    '.md': 'markdown', '.rst': 'rst', '.txt': 'text', '.sql': 'sql',
+}
+
+LANGUAGE_BY_FILENAME = {
+    'Makefile': 'make', 'Dockerfile': 'dockerfile', 'CMakeLists.txt': 'cmake',
+    'Gemfile': 'ruby', 'Rakefile': 'ruby', 'Podfile': 'ruby',
+}
+
+def detect_language(path: Union[str, Path]) -> str:
+    """Best-effort language name for a file, 'text' when unknown"""
+    name = Path(path).name
+    if name in LANGUAGE_BY_FILENAME:
+        return LANGUAGE_BY_FILENAME[name]
+    return LANGUAGE_BY_EXTENSION.get(Path(name).suffix.lower(), 'text')
+
+def describe_redactions(redactions: Dict[str, int]) -> str:
+    """Per-pattern hit counts as one line, e.g. 'aws_access_key_id 2, jwt 1'"""
+    if not redactions:
+        return 'none found'
+    return ', '.join(f"{name} {count}" for name, count in redactions.items())
+
+def describe_partial(partial: Dict) -> str:
+    """One-line summary of why and how far a snapshot is incomplete"""
+    found = f"{partial['files_found']}" if partial.get('walk_complete') else f"at least {partial['files_found']}"
+    reason = {'deadline': 'deadline reached'}.get(partial['reason'], partial['reason'])
+    return f"{reason} after reading {partial['files_read']} of {found} files"
+
+def relative_path(file_info: Dict) -> str:
+    """Root-relative POSIX path of a processed file record"""
+    rel_path = file_info.get('rel_path')
+    if rel_path is None:
+        rel_path = Path(file_info['path']).as_posix()
+    return rel_path
+
+class DirectoryTree:
+    """Trie of root-relative file paths, rendered without touching the filesystem"""
+    
+    def __init__(self):
+        # Directories map to child dicts, files map to None
+        self.root: Dict[str, Optional[dict]] = {}
+    
+    @classmethod
+    def from_files(cls, files: List[Dict]) -> 'DirectoryTree':
+        tree = cls()
+        for file_info in files:
+            tree.add(relative_path(file_info))
+        return tree
+    
+    def add(self, rel_path: str):
+        """Insert a '/'-separated relative path"""
+        parts = [part for part in rel_path.split('/') if part and part != '.']
+        if not parts:
+            return
+        node = self.root
+        for part in parts[:-1]:
+            child = node.get(part)
+            if child is None:
+                child = {}
+                node[part] = child
+            node = child
+        node.setdefault(parts[-1], None)
+    
+    @staticmethod
+    def _children(node: dict) -> List[Tuple[str, Optional[dict]]]:
+        """Directories first, then files, each sorted by name"""
+        dirs = sorted((name, child) for name, child in node.items() if child is not None)
+        files = sorted((name, None) for name, child in node.items() if child is None)
+        return dirs + files
+    
+    def render(self, dir_format: str, file_format: str) -> List[str]:
+        """Render the tree depth-first; formats receive ``indent`` and ``name``"""
+        lines = []
+        # Explicit stack of child iterators, so deep trees cannot hit the recursion limit
+        stack = [(iter(self._children(self.root)), 0)]
+        while stack:
+            children, depth = stack[-1]
+            item = next(children, None)
+            if item is None:
+                stack.pop()
+                continue
+            name, child = item
+            indent = "  " * depth
+            if child is None:
+                lines.append(file_format.format(indent=indent, name=name))
+            else:
+                lines.append(dir_format.format(indent=indent, name=name))
+                stack.append((iter(self._children(child)), depth + 1))
+        return lines
 
 class OutputGenerator:
     """Generate output in different formats"""
@@ -860,7 +3509,14 @@ class OutputGenerator:
     @staticmethod
     def generate_txt(project_name: str, files: List[Dict], stats: Dict) -> str:
         """Generate TXT format output"""
+        output, _ = OutputGenerator.txt_lines(project_name, files, stats)
+        return '\n'.join(map(str, output))
+    
+    @staticmethod
+    def txt_lines(project_name: str, files: List[Dict], stats: Dict) -> Tuple[List[str], List[Tuple[str, int, int]]]:
+        """Build TXT output lines plus (rel_path, first_line, end_line) of each file section"""
         output = []
+        sections = []
         output.append(f"Project Snapshot: {project_name}")
         output.append(f"Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         output.append("=" * 60)
@@ -870,19 +3526,7 @@ class OutputGenerator:
         output.append("Directory Structure:")
         output.append("-" * 40)
         
-        # Create a simple tree structure
-        seen_dirs = set()
-        for file_info in files:
-            path = file_info['path']
-            parts = path.relative_to(path.parent.parent).parts if path.parent.parent.exists() else path.parts
-            for i in range(len(parts)):
-                dir_path = '/'.join(parts[:i+1])
-                if dir_path not in seen_dirs:
-                    indent = "  " * i
-                    is_file = i == len(parts) - 1
-                    symbol = "📄" if is_file else "📁"
-                    output.append(f"{indent}{symbol} {parts[i]}")
-                    seen_dirs.add(dir_path)
+        output.extend(DirectoryTree.from_files(files).render("{indent}📁 {name}", "{indent}📄 {name}"))
         
         output.append("")
         output.append("=" * 60)
@@ -893,9 +3537,11 @@ class OutputGenerator:
         # File contents
         for file_info in files:
             path = file_info['path']
+            start = len(output)
             output.append(f"--- File: {path.name} ---")
-            output.append(file_info['content'])
+            output.append(content_of(file_info))
             output.append("")
+            sections.append((relative_path(file_info), start, len(output)))
         
         # Statistics
         output.append("=" * 60)
@@ -903,14 +3549,32 @@ class OutputGenerator:
         output.append(f"- Files processed: {stats['files_processed']}")
         output.append(f"- Total size: {stats['total_size'] / 1024:.2f} KB")
         output.append(f"- Project type: {stats['project_type']}")
+        for rel, sub_type in sorted(stats.get('subprojects', {}).items()):
+            output.append(f"- Subproject: {rel} ({sub_type})")
+        if 'rev' in stats:
+            output.append(f"- Revision: {stats['rev']['name']} ({stats['rev']['commit']})")
+        if 'focus' in stats:
+            output.append(f"- Focus: {', '.join(stats['focus']['entries'])} "
+                          f"(within {stats['focus']['depth']} import hops)")
+        if 'redactions' in stats:
+            output.append(f"- Secrets redacted: {describe_redactions(stats['redactions'])}")
+        if 'partial' in stats:
+            output.append(f"- Partial snapshot: {describe_partial(stats['partial'])}")
         output.append("=" * 60)
         
-        return '\n'.join(output)
+        return output, sections
     
     @staticmethod
     def generate_mcp(project_name: str, files: List[Dict], stats: Dict) -> str:
         """Generate MCP (Markdown Context Pack) format output"""
+        output, _ = OutputGenerator.mcp_lines(project_name, files, stats)
+        return '\n'.join(map(str, output))
+    
+    @staticmethod
+    def mcp_lines(project_name: str, files: List[Dict], stats: Dict) -> Tuple[List[str], List[Tuple[str, int, int]]]:
+        """Build MCP output lines plus (rel_path, first_line, end_line) of each file section"""
         output = []
+        sections = []
         output.append(f"# {project_name}")
         output.append("")
         output.append(f"Project snapshot generated on {datetime.datetime.now().strftime('%Y-%m-%d')}.")
@@ -925,6 +3589,18 @@ class OutputGenerator:
             "project_type": stats['project_type'],
             "version": __version__
         }
+        if stats.get('subprojects'):
+            metadata["subprojects"] = stats['subprojects']
+        if 'rev' in stats:
+            metadata["rev"] = stats['rev']
+        if 'focus' in stats:
+            metadata["focus"] = stats['focus']
+        if 'redactions' in stats:
+            metadata["redactions"] = stats['redactions']
+        if 'partial' in stats:
+            metadata["partial"] = stats['partial']
+        if 'deadline' in stats:
+            metadata["deadline"] = stats['deadline']
         output.append(json.dumps(metadata, indent=2))
         output.append("```")
         output.append("")
@@ -934,19 +3610,7 @@ class OutputGenerator:
         output.append("")
         output.append("```")
         
-        # Create tree structure
-        seen_dirs = set()
-        for file_info in files:
-            path = file_info['path']
-            parts = path.relative_to(path.parent.parent).parts if path.parent.parent.exists() else path.parts
-            for i in range(len(parts)):
-                dir_path = '/'.join(parts[:i+1])
-                if dir_path not in seen_dirs:
-                    indent = "  " * i
-                    is_file = i == len(parts) - 1
-                    symbol = "" if is_file else "/"
-                    output.append(f"{indent}{parts[i]}{symbol}")
-                    seen_dirs.add(dir_path)
+        output.extend(DirectoryTree.from_files(files).render("{indent}{name}/", "{indent}{name}"))
         
         output.append("```")
         output.append("")
@@ -971,12 +3635,14 @@ class OutputGenerator:
             output.append("")
             
             for file_info in ext_files:
+                start = len(output)
                 output.append(f"#### {file_info['path'].name}")
                 output.append("")
                 output.append(f"```{lang}")
-                output.append(file_info['content'])
+                output.append(content_of(file_info))
                 output.append("```")
                 output.append("")
+                sections.append((relative_path(file_info), start, len(output)))
         
         # Summary
         output.append("## Summary")
@@ -988,7 +3654,403 @@ class OutputGenerator:
         output.append(f"- Project type: {stats['project_type']}")
         output.append("")
         
-        return '\n'.join(output)
+        return output, sections
+    
+    @staticmethod
+    def tag_lines(lines: List[str], sections: List[Tuple[str, int, int]],
+                  raw: bool = False) -> Iterator[Tuple[Union[str, bytes], Optional[str]]]:
+        """Yield each line (newline-joined as in generate_*) tagged with its file section, if any.
+        
+        With raw, file content is yielded as the UTF-8 bytes it is held or
+        stored as, for writers that never need it decoded.
+        """
+        owner: Dict[int, str] = {}
+        for rel_path, start, end in sections:
+            for i in range(start, end):
+                owner[i] = rel_path
+        last = len(lines) - 1
+        for i, line in enumerate(lines):
+            # File content on disk or spilled is only read back here, one file at a time
+            if raw and isinstance(line, (RecordContent, SpilledContent)):
+                yield bytes(line), owner.get(i)
+                if i < last:
+                    yield '\n', owner.get(i)
+                continue
+            line = str(line)
+            yield (line + '\n' if i < last else line), owner.get(i)
+
+    @staticmethod
+    def iter_jsonl(project_name: str, files: List[Dict], stats: Dict) -> Iterator[str]:
+        """Generate JSON Lines output one line at a time: header, one object per file, trailer"""
+        header = {
+            "type": "header",
+            "format": "codeprint-jsonl",
+            "version": __version__,
+            "project": project_name,
+            "generated": datetime.datetime.now().isoformat(timespec='seconds'),
+            "project_type": stats['project_type'],
+            "num_files": stats['files_processed'],
+        }
+        yield json.dumps(header, ensure_ascii=False) + "\n"
+        
+        for file_info in files:
+            content = str(file_info['content'])
+            record = {
+                "type": "file",
+                "path": relative_path(file_info),
+                "language": detect_language(file_info['path']),
+                "size": file_info['size'],
+                "lines": file_info['lines'],
+                "truncated": file_info.get('truncated', False),
+                "outlined": file_info.get('outlined', False),
+                "sha256": file_info.get('hash') or hashlib.sha256(content.encode('utf-8')).hexdigest(),
+                "content": content,
+            }
+            if 'redactions' in file_info:
+                record["redactions"] = file_info['redactions']
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        
+        trailer = {
+            "type": "trailer",
+            "files_processed": stats['files_processed'],
+            "total_size": stats['total_size'],
+            "project_type": stats['project_type'],
+            "subprojects": stats.get('subprojects', {}),
+            "scan_time": round(stats.get('scan_time', 0.0), 3),
+        }
+        if 'compaction' in stats:
+            trailer["compaction_bytes_removed"] = stats['compaction']
+        if 'rev' in stats:
+            trailer["rev"] = stats['rev']
+        if 'focus' in stats:
+            trailer["focus"] = stats['focus']
+        if 'redactions' in stats:
+            trailer["redactions"] = stats['redactions']
+        if 'partial' in stats:
+            trailer["partial"] = stats['partial']
+        if 'deadline' in stats:
+            trailer["deadline"] = stats['deadline']
+        yield json.dumps(trailer, ensure_ascii=False) + "\n"
+    
+    @staticmethod
+    def generate_jsonl(project_name: str, files: List[Dict], stats: Dict) -> str:
+        """Generate JSON Lines output as a single string"""
+        return ''.join(OutputGenerator.iter_jsonl(project_name, files, stats))
+
+class SnapshotIndex:
+    """Byte offset and length of each file's section in a text snapshot (.idx sidecar)"""
+    
+    SUFFIX = '.idx'
+    
+    def __init__(self, sections: Optional[Dict[str, List[int]]] = None):
+        self.sections: Dict[str, List[int]] = sections or {}
+    
+    @classmethod
+    def sidecar_path(cls, snapshot_path: Union[str, Path]) -> Path:
+        snapshot_path = Path(snapshot_path)
+        return snapshot_path.with_name(snapshot_path.name + cls.SUFFIX)
+    
+    def add(self, rel_path: str, offset: int, length: int):
+        """Record bytes written for a file, extending its section when contiguous"""
+        section = self.sections.get(rel_path)
+        if section is not None and section[0] + section[1] == offset:
+            section[1] += length
+        else:
+            self.sections[rel_path] = [offset, length]
+    
+    def save(self, snapshot_path: Path, snapshot_size: int):
+        index = {
+            "format": "codeprint-index",
+            "version": __version__,
+            "snapshot": snapshot_path.name,
+            "snapshot_size": snapshot_size,
+            "files": self.sections,
+        }
+        self.sidecar_path(snapshot_path).write_text(json.dumps(index), encoding='utf-8')
+    
+    @classmethod
+    def load(cls, snapshot_path: Union[str, Path]) -> 'SnapshotIndex':
+        """Load the sidecar of a snapshot, checking it still matches the snapshot size"""
+        snapshot_path = Path(snapshot_path)
+        index = json.loads(cls.sidecar_path(snapshot_path).read_text(encoding='utf-8'))
+        if index.get('format') != 'codeprint-index':
+            raise ValueError(f"Not a codeprint index: {cls.sidecar_path(snapshot_path)}")
+        if index.get('snapshot_size') != snapshot_path.stat().st_size:
+            raise ValueError(f"Index is out of date for {snapshot_path}")
+        return cls(index['files'])
+    
+    def read_section(self, snapshot_path: Union[str, Path], rel_path: str) -> bytes:
+        """Seek straight to one file's section"""
+        offset, length = self.sections[rel_path]
+        with open(snapshot_path, 'rb') as f:
+            f.seek(offset)
+            return f.read(length)
+
+class SnapshotArchive:
+    """Random-access packed snapshot: fixed header, concatenated contents, then an index.
+    
+    After the contents come the sorted root-relative paths, a table of
+    fixed-width entries (path and content offsets and lengths) in the same
+    order, and a JSON index with the scan stats and per-file metadata. The
+    header records where the table and JSON index live. Readers mmap the
+    file and binary-search the table, so pulling one file out never parses
+    the JSON index.
+    """
+    
+    MAGIC = b'CPAK'
+    VERSION = 2
+    # magic, version, reserved, table offset, entry count, index offset, index length
+    HEADER = struct.Struct('<4sHHQQQQ')
+    # path offset, path length, content offset, content length
+    ENTRY = struct.Struct('<QIQQ')
+    
+    @classmethod
+    def write(cls, output_path: Path, project_name: str, files: List[Dict], stats: Dict):
+        """Stream file contents to disk, then append the path table and index and patch the header"""
+        entries = {}
+        with open(output_path, 'wb') as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, 0, 0, 0, 0, 0))
+            for file_info in files:
+                data = content_bytes(file_info)
+                entries[relative_path(file_info)] = {
+                    "offset": f.tell(),
+                    "length": len(data),
+                    "sha256": file_info.get('hash') or hashlib.sha256(data).hexdigest(),
+                    "size": file_info['size'],
+                    "lines": file_info['lines'],
+                    "truncated": file_info.get('truncated', False),
+                    "outlined": file_info.get('outlined', False),
+                    "language": detect_language(file_info['path']),
+                }
+                f.write(data)
+            
+            # UTF-8 byte order, which is also code point order
+            table = []
+            for name in sorted(entry.encode('utf-8') for entry in entries):
+                entry = entries[name.decode('utf-8')]
+                table.append(cls.ENTRY.pack(f.tell(), len(name), entry['offset'], entry['length']))
+                f.write(name)
+            table_offset = f.tell()
+            f.write(b''.join(table))
+            
+            index = {
+                "format": "codeprint-archive",
+                "version": __version__,
+                "project": project_name,
+                "generated": datetime.datetime.now().isoformat(timespec='seconds'),
+                "stats": {
+                    "files_processed": stats['files_processed'],
+                    "total_size": stats['total_size'],
+                    "project_type": stats['project_type'],
+                    "subprojects": stats.get('subprojects', {}),
+                    "partial": stats.get('partial'),
+                },
+                "files": entries,
+            }
+            index_data = json.dumps(index, ensure_ascii=False).encode('utf-8')
+            index_offset = f.tell()
+            f.write(index_data)
+            f.seek(0)
+            f.write(cls.HEADER.pack(cls.MAGIC, cls.VERSION, 0, table_offset, len(table),
+                                    index_offset, len(index_data)))
+    
+    def __init__(self, archive_path: Union[str, Path]):
+        self.path = Path(archive_path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Not a codeprint archive: {self.path}")
+        
+        if len(self._map) < self.HEADER.size:
+            self.close()
+            raise ValueError(f"Not a codeprint archive: {self.path}")
+        magic, version, _, self._table, self._count, self._index_offset, self._index_length = \
+            self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC:
+            self.close()
+            raise ValueError(f"Not a codeprint archive: {self.path}")
+        if version != self.VERSION:
+            self.close()
+            raise ValueError(f"Unsupported archive version {version}: {self.path}")
+        self._index: Optional[Dict] = None
+    
+    def __enter__(self) -> 'SnapshotArchive':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        """Close the mapping; views returned by read() must be released first"""
+        if getattr(self, '_map', None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+    
+    @property
+    def index(self) -> Dict:
+        """The JSON index, parsed on first use"""
+        if self._index is None:
+            start = self._index_offset
+            self._index = json.loads(self._map[start:start + self._index_length].decode('utf-8'))
+        return self._index
+    
+    @property
+    def project(self) -> Optional[str]:
+        return self.index.get('project')
+    
+    @property
+    def stats(self) -> Dict:
+        return self.index.get('stats', {})
+    
+    @property
+    def entries(self) -> Dict[str, Dict]:
+        return self.index['files']
+    
+    def _entry(self, position: int) -> Tuple[bytes, int, int]:
+        name_offset, name_length, offset, length = \
+            self.ENTRY.unpack_from(self._map, self._table + position * self.ENTRY.size)
+        return self._map[name_offset:name_offset + name_length], offset, length
+    
+    def paths(self) -> List[str]:
+        return [self._entry(i)[0].decode('utf-8') for i in range(self._count)]
+    
+    def read(self, rel_path: str) -> memoryview:
+        """Zero-copy view of one file's UTF-8 content, found by binary search of the path table"""
+        key = rel_path.replace('\\', '/')
+        if key.startswith('./'):
+            key = key[2:]
+        key = key.encode('utf-8')
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            name, offset, length = self._entry(middle)
+            if name == key:
+                return memoryview(self._map)[offset:offset + length]
+            if name < key:
+                low = middle + 1
+            else:
+                high = middle
+        raise KeyError(rel_path)
+    
+    def read_text(self, rel_path: str) -> str:
+        with self.read(rel_path) as view:
+            return str(view, 'utf-8')
+
+class WarmIndex:
+    """Scan state for one directory, kept warm between scans of an interactive session.
+    
+    Holds an isolated copy of the config, so ignore rules added for one
+    directory never leak into another, plus the processed records and the
+    mtimes of every directory walked and file read. The index stays fresh
+    while none of those mtimes (or the root .gitignore) change and the scan
+    settings are the same.
+    """
+    
+    def __init__(self, root: Path, config: ScannerConfig):
+        self.root = root
+        self.signature = self.settings_signature(config)
+        self.config = dataclasses.replace(
+            config,
+            ignore_dirs=set(config.ignore_dirs),
+            ignore_patterns=set(config.ignore_patterns),
+        )
+        self.project_name = root.name
+        self.files: Optional[List[Dict]] = None
+        self.stats: Optional[Dict] = None
+        self.mtimes: Dict[str, Optional[int]] = {}
+    
+    @staticmethod
+    def settings_signature(config: ScannerConfig) -> Tuple:
+        """Everything in the config that changes which files are read and how"""
+        return (
+            config.max_file_size, config.max_files, config.max_lines_per_file,
+            config.use_gitignore, config.auto_detect_project, config.include_hidden,
+            frozenset(config.ignore_dirs), frozenset(config.ignore_patterns),
+            frozenset(config.custom_ignore_dirs), frozenset(config.custom_ignore_files),
+            frozenset(config.custom_ignore_extensions),
+            config.compact, config.outline_threshold, tuple(config.focus), config.focus_depth,
+            config.symlinks, config.redact_secrets, tuple(config.redact_patterns), config.rev,
+        )
+    
+    @staticmethod
+    def processing_signature(config: ScannerConfig) -> Tuple:
+        """The settings a cached file record depends on"""
+        return (config.max_file_size, config.max_lines_per_file, config.compact, config.outline_threshold,
+                config.redact_secrets, tuple(config.redact_patterns))
+    
+    @staticmethod
+    def mtime(path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    
+    def update(self, project_name: str, files: List[Dict], stats: Dict, dir_mtimes: Dict[str, int]):
+        """Remember a completed scan and the mtimes it depends on"""
+        self.project_name = project_name
+        self.files = files
+        self.stats = stats
+        self.mtimes = dict(dir_mtimes)
+        for file_info in files:
+            self.mtimes[str(file_info['path'])] = file_info.get('mtime')
+        gitignore = str(self.root / '.gitignore')
+        self.mtimes[gitignore] = self.mtime(gitignore)
+    
+    def is_fresh(self, config: ScannerConfig) -> bool:
+        """Check whether the remembered scan still matches the disk and the settings"""
+        if self.files is None or self.settings_signature(config) != self.signature:
+            return False
+        return all(self.mtime(path) == mtime for path, mtime in self.mtimes.items())
+
+class Prefetch:
+    """Cancellable background scan of a directory, started on `cd` in interactive mode.
+    
+    The walk and reads run on the session's shared pool and land in a
+    WarmIndex, so a following `scan` with the same settings only has to
+    wait for whatever is still in flight.
+    """
+    
+    def __init__(self, root: Path, config: ScannerConfig,
+                 executor: concurrent.futures.Executor, content_cache: ContentCache):
+        self.root = root
+        self.index = WarmIndex(root, config)
+        # Background work must never print or prompt
+        self.index.config.show_progress = False
+        self.index.config.verbose = False
+        self.executor = executor
+        self.content_cache = content_cache
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+        self.thread = threading.Thread(target=self.run, name='codeprint-prefetch', daemon=True)
+    
+    def start(self) -> 'Prefetch':
+        self.thread.start()
+        return self
+    
+    def run(self):
+        try:
+            scanner = ProjectScanner(self.index.config, self.executor, self.content_cache, self.cancel_event)
+            project_name, files, stats = scanner.collect(self.root)
+            if not self.cancel_event.is_set() and 'partial' not in stats:
+                self.index.update(project_name, files, stats, scanner.processor.dir_mtimes)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+    
+    def cancel(self):
+        self.cancel_event.set()
+    
+    def result(self, timeout: Optional[float] = None) -> Optional[WarmIndex]:
+        """Wait for the scan; the warm index, or None if it was cancelled or failed"""
+        self.done.wait(timeout)
+        if not self.done.is_set() or self.cancel_event.is_set() or self.index.files is None:
+            return None
+        return self.index
 
 class InteractiveCLI:
     """Interactive CLI mode with navigation"""
@@ -997,6 +4059,11 @@ class InteractiveCLI:
         self.config = config
         self.current_dir = os.getcwd()
         self.scanner = ProjectScanner(config)
+        # Shared by every directory of the session: unchanged files are never re-read
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=config.max_io_threads or DEFAULT_IO_THREADS_CAP)
+        self.content_caches: Dict[Tuple, ContentCache] = {}
+        self.warm_indexes: Dict[str, WarmIndex] = {}
+        self.prefetch: Optional[Prefetch] = None
         
         # Setup tab completion if available
         if READLINE_AVAILABLE:
@@ -1021,12 +4088,12 @@ class InteractiveCLI:
                     search_dir = self.current_dir
                     prefix = partial
                 
-                # Find matching directories
+                # Find matching directories (shares the detector's cached listing)
                 try:
-                    items = []
-                    for item in os.listdir(search_dir):
-                        if item.startswith(prefix) and os.path.isdir(os.path.join(search_dir, item)):
-                            items.append(item + '/')
+                    listing = ProjectDetector.list_directory(Path(search_dir))
+                    if listing is None:
+                        return None
+                    items = sorted(item + '/' for item in listing.dirs if item.startswith(prefix))
                     
                     if state < len(items):
                         return items[state]
@@ -1066,13 +4133,16 @@ class InteractiveCLI:
   {Fore.YELLOW}scan{Style.RESET_ALL}            - Scan with current settings
   {Fore.YELLOW}scan -f mcp{Style.RESET_ALL}     - Scan with MCP format
   {Fore.YELLOW}scan -f txt{Style.RESET_ALL}     - Scan with TXT format
+  {Fore.YELLOW}scan -f jsonl{Style.RESET_ALL}   - Scan with JSON Lines format
   {Fore.YELLOW}scan -c{Style.RESET_ALL}         - Scan and copy to clipboard
   {Fore.YELLOW}scan -o file.txt{Style.RESET_ALL} - Scan to specific file
   {Fore.YELLOW}scan --no-gitignore{Style.RESET_ALL} - Ignore .gitignore patterns
+  {Fore.YELLOW}scan --compact{Style.RESET_ALL}  - Strip comments and docstrings
+  {Fore.YELLOW}scan --outline{Style.RESET_ALL}  - Outline large files instead of truncating
   {Fore.YELLOW}scan --ignore dir1,file.ext{Style.RESET_ALL} - Ignore custom patterns
 
 {Fore.CYAN}Configuration Keys:{Style.RESET_ALL}
-  {Fore.YELLOW}format{Style.RESET_ALL}          - Output format (txt/mcp)
+  {Fore.YELLOW}format{Style.RESET_ALL}          - Output format (txt/mcp/jsonl/archive)
   {Fore.YELLOW}clipboard{Style.RESET_ALL}       - Copy to clipboard (true/false)
   {Fore.YELLOW}max-files{Style.RESET_ALL}       - Maximum files to scan
   {Fore.YELLOW}max-size{Style.RESET_ALL}        - Maximum file size (KB)
@@ -1093,7 +4163,8 @@ class InteractiveCLI:
                 print(f"{Fore.YELLOW}Directories:{Style.RESET_ALL}")
                 for i, directory in enumerate(directories, 1):
                     # Check if it's a git repo
-                    is_git = (directory / '.git').exists()
+                    listing = ProjectDetector.list_directory(directory)
+                    is_git = listing is not None and '.git' in listing.names
                     git_marker = f" {Fore.GREEN}(git){Style.RESET_ALL}" if is_git else ""
                     
                     # Detect project type
@@ -1148,6 +4219,9 @@ class InteractiveCLI:
                 self.current_dir = os.getcwd()
                 print(f"{Fore.GREEN}Changed to: {self.current_dir}{Style.RESET_ALL}")
                 
+                # Start reading ahead: a scan usually follows
+                self.start_prefetch(target_path)
+                
                 # Auto-detect project type
                 project_type = ProjectDetector.detect_project_type(target_path)
                 if project_type != ProjectType.UNKNOWN:
@@ -1179,11 +4253,11 @@ class InteractiveCLI:
         """Update configuration value"""
         try:
             if key == 'format':
-                if value.lower() in ['txt', 'mcp']:
+                if value.lower() in [f.value for f in OutputFormat]:
                     self.config.output_format = OutputFormat(value.lower())
                     print(f"{Fore.GREEN}Format set to: {value}{Style.RESET_ALL}")
                 else:
-                    print(f"{Fore.RED}Invalid format. Use 'txt' or 'mcp'{Style.RESET_ALL}")
+                    print(f"{Fore.RED}Invalid format. Use 'txt', 'mcp', 'jsonl' or 'archive'{Style.RESET_ALL}")
             
             elif key == 'clipboard':
                 if value.lower() in ['true', 'false']:
@@ -1218,7 +4292,7 @@ class InteractiveCLI:
             for i, arg in enumerate(args):
                 if arg == '-f' and i + 1 < len(args):
                     format_value = args[i + 1]
-                    if format_value in ['txt', 'mcp']:
+                    if format_value in [f.value for f in OutputFormat]:
                         self.config.output_format = OutputFormat(format_value)
                 elif arg == '-c':
                     self.config.copy_to_clipboard = True
@@ -1226,6 +4300,10 @@ class InteractiveCLI:
                     self.config.output_file = args[i + 1]
                 elif arg == '--no-gitignore':
                     self.config.use_gitignore = False
+                elif arg == '--compact':
+                    self.config.compact = True
+                elif arg == '--outline':
+                    self.config.outline_threshold = 0
                 elif arg == '--ignore' and i + 1 < len(args):
                     ignore_items = args[i + 1].split(',')
                     for item in ignore_items:
@@ -1239,17 +4317,65 @@ class InteractiveCLI:
         
         # Perform scan
         project_path = Path(self.current_dir)
-        output, stats = self.scanner.scan(project_path)
-        self.scanner.save_output(output, self.config.output_file)
+        project_name, files, stats = self.collect_warm(project_path)
+        self.scanner.save_snapshot(project_name, files, stats, self.config.output_file)
         
         # Reset temporary flags
         self.config.output_file = None
     
+    def content_cache_for(self, config: ScannerConfig) -> ContentCache:
+        """Session content cache for the processing settings in effect"""
+        return self.content_caches.setdefault(WarmIndex.processing_signature(config), ContentCache())
+    
+    def start_prefetch(self, path: Path):
+        """Cancel any read-ahead in progress and start one for the new directory"""
+        self.cancel_prefetch()
+        if self.warm_indexes.get(str(path)) is not None and self.warm_indexes[str(path)].is_fresh(self.config):
+            return
+        self.prefetch = Prefetch(path, self.config, self.executor, self.content_cache_for(self.config)).start()
+    
+    def cancel_prefetch(self):
+        if self.prefetch is not None:
+            self.prefetch.cancel()
+            self.prefetch = None
+    
+    def collect_warm(self, project_path: Path) -> Tuple[str, List[Dict], Dict]:
+        """Collect a directory, reusing its warm index when nothing changed since the last scan"""
+        key = str(project_path)
+        prefetch = self.prefetch
+        if prefetch is not None and prefetch.root == project_path:
+            self.prefetch = None
+            if prefetch.index.signature == WarmIndex.settings_signature(self.config):
+                # Attach to the read-ahead instead of starting over
+                if not prefetch.done.is_set() and self.config.show_progress:
+                    print(f"{Fore.YELLOW}⏳ Finishing background scan...{Style.RESET_ALL}")
+                index = prefetch.result()
+                if index is not None:
+                    self.warm_indexes[key] = index
+            else:
+                prefetch.cancel()
+        
+        index = self.warm_indexes.get(key)
+        if index is not None and index.is_fresh(self.config):
+            source = "background scan" if prefetch is not None and index is prefetch.index else "last scan"
+            print(f"{Fore.GREEN}✓ No changes since {source}, reusing {len(index.files)} files{Style.RESET_ALL}")
+            return index.project_name, index.files, index.stats
+        
+        # Stale or new: rebuild from a clean copy of the session config
+        index = WarmIndex(project_path, self.config)
+        scanner = ProjectScanner(index.config, self.executor, self.content_cache_for(self.config))
+        project_name, files, stats = scanner.collect(project_path)
+        if 'partial' not in stats:
+            index.update(project_name, files, stats, scanner.processor.dir_mtimes)
+            self.warm_indexes[key] = index
+        return project_name, files, stats
+    
     def run(self):
         """Run the interactive CLI"""
         self.print_banner()
         self.print_help()
         self.list_directory()
+        self.start_prefetch(Path(self.current_dir))
         
         while True:
             try:
@@ -1267,6 +4393,8 @@ class InteractiveCLI:
                 # Handle commands
                 if command in ['exit', 'quit', 'q']:
                     print(f"{Fore.YELLOW}Goodbye!{Style.RESET_ALL}")
+                    self.cancel_prefetch()
+                    self.executor.shutdown(wait=False)
                     break
                 
                 elif command == 'ls':
@@ -1311,8 +4439,17 @@ class InteractiveCLI:
 class ProjectScanner:
     """Main scanner class"""
     
-    def __init__(self, config: ScannerConfig):
+    def __init__(self, config: ScannerConfig,
+                 executor: Optional[concurrent.futures.Executor] = None,
+                 content_cache: Optional[ContentCache] = None,
+                 cancel_event: Optional[threading.Event] = None,
+                 on_result: Optional[Callable[[Optional[Dict], int, int], None]] = None):
         self.config = config
+        self.executor = executor
+        self.content_cache = content_cache
+        self.cancel_event = cancel_event
+        self.on_result = on_result
+        self.processor: Optional[FastFileProcessor] = None  # the one used by the last collect()
         
     def print_banner(self):
         """Print colorful ASCII banner"""
@@ -1328,78 +4465,234 @@ class ProjectScanner:
         # Ask about XML files for certain project types
         ignore_xml = False
         if not self.config.interactive_mode:
-            ignore_xml = ProjectDetector.should_ignore_xml(project_type)
+            ignore_xml = ProjectDetector.should_ignore_xml(project_type, interactive=not self.config.batch_mode)
         
         # Get project-specific patterns
         dirs, files = IgnorePatterns.get_ignore_patterns(project_type, ignore_xml)
         self.config.ignore_dirs.update(dirs)
         self.config.ignore_patterns.update(files)
         
-        # Parse .gitignore if enabled
-        if self.config.use_gitignore:
-            gitignore_path = project_path / '.gitignore'
-            gitignore_patterns = GitignoreParser.parse_gitignore(gitignore_path)
+        # Parse .gitignore if enabled; a --rev snapshot holds only tracked files anyway
+        if self.config.use_gitignore and not self.config.rev:
+            if ArchiveSource.is_archive(project_path):
+                gitignore_patterns = ArchiveSource.root_gitignore(project_path)
+            else:
+                gitignore_patterns = GitignoreParser.parse_gitignore(project_path / '.gitignore')
             self.config.ignore_patterns.update(gitignore_patterns)
     
-    def scan(self, path: Path) -> Tuple[str, Dict]:
-        """Scan a project directory"""
-        start_time = time.time()
-        
-        # Detect project type
+    def prepare(self, path: Path) -> ProjectType:
+        """Detect a directory's project type and set up its ignore rules, once per scan"""
         project_type = ProjectType.UNKNOWN
         if self.config.auto_detect_project:
             project_type = ProjectDetector.detect_project_type(path)
-            if self.config.verbose or self.config.interactive_mode:
+            if self.config.verbose or (self.config.interactive_mode and self.config.show_progress):
                 print(f"{Fore.GREEN}✓ Detected project type: {project_type.value}{Style.RESET_ALL}")
-        
-        # Setup ignore patterns
         self.setup_ignore_patterns(path, project_type)
+        return project_type
+    
+    def collect(self, path: Path, project_type: Optional[ProjectType] = None,
+                listing: Optional[TreeListing] = None) -> Tuple[str, List[Dict], Dict]:
+        """Scan a project directory and return (project_name, files, stats) without rendering.
+        
+        A project_type from prepare() means detection and ignore setup already
+        ran; a listing from fingerprint() means the directory walk did too.
+        """
+        start_time = time.time()
+        started = time.monotonic()
+        
+        revision = GitRevision(path, self.config.rev) if self.config.rev else None
+        archive = revision is None and ArchiveSource.is_archive(path)
+        if project_type is None:
+            # Detect project type
+            project_type = ProjectType.UNKNOWN
+            if self.config.auto_detect_project:
+                if revision is not None:
+                    project_type = ProjectDetector.detect_from_paths(path, (p for p, _, _ in revision.entries))
+                elif archive:
+                    project_type = ArchiveSource.detect_project_type(path)
+                else:
+                    project_type = ProjectDetector.detect_project_type(path)
+                if self.config.verbose or (self.config.interactive_mode and self.config.show_progress):
+                    print(f"{Fore.GREEN}✓ Detected project type: {project_type.value}{Style.RESET_ALL}")
+            
+            # Setup ignore patterns
+            self.setup_ignore_patterns(path, project_type)
         
         # Process files
-        processor = FastFileProcessor(self.config)
+        processor = FastFileProcessor(self.config, self.executor, self.content_cache, self.cancel_event)
+        processor.on_result = self.on_result
+        self.processor = processor
+        if self.config.deadline is not None:
+            processor.set_deadline(self.config.deadline, started)
+        if self.config.checkpoint_file:
+            processor.checkpoint = ScanCheckpoint(Path(self.config.checkpoint_file), path, self.config)
+            if self.config.resume:
+                if processor.checkpoint.load():
+                    print(f"{Fore.GREEN}✓ Resuming from checkpoint: {len(processor.checkpoint.records)} files already read"
+                          f"{'' if processor.checkpoint.walk_complete else ', walk in progress'}{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.YELLOW}⚠ No usable checkpoint for this directory and settings; starting over{Style.RESET_ALL}")
         if self.config.show_progress:
-            print(f"{Fore.YELLOW}⏳ Scanning directory...{Style.RESET_ALL}")
+            source = f"revision {self.config.rev}" if revision is not None else 'archive' if archive else 'directory'
+            print(f"{Fore.YELLOW}⏳ Scanning {source}...{Style.RESET_ALL}")
         
-        files = processor.scan_directory(path)
+        if revision is not None:
+            files = processor.scan_revision(path, revision)
+        elif archive:
+            files = processor.scan_archive(path)
+        else:
+            files = processor.scan_directory(path, project_type, listing)
         
         # Generate statistics
         stats = {
             'files_processed': processor.processed_files,
             'total_size': processor.total_size,
             'project_type': project_type.value,
+            'subprojects': {rel: t.value for rel, t in processor.subprojects.items()},
             'scan_time': time.time() - start_time
         }
-        
-        # Generate output
-        project_name = path.name
-        if self.config.output_format == OutputFormat.MCP:
-            output = OutputGenerator.generate_mcp(project_name, files, stats)
-        else:
-            output = OutputGenerator.generate_txt(project_name, files, stats)
+        if self.config.compact:
+            stats['compaction'] = dict(sorted(processor.bytes_removed.items()))
+        if revision is not None:
+            stats['rev'] = {'name': revision.rev, 'commit': revision.commit}
+        if processor.focus_stats is not None:
+            stats['focus'] = processor.focus_stats
+        if processor.interrupted or processor.deadline_expired:
+            stats['partial'] = {
+                'reason': 'interrupted' if processor.interrupted else 'deadline',
+                'files_found': processor.files_found,
+                'files_read': processor.files_attempted,
+                'walk_complete': processor.walk_complete,
+            }
+        if processor.redactor is not None:
+            redactions: Dict[str, int] = {}
+            for file_info in files:
+                for name, count in file_info.get('redactions', {}).items():
+                    redactions[name] = redactions.get(name, 0) + count
+            stats['redactions'] = dict(sorted(redactions.items()))
+        if self.config.deadline is not None:
+            stats['deadline'] = {'seconds': self.config.deadline, 'expired': processor.deadline_expired}
+        if processor.spill is not None:
+            stats['spilled'] = {'files': processor.spill.spilled_files, 'bytes': processor.spill.spilled_bytes}
+        if self.config.parallel_processing:
+            stats['io_concurrency'] = {
+                'final': processor.io.limit,
+                'peak': processor.io.peak,
+                'cap': processor.io.cap,
+                'files_per_second': round(processor.io.throughput, 1),
+            }
         
         if self.config.show_progress:
             print(f"{Fore.GREEN}✓ Scan complete in {stats['scan_time']:.2f}s{Style.RESET_ALL}")
             print(f"{Fore.CYAN}  📁 Files processed: {stats['files_processed']}{Style.RESET_ALL}")
             print(f"{Fore.CYAN}  💾 Total size: {stats['total_size'] / 1024:.2f} KB{Style.RESET_ALL}")
+            if 'redactions' in stats:
+                print(f"{Fore.CYAN}  🔒 Secrets redacted: {describe_redactions(stats['redactions'])}{Style.RESET_ALL}")
+            if stats.get('spilled', {}).get('files'):
+                print(f"{Fore.CYAN}  💽 Spilled to disk: {stats['spilled']['files']} files, "
+                      f"{stats['spilled']['bytes'] / 1024:.2f} KB{Style.RESET_ALL}")
+            if self.config.verbose and 'io_concurrency' in stats:
+                io_stats = stats['io_concurrency']
+                print(f"{Fore.CYAN}  🧵 Read concurrency: {io_stats['final']} "
+                      f"(peak {io_stats['peak']}, cap {io_stats['cap']}){Style.RESET_ALL}")
+            if self.config.compact:
+                removed = sum(stats['compaction'].values())
+                details = ', '.join(f"{lang} {b / 1024:.1f} KB" for lang, b in stats['compaction'].items())
+                print(f"{Fore.CYAN}  ✂️  Compaction removed: {removed / 1024:.2f} KB"
+                      f"{' (' + details + ')' if details else ''}{Style.RESET_ALL}")
         
+        if revision is not None:
+            project_name = f"{path.name}@{revision.rev}"
+        else:
+            project_name = ArchiveSource.project_name(path) if archive else path.name
+        return project_name, files, stats
+    
+    def render_chunks(self, project_name: str, files: List[Dict], stats: Dict,
+                      raw: bool = False) -> Iterable[Tuple[Union[str, bytes], Optional[str]]]:
+        """Render output in the configured format as chunks tagged with the file they belong to.
+        
+        Chunks are text, except that with raw the txt and mcp formats pass file
+        content through as UTF-8 bytes (JSON Lines has to escape it as text).
+        """
+        if self.config.output_format == OutputFormat.ARCHIVE:
+            raise ValueError("Archive output is binary; use write_snapshot() instead")
+        if self.config.output_format == OutputFormat.JSONL:
+            tags = [None] + [relative_path(f) for f in files] + [None]
+            return zip(OutputGenerator.iter_jsonl(project_name, files, stats), tags)
+        if self.config.output_format == OutputFormat.MCP:
+            return OutputGenerator.tag_lines(*OutputGenerator.mcp_lines(project_name, files, stats), raw=raw)
+        return OutputGenerator.tag_lines(*OutputGenerator.txt_lines(project_name, files, stats), raw=raw)
+    
+    def scan(self, path: Path) -> Tuple[str, Dict]:
+        """Scan a project directory"""
+        project_name, files, stats = self.collect(path)
+        output = ''.join(chunk for chunk, _ in self.render_chunks(project_name, files, stats))
         return output, stats
     
-    def save_output(self, output: str, output_file: Optional[str] = None):
+    def write_output(self, output_path: Path, output: Union[str, Iterable[Tuple[Union[str, bytes], Optional[str]]]]):
+        """Write rendered output; tagged chunks are streamed and can feed an .idx sidecar"""
+        if isinstance(output, str):
+            output_path.write_text(output, encoding='utf-8')
+            return
+        
+        index = SnapshotIndex() if self.config.write_index else None
+        offset = 0
+        with open(output_path, 'wb') as f:
+            for chunk, rel_path in output:
+                data = chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+                if index is not None and rel_path is not None:
+                    index.add(rel_path, offset, len(data))
+                f.write(data)
+                offset += len(data)
+        if index is not None:
+            index.save(output_path, offset)
+    
+    def default_output_file(self) -> str:
+        """Timestamped output file name for the configured format"""
+        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
+        ext = self.config.output_format.extension
+        return f"project_snapshot_{timestamp}.{ext}"
+    
+    def write_snapshot(self, output_path: Path, project_name: str, files: List[Dict], stats: Dict):
+        """Write a collected scan to disk in the configured format"""
+        if self.config.output_format == OutputFormat.ARCHIVE:
+            SnapshotArchive.write(output_path, project_name, files, stats)
+        else:
+            self.write_output(output_path, self.render_chunks(project_name, files, stats, raw=True))
+    
+    def save_snapshot(self, project_name: str, files: List[Dict], stats: Dict,
+                      output_file: Optional[str] = None) -> Path:
+        """Save a collected scan to file and/or clipboard; returns the file written"""
+        if self.config.output_format != OutputFormat.ARCHIVE:
+            return self.save_output(self.render_chunks(project_name, files, stats, raw=True), output_file)
+        
+        output_path = Path(output_file or self.default_output_file())
+        SnapshotArchive.write(output_path, project_name, files, stats)
+        print(f"{Fore.GREEN}✓ Archive saved to: {output_path.absolute()}{Style.RESET_ALL}")
+        if self.config.copy_to_clipboard:
+            print(f"{Fore.YELLOW}⚠ Archive output is binary and cannot be copied to the clipboard{Style.RESET_ALL}")
+        return output_path
+    
+    def save_output(self, output: Union[str, Iterable[Tuple[Union[str, bytes], Optional[str]]]],
+                    output_file: Optional[str] = None) -> Path:
         """Save output to file and/or clipboard"""
         
         # Determine output filename
         if not output_file:
-            timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-            ext = self.config.output_format.value
-            output_file = f"project_snapshot_{timestamp}.{ext}"
+            output_file = self.default_output_file()
         
         # Save to file
         output_path = Path(output_file)
-        output_path.write_text(output, encoding='utf-8')
+        self.write_output(output_path, output)
         print(f"{Fore.GREEN}✓ Output saved to: {output_path.absolute()}{Style.RESET_ALL}")
+        if self.config.write_index and not isinstance(output, str):
+            print(f"{Fore.GREEN}✓ Index saved to: {SnapshotIndex.sidecar_path(output_path).absolute()}{Style.RESET_ALL}")
         
         # Copy to clipboard if requested
         if self.config.copy_to_clipboard:
+            if not isinstance(output, str):
+                # Streamed output was never held in memory; read it back
+                output = output_path.read_text(encoding='utf-8')
             if CLIPBOARD_AVAILABLE:
                 try:
                     success = copy_to_clipboard(output)
@@ -1416,6 +4709,310 @@ class ProjectScanner:
                     print(f"{Fore.CYAN}Install clipboard support: sudo apt install xclip{Style.RESET_ALL}")
                 elif system == "Windows":
                     print(f"{Fore.CYAN}Install clipboard support: pip install pyperclip{Style.RESET_ALL}")
+        return output_path
+    
+    def fingerprint(self, path: Path, project_type: ProjectType) -> Tuple[Dict[str, Dict], TreeListing]:
+        """Merkle tree of the files a scan of this directory could read, from a walk and stats only.
+        
+        project_type comes from prepare(), whose ignore rules the walk applies.
+        No file is opened: binary files are only left out by name, and since
+        which files count toward max_files depends on their contents, every
+        file the ignore rules allow is listed. The listing is returned for
+        collect() to sniff on a miss instead of walking again.
+        """
+        processor = FastFileProcessor(self.config, cancel_event=self.cancel_event)
+        processor.sniff_contents = False
+        files = processor.walk_files(path, project_type, limit=sys.maxsize)
+        listing = TreeListing(files, dict(processor.subprojects), processor.duplicates_skipped)
+        return SnapshotMemo.build_tree(path, files), listing
+    
+    def reuse_snapshot(self, memo: SnapshotMemo, tree: Dict[str, Dict],
+                       output_file: Optional[str] = None) -> Optional[Path]:
+        """Write the memoized snapshot if the tree is unchanged, else seed the reads it can skip.
+        
+        Returns the file written on a hit and None when a scan is still needed.
+        """
+        if memo.matches(tree):
+            output_path = Path(output_file or self.default_output_file())
+            shutil.copyfile(memo.output_path, output_path)
+            sidecar = SnapshotIndex.sidecar_path(memo.output_path)
+            if self.config.write_index and sidecar.exists():
+                shutil.copyfile(sidecar, SnapshotIndex.sidecar_path(output_path))
+            print(f"{Fore.GREEN}✓ No changes since last run, reusing snapshot of {memo.files} files{Style.RESET_ALL}")
+            print(f"{Fore.GREEN}✓ Output saved to: {output_path.absolute()}{Style.RESET_ALL}")
+            if self.config.copy_to_clipboard:
+                if self.config.output_format == OutputFormat.ARCHIVE:
+                    print(f"{Fore.YELLOW}⚠ Archive output is binary and cannot be copied to the clipboard{Style.RESET_ALL}")
+                elif CLIPBOARD_AVAILABLE and copy_to_clipboard(output_path.read_text(encoding='utf-8')):
+                    print(f"{Fore.GREEN}✓ Output copied to clipboard{Style.RESET_ALL}")
+                else:
+                    print(f"{Fore.YELLOW}⚠ Could not copy to clipboard{Style.RESET_ALL}")
+            return output_path
+        
+        if memo.loaded:
+            if self.content_cache is None:
+                self.content_cache = ContentCache()
+            for key, record in memo.reusable_records(tree):
+                self.content_cache.put(key, record)
+            if self.config.show_progress:
+                _, changed = memo.diff(tree)
+                print(f"{Fore.GREEN}✓ {len(changed)} of {len(tree)} directories changed since last run; "
+                      f"only changed files are read{Style.RESET_ALL}")
+        return None
+
+class BatchScanner:
+    """Scan many project roots with one shared worker pool and content cache"""
+    
+    def __init__(self, config: ScannerConfig, max_workers: Optional[int] = None):
+        self.config = config
+        # Same default as ThreadPoolExecutor on Python 3.8+: I/O bound, so oversubscribe
+        self.max_workers = max_workers or config.max_io_threads or min(32, available_cpus() + 4)
+        self.content_cache = ContentCache()
+    
+    @staticmethod
+    def read_batch_file(batch_file: str) -> List[Path]:
+        """Read one path per line, skipping blank lines and # comments"""
+        paths = []
+        with open(batch_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    paths.append(Path(line).expanduser().resolve())
+        return paths
+    
+    def config_for_root(self) -> ScannerConfig:
+        """Per-root copy of the config so ignore sets never leak between repos"""
+        return dataclasses.replace(
+            self.config,
+            ignore_dirs=set(self.config.ignore_dirs),
+            ignore_patterns=set(self.config.ignore_patterns),
+            show_progress=False,
+            copy_to_clipboard=False,
+            batch_mode=True,
+        )
+    
+    def output_path_for(self, root: Path, output_dir: Path, taken: Set[str]) -> Path:
+        """Pick a unique output file name for a root"""
+        ext = self.config.output_format.extension
+        base = (ArchiveSource.project_name(root) if root.is_file() else root.name) or 'root'
+        name = f"{base}_snapshot.{ext}"
+        index = 2
+        while name in taken:
+            name = f"{base}_{index}_snapshot.{ext}"
+            index += 1
+        taken.add(name)
+        return output_dir / name
+    
+    def scan_root(self, root: Path, output_path: Path,
+                  executor: concurrent.futures.Executor) -> Dict:
+        """Scan a single root and write its snapshot"""
+        summary = {'path': str(root), 'output': str(output_path)}
+        try:
+            if not root.is_dir() and not ArchiveSource.is_archive(root):
+                raise NotADirectoryError(f"Not a directory or archive: {root}")
+            scanner = ProjectScanner(self.config_for_root(), executor, self.content_cache)
+            project_name, files, stats = scanner.collect(root)
+            scanner.write_snapshot(output_path, project_name, files, stats)
+            summary.update({
+                'status': 'ok',
+                'files_processed': stats['files_processed'],
+                'total_size': stats['total_size'],
+                'project_type': stats['project_type'],
+                'scan_time': round(stats['scan_time'], 3),
+            })
+        except Exception as e:
+            summary.update({'status': 'error', 'error': str(e)})
+        return summary
+    
+    def scan_all(self, roots: List[Path], output_dir: Path) -> Dict:
+        """Scan every root concurrently and write one output per root plus a summary"""
+        start_time = time.time()
+        output_dir.mkdir(parents=True, exist_ok=True)
+        taken: Set[str] = set()
+        jobs = [(root, self.output_path_for(root, output_dir, taken)) for root in roots]
+        
+        results = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Walkers and renderers get their own small pool; they block on the shared
+            # read pool, so running them on it could starve it
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(8, len(jobs) or 1)) as roots_pool:
+                futures = [roots_pool.submit(self.scan_root, root, out, executor) for root, out in jobs]
+                for future in concurrent.futures.as_completed(futures):
+                    result = future.result()
+                    results.append(result)
+                    if result['status'] != 'ok':
+                        print(f"{Fore.RED}✗ {result['path']}: {result['error']}{Style.RESET_ALL}")
+                    elif self.config.show_progress:
+                        print(f"{Fore.GREEN}✓ {result['path']}: {result['files_processed']} files "
+                              f"in {result['scan_time']:.2f}s{Style.RESET_ALL}")
+        
+        results.sort(key=lambda r: r['path'])
+        summary = {
+            'generated': datetime.datetime.now().isoformat(timespec='seconds'),
+            'version': __version__,
+            'roots': len(results),
+            'succeeded': sum(1 for r in results if r['status'] == 'ok'),
+            'failed': sum(1 for r in results if r['status'] != 'ok'),
+            'total_files': sum(r.get('files_processed', 0) for r in results),
+            'total_size': sum(r.get('total_size', 0) for r in results),
+            'cache_hits': self.content_cache.hits,
+            'workers': self.max_workers,
+            'wall_time': round(time.time() - start_time, 3),
+            'results': results,
+        }
+        summary_path = output_dir / 'batch_summary.json'
+        summary_path.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+        summary['summary_path'] = str(summary_path)
+        return summary
+
+class AsyncScanner:
+    """asyncio front end: concurrent scans share one read pool and content caches.
+    
+    Like batch mode, each scan walks and coordinates on a small pool of its
+    own while its file reads go to the shared read pool, so nothing blocks
+    the event loop. Cancelling the awaiting task stops that scan's walk and
+    reads; max_concurrency caps one call's reads in flight, and progress is
+    called on the loop with (files_read, files_found) as reads complete.
+    Scans share a content cache per processing settings, each holding at
+    most cache_entries records, and only the most recently used settings'
+    caches are kept.
+    """
+    
+    _shared: Optional['AsyncScanner'] = None
+    # Content caches kept for different processing settings at once
+    MAX_CACHES = 4
+    
+    def __init__(self, config: Optional[ScannerConfig] = None,
+                 max_workers: Optional[int] = None, max_scans: int = 8, cache_entries: int = 100000):
+        self.config = config or ScannerConfig(show_progress=False)
+        self.max_workers = max_workers or self.config.max_io_threads or min(32, available_cpus() + 4)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers)
+        # Walkers block on the read pool, so running them on it could starve it
+        self.scan_pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_scans)
+        self.cache_entries = cache_entries
+        self.content_caches: 'collections.OrderedDict[Tuple, ContentCache]' = collections.OrderedDict()
+    
+    @classmethod
+    def shared(cls) -> 'AsyncScanner':
+        """The process-wide scanner behind scan_async() and iter_records_async()"""
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+    
+    async def __aenter__(self) -> 'AsyncScanner':
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.close()
+    
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.scan_pool.shutdown(wait=False)
+    
+    def content_cache_for(self, config: ScannerConfig) -> ContentCache:
+        """Content cache for the processing settings in effect; called on the loop only"""
+        signature = WarmIndex.processing_signature(config)
+        cache = self.content_caches.get(signature)
+        if cache is None:
+            cache = self.content_caches[signature] = ContentCache(self.cache_entries)
+            if len(self.content_caches) > self.MAX_CACHES:
+                self.content_caches.popitem(last=False)
+        self.content_caches.move_to_end(signature)
+        return cache
+    
+    def config_for_call(self, config: Optional[ScannerConfig], max_concurrency: Optional[int]) -> ScannerConfig:
+        """Per-call copy of the config so ignore sets never leak between scans"""
+        config = config or self.config
+        return dataclasses.replace(
+            config,
+            ignore_dirs=set(config.ignore_dirs),
+            ignore_patterns=set(config.ignore_patterns),
+            show_progress=False,
+            copy_to_clipboard=False,
+            batch_mode=True,
+            max_io_threads=max_concurrency or config.max_io_threads,
+        )
+    
+    async def collect(self, path: Union[str, Path], config: Optional[ScannerConfig] = None,
+                      max_concurrency: Optional[int] = None,
+                      progress: Optional[Callable[[int, int], object]] = None,
+                      on_record: Optional[Callable[[Dict], None]] = None) -> Tuple[str, List[Dict], Dict]:
+        """Async ProjectScanner.collect(); progress may be a plain or a coroutine function"""
+        scanner = ProjectScanner(self.config_for_call(config, max_concurrency))
+        return await self._collect(scanner, Path(path), progress, on_record)
+    
+    async def _collect(self, scanner: 'ProjectScanner', path: Path,
+                       progress: Optional[Callable[[int, int], object]],
+                       on_record: Optional[Callable[[Dict], None]]) -> Tuple[str, List[Dict], Dict]:
+        loop = asyncio.get_running_loop()
+        cancel_event = threading.Event()
+        pending_callbacks = []
+        
+        def deliver(record: Optional[Dict], files_read: int, files_found: int):
+            if record is not None and on_record is not None:
+                on_record(record)
+            if progress is not None:
+                result = progress(files_read, files_found)
+                if asyncio.iscoroutine(result):
+                    pending_callbacks.append(asyncio.ensure_future(result))
+        
+        scanner.executor = self.executor
+        scanner.content_cache = self.content_cache_for(scanner.config)
+        scanner.cancel_event = cancel_event
+        # Runs on the scan thread; everything the caller sees happens on the loop
+        scanner.on_result = lambda *args: loop.call_soon_threadsafe(deliver, *args)
+        try:
+            result = await loop.run_in_executor(self.scan_pool, scanner.collect, path)
+        except asyncio.CancelledError:
+            cancel_event.set()
+            raise
+        if pending_callbacks:
+            await asyncio.gather(*pending_callbacks)
+        return result
+    
+    async def scan(self, path: Union[str, Path], config: Optional[ScannerConfig] = None,
+                   max_concurrency: Optional[int] = None,
+                   progress: Optional[Callable[[int, int], object]] = None) -> Tuple[str, Dict]:
+        """Async ProjectScanner.scan(): rendered output and stats"""
+        scanner = ProjectScanner(self.config_for_call(config, max_concurrency))
+        project_name, files, stats = await self._collect(scanner, Path(path), progress, None)
+        # Spilled contents are read back while rendering, so that stays off the loop too
+        output = await asyncio.get_running_loop().run_in_executor(
+            self.scan_pool, lambda: ''.join(chunk for chunk, _ in scanner.render_chunks(project_name, files, stats)))
+        return output, stats
+    
+    async def iter_records(self, path: Union[str, Path], config: Optional[ScannerConfig] = None,
+                           max_concurrency: Optional[int] = None,
+                           progress: Optional[Callable[[int, int], object]] = None) -> AsyncIterator[Dict]:
+        """Yield file records as their reads complete; stopping early cancels the scan"""
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        task = asyncio.ensure_future(self.collect(path, config, max_concurrency, progress, queue.put_nowait))
+        task.add_done_callback(lambda _: queue.put_nowait(finished))
+        try:
+            while True:
+                record = await queue.get()
+                if record is finished:
+                    break
+                yield record
+            task.result()  # surface scan errors
+        finally:
+            if not task.done():
+                task.cancel()
+
+
+async def scan_async(path: Union[str, Path], config: Optional[ScannerConfig] = None,
+                     max_concurrency: Optional[int] = None,
+                     progress: Optional[Callable[[int, int], object]] = None) -> Tuple[str, Dict]:
+    """Scan without blocking the event loop, on the process-wide AsyncScanner"""
+    return await AsyncScanner.shared().scan(path, config, max_concurrency, progress)
+
+
+def iter_records_async(path: Union[str, Path], config: Optional[ScannerConfig] = None,
+                       max_concurrency: Optional[int] = None,
+                       progress: Optional[Callable[[int, int], object]] = None) -> AsyncIterator[Dict]:
+    """File records as they are read, on the process-wide AsyncScanner"""
+    return AsyncScanner.shared().iter_records(path, config, max_concurrency, progress)
 
 def parse_ignore_argument(ignore_arg: str, config: ScannerConfig):
     """Parse the --ignore argument and update config"""
@@ -1467,8 +5064,83 @@ def install_clipboard_dependencies():
         print(f"{Fore.GREEN}✓ Clipboard support is built-in on macOS{Style.RESET_ALL}")
         return True
 
+def run_batch(args, config: ScannerConfig):
+    """Scan every root given on the command line and/or in the --batch file"""
+    try:
+        roots = [Path(p).resolve() for p in args.path]
+        if args.batch:
+            roots.extend(BatchScanner.read_batch_file(args.batch))
+        
+        output_dir = Path(config.output_file or '.')
+        summary = BatchScanner(config).scan_all(roots, output_dir)
+        
+        print(f"{Fore.GREEN}✓ Batch complete in {summary['wall_time']:.2f}s: "
+              f"{summary['succeeded']}/{summary['roots']} roots, "
+              f"{summary['total_files']} files{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}  📄 Summary: {summary['summary_path']}{Style.RESET_ALL}")
+        if summary['failed']:
+            sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\n{Fore.YELLOW}Batch interrupted{Style.RESET_ALL}")
+        sys.exit(1)
+    except OSError as e:
+        print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}")
+        sys.exit(1)
+
+def extract_main(argv: List[str]):
+    """codeprint extract <snapshot> [path]: print one file from an archive or indexed snapshot"""
+    parser = argparse.ArgumentParser(
+        prog='codeprint extract',
+        description='Extract a single file from a codeprint archive, or from a snapshot '
+                    'written with --index, without scanning the whole snapshot'
+    )
+    parser.add_argument('archive', help='Archive created with -f archive, or a snapshot with an .idx sidecar')
+    parser.add_argument('path', nargs='?', help='Root-relative path to extract (omit to list paths)')
+    parser.add_argument('-o', '--output', help='Write the file here instead of stdout')
+    args = parser.parse_args(argv)
+    
+    def emit(data):
+        if args.output:
+            with open(args.output, 'wb') as f:
+                f.write(data)
+        else:
+            sys.stdout.flush()
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+    
+    try:
+        if SnapshotIndex.sidecar_path(args.archive).exists():
+            index = SnapshotIndex.load(args.archive)
+            if args.path is None:
+                for rel_path in sorted(index.sections):
+                    print(rel_path)
+                return
+            emit(index.read_section(args.archive, args.path))
+            return
+        
+        with SnapshotArchive(args.archive) as archive:
+            if args.path is None:
+                for rel_path in archive.paths():
+                    print(rel_path)
+                return
+            with archive.read(args.path) as view:
+                emit(view)
+    except KeyError:
+        print(f"{Fore.RED}Error: Not in snapshot: {args.path}{Style.RESET_ALL}", file=sys.stderr)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        print(f"{Fore.RED}Error: {e}{Style.RESET_ALL}", file=sys.stderr)
+        sys.exit(1)
+
+def raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
 def main():
     """Main entry point"""
+    if sys.argv[1:2] == ['extract']:
+        extract_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description='CodePrint - AI-ready project snapshots',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1476,16 +5148,50 @@ def main():
 Examples:
   codeprint                          # Scan current directory
   codeprint /path/to/project         # Scan specific directory
+  codeprint release-1.0.tar.gz       # Scan a .zip/.tar(.gz) without extracting it
+  codeprint --rev v2.3               # Snapshot a tag or commit without checking it out
   codeprint -f mcp -c                # MCP format + clipboard
   codeprint --ignore "*.log,temp/"   # Ignore logs and temp directory
   codeprint --setup                  # Run setup configuration
   codeprint -i                       # Interactive mode
+  codeprint --batch repos.txt -o out # One snapshot per listed repo in out/
+  codeprint -f archive -o snap.cpk   # Packed archive with a path index
+  codeprint extract snap.cpk src/app.py  # Print one file from an archive
+  codeprint --index -o snap.txt      # TXT snapshot plus snap.txt.idx offsets
         """
     )
     
-    parser.add_argument('path', nargs='?', default='.', help='Path to scan (default: current directory)')
-    parser.add_argument('-f', '--format', choices=['txt', 'mcp'], help='Output format')
-    parser.add_argument('-o', '--output', help='Output file name')
+    parser.add_argument('path', nargs='*', default=[], help='Path(s) to scan (default: current directory)')
+    parser.add_argument('-f', '--format', choices=[f.value for f in OutputFormat], help='Output format')
+    parser.add_argument('-o', '--output', help='Output file name (output directory in batch mode)')
+    parser.add_argument('--batch', metavar='FILE', help='File listing one repository path per line to scan in one run')
+    parser.add_argument('--compact', action='store_true', help='Strip comments, docstrings and redundant whitespace from source files')
+    parser.add_argument('--outline', nargs='?', const=0, type=int, metavar='LINES',
+                        help='Emit imports and signatures instead of truncating files over LINES lines (default: --max-lines)')
+    parser.add_argument('--focus', action='append', metavar='FILE',
+                        help='Only include files reachable from this entry point through imports (repeatable)')
+    parser.add_argument('--focus-depth', type=int, metavar='N', help='Import hops to follow from --focus entry points (default: 2)')
+    parser.add_argument('--symlinks', choices=[p.value for p in SymlinkPolicy],
+                        help='Symlink handling: skip all, follow links to files only (default), or follow directories too')
+    parser.add_argument('--max-io-threads', type=int, metavar='N',
+                        help=f'Hard cap on concurrent file reads; the actual number adapts to the filesystem (default: {DEFAULT_IO_THREADS_CAP})')
+    parser.add_argument('--walker-threads', type=int, metavar='N',
+                        help='List this many directories concurrently (helps on network filesystems; default: 1)')
+    parser.add_argument('--max-memory', metavar='SIZE',
+                        help='Memory for file contents (e.g. 512M, 2G; plain numbers are MB); the rest spills to a temp file')
+    parser.add_argument('--memo', action='store_true',
+                        help='Reuse the last snapshot of this directory if no file changed, and unchanged files otherwise')
+    parser.add_argument('--resume', action='store_true', help='Continue an interrupted scan of this directory from its checkpoint')
+    parser.add_argument('--checkpoint', metavar='FILE', help='State file for checkpoints (default: one per directory in the config folder)')
+    parser.add_argument('--deadline', metavar='TIME',
+                        help='Render whatever was read within this wall-clock budget (e.g. 2s, 500ms, 1m)')
+    parser.add_argument('--rev', metavar='COMMIT',
+                        help='Snapshot a git commit, tag or branch straight from the object store, leaving the working tree alone')
+    parser.add_argument('--redact', action='store_true',
+                        help='Redact AWS keys, private keys, JWTs, tokens and high-entropy secrets from file contents')
+    parser.add_argument('--redact-pattern', action='append', metavar='REGEX',
+                        help='Also redact matches of this regex (repeatable, implies --redact)')
+    parser.add_argument('--index', action='store_true', help='Also write an .idx sidecar with the byte offset of each file section')
     parser.add_argument('-c', '--clipboard', action='store_true', help='Copy to clipboard')
     parser.add_argument('--max-file-size', type=int, help='Maximum file size in KB')
     parser.add_argument('--max-files', type=int, help='Maximum number of files')
@@ -1502,6 +5208,8 @@ Examples:
     parser.add_argument('--install-clipboard', action='store_true', help='Install clipboard dependencies')
     
     args = parser.parse_args()
+    if not args.path and not args.batch:
+        args.path = ['.']
     
     # Handle special commands
     if args.install_clipboard:
@@ -1544,6 +5252,47 @@ Examples:
         config.interactive_mode = True
     if args.ignore:
         parse_ignore_argument(args.ignore, config)
+    if args.index:
+        config.write_index = True
+    if args.compact:
+        config.compact = True
+    if args.outline is not None:
+        config.outline_threshold = args.outline
+    if args.focus:
+        config.focus = args.focus
+    if args.focus_depth is not None:
+        config.focus_depth = args.focus_depth
+    if args.symlinks:
+        config.symlinks = SymlinkPolicy(args.symlinks)
+    if args.max_io_threads is not None:
+        config.max_io_threads = max(1, args.max_io_threads)
+    if args.walker_threads is not None:
+        config.walker_threads = max(1, args.walker_threads)
+    if args.rev:
+        config.rev = args.rev
+    if args.memo:
+        config.memoize = True
+    if args.redact or args.redact_pattern:
+        config.redact_secrets = True
+        config.redact_patterns = args.redact_pattern or []
+        try:
+            SecretRedactor(config.redact_patterns)
+        except re.error as e:
+            parser.error(f"invalid --redact-pattern: {e}")
+    if args.deadline:
+        try:
+            config.deadline = parse_duration(args.deadline)
+        except ValueError:
+            parser.error(f"invalid --deadline: {args.deadline}")
+    if args.max_memory:
+        try:
+            config.max_memory = parse_size(args.max_memory)
+        except ValueError:
+            parser.error(f"invalid --max-memory size: {args.max_memory}")
+    
+    # Container eviction sends SIGTERM: treat it like Ctrl-C so partial output is written
+    if hasattr(signal, 'SIGTERM') and threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, raise_keyboard_interrupt)
     
     # Interactive mode
     if args.interactive:
@@ -1558,19 +5307,61 @@ Examples:
     if config.show_progress and not args.no_progress:
         scanner.print_banner()
     
+    # Batch mode: several roots share one worker pool
+    if args.batch or len(args.path) > 1:
+        run_batch(args, config)
+        return
+    
     # Scan project
     try:
-        project_path = Path(args.path).resolve()
+        project_path = Path(args.path[0]).resolve()
         if not project_path.exists():
-            print(f"{Fore.RED}Error: Path does not exist: {args.path}{Style.RESET_ALL}")
+            print(f"{Fore.RED}Error: Path does not exist: {args.path[0]}{Style.RESET_ALL}")
             sys.exit(1)
         
-        if not project_path.is_dir():
-            print(f"{Fore.RED}Error: Path is not a directory: {args.path}{Style.RESET_ALL}")
+        if config.rev:
+            if not project_path.is_dir():
+                parser.error("--rev needs a directory inside a git repository")
+            if args.resume or config.focus:
+                parser.error("--resume and --focus read the working tree and cannot be combined with --rev")
+        elif ArchiveSource.is_archive(project_path):
+            if args.resume or config.focus:
+                parser.error("--resume and --focus need a directory, not an archive")
+        elif not project_path.is_dir():
+            print(f"{Fore.RED}Error: Path is not a directory or archive: {args.path[0]}{Style.RESET_ALL}")
             sys.exit(1)
+        else:
+            config.checkpoint_file = args.checkpoint or str(ScanCheckpoint.default_path(project_path))
+            config.resume = args.resume
         
-        output, stats = scanner.scan(project_path)
-        scanner.save_output(output, config.output_file)
+        memo = None
+        project_type = None
+        listing = None
+        if config.memoize and not config.rev and project_path.is_dir():
+            # Keyed on the settings before the scan adds ignore rules to them
+            memo = SnapshotMemo(SnapshotMemo.default_path(project_path), project_path, config)
+            memo.load()
+            # Earlier snapshots, memos and checkpoints in the tree are not changes to it
+            config.ignore_patterns.update(memo.own_files(config))
+            project_type = scanner.prepare(project_path)
+            tree, listing = scanner.fingerprint(project_path, project_type)
+            if scanner.reuse_snapshot(memo, tree, config.output_file) is not None:
+                return
+        project_name, files, stats = scanner.collect(project_path, project_type, listing)
+        output_path = scanner.save_snapshot(project_name, files, stats, config.output_file)
+        if memo is not None and 'partial' not in stats:
+            memo.store(tree, project_name, files, output_path)
+        
+        if stats.get('partial', {}).get('reason') == 'interrupted':
+            print(f"{Fore.YELLOW}⚠ Scan interrupted: partial snapshot written "
+                  f"({describe_partial(stats['partial'])}){Style.RESET_ALL}")
+            if config.checkpoint_file:
+                print(f"{Fore.YELLOW}  Run again with --resume to continue{Style.RESET_ALL}")
+            sys.exit(1)
+        if 'partial' in stats:
+            print(f"{Fore.YELLOW}⚠ Best-effort snapshot: {describe_partial(stats['partial'])}{Style.RESET_ALL}")
+        if scanner.processor.checkpoint is not None:
+            scanner.processor.checkpoint.discard()
         
     except KeyboardInterrupt:
         print(f"\n{Fore.YELLOW}Scan interrupted{Style.RESET_ALL}")
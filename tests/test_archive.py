@@ -0,0 +1,151 @@
+import pytest
+import sys
+import io
+import tarfile
+import zipfile
+from unittest.mock import patch
+sys.path.insert(0, 'src/codeprint')
+from cli import ArchiveSource, ProjectScanner, ScannerConfig, FastFileProcessor, main
+from pathlib import Path
+
+
+MEMBERS = {
+    'proj-1.0/src/app.py': b'print("app")\n',
+    'proj-1.0/README.md': b'# Project\n',
+    'proj-1.0/.git/config': b'[core]\n',
+    'proj-1.0/tmp/scratch.py': b'x = 1\n',
+    'proj-1.0/logo.png': b'\x89PNG\r\n\x00\x00',
+    'proj-1.0/data.txt': b'\x00\x01\x02' * 50,
+    'proj-1.0/big.log.txt': b'x' * 5000,
+}
+
+
+@pytest.fixture
+def tarball(tmp_path):
+    path = tmp_path / 'proj-1.0.tar.gz'
+    with tarfile.open(path, 'w:gz') as tf:
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tf.addfile(info, io.BytesIO(data))
+    return path
+
+
+@pytest.fixture
+def zipball(tmp_path):
+    path = tmp_path / 'submission.zip'
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('proj-1.0/', b'')
+        for name, data in MEMBERS.items():
+            zf.writestr(name, data)
+        zf.writestr('../escape.py', b'print("outside")\n')
+    return path
+
+
+def collect(path):
+    config = ScannerConfig(show_progress=False, parallel_processing=False, max_file_size=4096)
+    return ProjectScanner(config).collect(path)
+
+
+class TestArchiveScan:
+    """Test suite for scanning .zip and tar archives in place"""
+
+    def test_tarball(self, tarball):
+        """Test tar members go through the ignore, binary and size filters"""
+        name, files, stats = collect(tarball)
+
+        assert name == 'proj-1.0'
+        assert [f['rel_path'] for f in files] == ['proj-1.0/README.md', 'proj-1.0/src/app.py']
+        assert files[1]['content'] == 'print("app")\n'
+        assert stats['files_processed'] == 2
+
+    def test_zip_skips_by_header(self, zipball):
+        """Test ignored, binary-named and oversized members are never opened"""
+        opened = []
+        original = zipfile.ZipFile.open
+
+        def record_open(self, member, *args, **kwargs):
+            opened.append(getattr(member, 'filename', member))
+            return original(self, member, *args, **kwargs)
+
+        with patch.object(zipfile.ZipFile, 'open', record_open):
+            name, files, _ = collect(zipball)
+
+        assert name == 'submission'
+        assert [f['rel_path'] for f in files] == ['proj-1.0/README.md', 'proj-1.0/src/app.py']
+        # data.txt can only be told apart by its bytes; everything else is decided from the header
+        assert sorted(opened) == ['proj-1.0/README.md', 'proj-1.0/data.txt', 'proj-1.0/src/app.py']
+
+    def test_zip_project_type(self, tmp_path):
+        """Test a zip's project type comes from its central directory and applies its ignore rules"""
+        path = tmp_path / 'pkg.zip'
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('pkg-2.0/setup.py', b'from setuptools import setup\n')
+            zf.writestr('pkg-2.0/pkg/__init__.py', b'')
+            zf.writestr('pkg-2.0/pkg/__pycache__/mod.cpython-311.pyc', b'cached')
+        _, files, stats = collect(path)
+
+        assert stats['project_type'] == 'python'
+        assert [f['rel_path'] for f in files] == ['pkg-2.0/pkg/__init__.py', 'pkg-2.0/setup.py']
+
+    def test_zip_root_gitignore_applied(self, tmp_path):
+        """Test the .gitignore at the root of a zip, inside its wrapper directory, filters members"""
+        path = tmp_path / 'app.zip'
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('app-1.0/.gitignore', b'# generated\n*.gen.py\nscratch\n')
+            zf.writestr('app-1.0/main.py', b'x = 1\n')
+            zf.writestr('app-1.0/out.gen.py', b'y = 2\n')
+            zf.writestr('app-1.0/scratch/notes.py', b'z = 3\n')
+        _, files, _ = collect(path)
+
+        assert [f['rel_path'] for f in files] == ['app-1.0/main.py']
+        config = ScannerConfig(show_progress=False, parallel_processing=False, use_gitignore=False)
+        _, files, _ = ProjectScanner(config).collect(path)
+        assert len(files) == 3
+
+    def test_interrupted_scan_has_no_resume_hint(self, zipball, tmp_path, monkeypatch, capsys):
+        """Test an interrupted archive scan does not suggest --resume, which archives reject"""
+        monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(FastFileProcessor, 'process_member',
+                            lambda self, *args: (_ for _ in ()).throw(KeyboardInterrupt))
+        monkeypatch.setattr(sys, 'argv', ['codeprint', str(zipball), '--no-progress'])
+        with pytest.raises(SystemExit):
+            main()
+        out = capsys.readouterr().out
+        assert 'partial snapshot written' in out
+        assert '--resume' not in out
+
+    def test_line_endings_match_directory_scan(self, tmp_path):
+        """Test CRLF members are normalized exactly as the same file read from disk"""
+        data = b'a = 1\r\nb = 2\rc = 3\r\n'
+        path = tmp_path / 'crlf.zip'
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('crlf.py', data)
+        (tmp_path / 'tree').mkdir()
+        (tmp_path / 'tree' / 'crlf.py').write_bytes(data)
+
+        _, archived, _ = collect(path)
+        _, on_disk, _ = collect(tmp_path / 'tree')
+        assert archived[0]['content'] == on_disk[0]['content'] == 'a = 1\nb = 2\nc = 3\n'
+        assert (archived[0]['hash'], archived[0]['lines']) == (on_disk[0]['hash'], on_disk[0]['lines'])
+
+    def test_member_path(self):
+        """Test member names are normalized and escaping names rejected"""
+        assert ArchiveSource.member_path('./a//b.py') == Path('a/b.py')
+        assert ArchiveSource.member_path('../x.py') is None
+        assert ArchiveSource.member_path('/') is None
+
+    def test_header_size_not_trusted(self, tmp_path):
+        """Test a member larger than its header claims is cut off at the size limit"""
+        path = tmp_path / 'lying.zip'
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('huge.txt', b'y' * 10000)
+        config = ScannerConfig(show_progress=False, parallel_processing=False, max_file_size=4096)
+        scanner = ProjectScanner(config)
+        with patch('cli.ArchiveSource.members') as members:
+            zf = zipfile.ZipFile(path)
+            members.return_value = iter([('huge.txt', 10, 0, lambda: zf.open('huge.txt'))])
+            _, files, _ = scanner.collect(path)
+            zf.close()
+        assert files == []
@@ -0,0 +1,143 @@
+import pytest
+import sys
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+sys.path.insert(0, 'src/codeprint')
+from cli import AsyncScanner, ProjectScanner, ScannerConfig, FastFileProcessor, ContentCache, scan_async
+from pathlib import Path
+
+
+@pytest.fixture
+def project(tmp_path):
+    for i in range(12):
+        (tmp_path / f'mod{i:02d}.py').write_text(f'value = {i}\n')
+    return tmp_path
+
+
+def slow_reads(delay, in_flight=None):
+    """process_file that sleeps, optionally tracking the peak number of concurrent reads"""
+    original = FastFileProcessor.process_file
+    lock = threading.Lock()
+
+    def process_file(self, path):
+        if in_flight is not None:
+            with lock:
+                in_flight['now'] += 1
+                in_flight['peak'] = max(in_flight['peak'], in_flight['now'])
+        try:
+            time.sleep(delay)
+            return original(self, path)
+        finally:
+            if in_flight is not None:
+                with lock:
+                    in_flight['now'] -= 1
+    return process_file
+
+
+class TestAsyncScanner:
+    """Test suite for the asyncio API"""
+
+    def test_scan_matches_sync(self, project):
+        """Test scan_async renders what ProjectScanner.scan does and reports progress"""
+        config = ScannerConfig(show_progress=False, use_gitignore=False)
+        updates = []
+
+        async def progress(done, total):
+            updates.append((done, total))
+
+        output, stats = asyncio.run(scan_async(project, config, progress=progress))
+        expected, _ = ProjectScanner(ScannerConfig(show_progress=False, use_gitignore=False)).scan(project)
+
+        def body(text):
+            return [line for line in text.splitlines() if not line.startswith('Generated')]
+
+        assert body(output) == body(expected)
+        assert stats['files_processed'] == 12
+        assert updates[-1] == (12, 12)
+        assert [done for done, _ in updates] == list(range(1, 13))
+
+    def test_iter_records_with_concurrency_limit(self, project):
+        """Test records stream in while the loop stays responsive and reads stay under the limit"""
+        in_flight = {'now': 0, 'peak': 0}
+
+        async def run():
+            ticks = 0
+            records = []
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.005)
+                    ticks += 1
+
+            tick_task = asyncio.ensure_future(ticker())
+            async with AsyncScanner(ScannerConfig(show_progress=False)) as scanner:
+                async for record in scanner.iter_records(project, max_concurrency=2):
+                    records.append(record['rel_path'])
+            tick_task.cancel()
+            return records, ticks
+
+        with patch.object(FastFileProcessor, 'process_file', slow_reads(0.02, in_flight)):
+            records, ticks = asyncio.run(run())
+
+        assert sorted(records) == [f'mod{i:02d}.py' for i in range(12)]
+        assert in_flight['peak'] <= 2
+        assert ticks > 10  # the event loop kept running during the scan
+
+    def test_cancellation_stops_reads(self, project):
+        """Test cancelling the awaiting task stops the scan's outstanding reads"""
+        calls = []
+        slow = slow_reads(0.05)
+
+        def record_calls(self, path):
+            calls.append(path)
+            return slow(self, path)
+
+        async def run():
+            async with AsyncScanner(ScannerConfig(show_progress=False)) as scanner:
+                task = asyncio.ensure_future(scanner.collect(project, max_concurrency=1))
+                await asyncio.sleep(0.12)
+                task.cancel()
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+                await asyncio.sleep(0.2)
+
+        with patch.object(FastFileProcessor, 'process_file', record_calls):
+            asyncio.run(run())
+
+        assert len(calls) < 6
+
+    def test_cache_per_processing_settings(self, tmp_path):
+        """Test a call with other processing settings does not get records cached by an earlier call"""
+        (tmp_path / 'long.py').write_text(''.join(f'x{i} = {i}  # note\n' for i in range(50)))
+
+        async def run():
+            async with AsyncScanner(ScannerConfig(show_progress=False)) as scanner:
+                _, plain, _ = await scanner.collect(tmp_path)
+                _, compact, _ = await scanner.collect(
+                    tmp_path, ScannerConfig(show_progress=False, compact=True, max_lines_per_file=5))
+                _, again, _ = await scanner.collect(tmp_path)
+                return plain[0], compact[0], again[0], scanner
+
+        plain, compact, again, scanner = asyncio.run(run())
+        assert not plain['truncated']
+        assert compact['truncated']
+        assert '# note' not in compact['content']
+        assert not again['truncated']
+        assert [(cache.hits, cache.misses) for cache in scanner.content_caches.values()] == [(0, 1), (1, 1)]
+
+    def test_content_cache_bounded(self):
+        """Test a bounded content cache keeps only the most recently used records"""
+        cache = ContentCache(max_entries=2)
+        record = FastFileProcessor(ScannerConfig(show_progress=False)).process_bytes(
+            Path('a.py'), b'a = 1\n', 6, 0)
+        for key in ('a', 'b'):
+            cache.put((key, 6, 0), record)
+        assert cache.get(('a', 6, 0)) is not None
+        cache.put(('c', 6, 0), record)
+
+        assert len(cache) == 2
+        assert cache.get(('b', 6, 0)) is None
+        assert cache.get(('a', 6, 0)) is not None
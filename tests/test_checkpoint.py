@@ -0,0 +1,84 @@
+import pytest
+import sys
+from unittest.mock import patch
+sys.path.insert(0, 'src/codeprint')
+from cli import ProjectScanner, ScannerConfig, FastFileProcessor, OutputGenerator
+from pathlib import Path
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    (root / 'pkg').mkdir(parents=True)
+    for i in range(6):
+        (root / 'pkg' / f'mod{i}.py').write_text(f'value = {i}\n')
+    return root
+
+
+def scanner_for(tmp_path, resume=False):
+    config = ScannerConfig(show_progress=False, parallel_processing=False, use_gitignore=False,
+                           checkpoint_file=str(tmp_path / 'scan.state'), resume=resume)
+    return ProjectScanner(config)
+
+
+class TestScanCheckpoint:
+    """Test suite for resumable scans"""
+
+    def test_interrupt_then_resume(self, project, tmp_path):
+        """Test an interrupted scan reports partial results and a resumed one only reads the rest"""
+        original = FastFileProcessor.process_file
+        calls = []
+
+        def interrupt_on_fourth(self, path):
+            calls.append(path.name)
+            if len(calls) == 4:
+                raise KeyboardInterrupt
+            return original(self, path)
+
+        def record_calls(self, path):
+            calls.append(path.name)
+            return original(self, path)
+
+        scanner = scanner_for(tmp_path)
+        with patch.object(FastFileProcessor, 'process_file', interrupt_on_fourth):
+            name, files, stats = scanner.collect(project)
+
+        assert [f['rel_path'] for f in files] == ['pkg/mod0.py', 'pkg/mod1.py', 'pkg/mod2.py']
+        assert stats['partial'] == {'reason': 'interrupted', 'files_found': 6,
+                                    'files_read': 3, 'walk_complete': True}
+        assert 'Partial snapshot: interrupted after reading 3 of 6 files' in \
+            OutputGenerator.generate_txt(name, files, stats)
+        assert (tmp_path / 'scan.state').exists()
+
+        # A file changed after the interruption is read again
+        (project / 'pkg' / 'mod1.py').write_text('value = "changed"\n')
+        calls.clear()
+        resumed = scanner_for(tmp_path, resume=True)
+        with patch.object(FastFileProcessor, 'process_file', record_calls):
+            _, files, stats = resumed.collect(project)
+
+        assert sorted(calls) == ['mod1.py', 'mod3.py', 'mod4.py', 'mod5.py']
+        assert 'partial' not in stats
+        assert len(files) == 6
+        assert 'changed' in files[1]['content']
+
+        resumed.processor.checkpoint.discard()
+        assert not (tmp_path / 'scan.state').exists()
+
+    def test_quick_scan_writes_nothing(self, project, tmp_path):
+        """Test scans that finish inside the checkpoint interval never create a state file"""
+        scanner = scanner_for(tmp_path)
+        _, files, stats = scanner.collect(project)
+
+        assert len(files) == 6
+        assert not (tmp_path / 'scan.state').exists()
+
+    def test_settings_mismatch_starts_over(self, project, tmp_path):
+        """Test a checkpoint taken with other settings is not reused"""
+        state = tmp_path / 'scan.state'
+        state.write_text('{"type": "header", "root": "%s", "settings": "other"}\n' % project)
+        scanner = scanner_for(tmp_path, resume=True)
+        with patch.object(FastFileProcessor, 'process_file', return_value=None) as process_file:
+            scanner.collect(project)
+        assert process_file.call_count == 6
+
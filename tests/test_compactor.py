@@ -0,0 +1,88 @@
+import pytest
+import sys
+sys.path.insert(0, 'src/codeprint')
+from cli import CodeCompactor, ProjectScanner, ScannerConfig
+from pathlib import Path
+import tempfile
+import shutil
+
+
+class TestCodeCompactor:
+    """Test suite for CodeCompactor"""
+    
+    def test_python_comments_and_docstrings(self):
+        """Test Python comments and docstrings are removed and the code stays valid"""
+        source = (
+            '#!/usr/bin/env python\n'
+            '# Copyright header\n'
+            '"""Module docstring."""\n'
+            'import os  # trailing\n'
+            '\n'
+            '\n'
+            '\n'
+            'def f():\n'
+            '    """Only a docstring."""\n'
+            '\n'
+            'TEMPLATE = """\n'
+            '# kept   \n'
+            '"""\n'
+        )
+        result = CodeCompactor.compact(source, 'python')
+        
+        assert result.startswith('#!/usr/bin/env python\n')
+        assert 'Copyright' not in result
+        assert 'docstring' not in result
+        assert 'import os\n' in result
+        assert '\n\n\n' not in result
+        assert '# kept   \n' in result
+        compile(result, '<compacted>', 'exec')
+    
+    def test_c_style_respects_strings(self):
+        """Test comment markers inside string literals are left alone"""
+        source = (
+            '/* License\n'
+            ' * header */\n'
+            'const url = "http://example.com"; // comment\n'
+            "const s = 'a /* b */ c';\n"
+            'const t = `line\n'
+            '  // inside template\n'
+            '`;\n'
+        )
+        result = CodeCompactor.compact(source, 'javascript')
+        
+        assert 'License' not in result
+        assert '// comment' not in result
+        assert 'const url = "http://example.com";' in result
+        assert "'a /* b */ c'" in result
+        assert '  // inside template\n' in result
+    
+    def test_hash_comments(self):
+        """Test # comments are stripped for shell and YAML but not inside quotes"""
+        source = '#!/bin/sh\n# comment\necho "a # b" # trailing\nn=${#list}\n'
+        assert CodeCompactor.compact(source, 'shell') == '#!/bin/sh\necho "a # b"\nn=${#list}\n'
+        assert CodeCompactor.compact("key: it's # fine\n", 'yaml') == "key: it's\n"
+
+    def test_hash_inside_arithmetic_kept(self):
+        """Test # inside $(( ... )) is not a comment, while one after it still is"""
+        source = 'a=$((1 # 2))\nb=$(( 16#ff + (2 #3) )) # note\nc=$(( $((1 #2)) ))\n'
+        assert CodeCompactor.compact(source, 'shell') == \
+            'a=$((1 # 2))\nb=$(( 16#ff + (2 #3) ))\nc=$(( $((1 #2)) ))\n'
+
+    def test_unsupported_language_unchanged(self):
+        """Test languages without a stripper are passed through"""
+        source = '# Title   \n\n\n\ntext\n'
+        assert CodeCompactor.compact(source, 'markdown') == source
+    
+    def test_scan_reports_bytes_removed(self):
+        """Test a compacting scan reports bytes removed per language"""
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            (temp_dir / "main.py").write_text('# header comment\nprint("hi")\n')
+            config = ScannerConfig(show_progress=False, parallel_processing=False, compact=True)
+            output, stats = ProjectScanner(config).scan(temp_dir)
+            
+            assert 'header comment' not in output
+            assert 'print("hi")' in output
+            assert stats['compaction'] == {'python': len('# header comment\n')}
+        finally:
+            shutil.rmtree(temp_dir)
@@ -0,0 +1,55 @@
+import pytest
+import sys
+import time
+from unittest.mock import patch
+sys.path.insert(0, 'src/codeprint')
+from cli import ProjectScanner, ScannerConfig, FastFileProcessor, parse_duration
+from pathlib import Path
+
+
+class TestDeadline:
+    """Test suite for --deadline best-effort scans"""
+
+    def test_parse_duration(self):
+        """Test duration suffixes, with seconds as the default unit"""
+        assert parse_duration('2s') == 2
+        assert parse_duration('500ms') == 0.5
+        assert parse_duration('1.5m') == 90
+        assert parse_duration('3') == 3
+        with pytest.raises(ValueError):
+            parse_duration('soon')
+
+    def test_deadline_renders_partial_snapshot(self, tmp_path):
+        """Test slow reads stop at the deadline, key files first, and the gap is reported"""
+        root = tmp_path / 'project'
+        (root / 'deep' / 'er').mkdir(parents=True)
+        for i in range(20):
+            (root / 'deep' / 'er' / f'mod{i:02d}.py').write_text(f'value = {i}\n')
+        (root / 'zz_top.py').write_text('top = True\n')
+        (root / 'README.md').write_text('# Project\n')
+        original = FastFileProcessor.process_file
+        reads = []
+
+        def slow(self, path):
+            start = time.monotonic()
+            time.sleep(0.05)
+            reads.append((start, time.monotonic()))
+            return original(self, path)
+
+        config = ScannerConfig(show_progress=False, parallel_processing=False, use_gitignore=False,
+                               deadline=0.3)
+        scanner = ProjectScanner(config)
+        with patch.object(FastFileProcessor, 'process_file', slow):
+            _, files, stats = scanner.collect(root)
+
+        read = [f['rel_path'] for f in files]
+        # Breadth-first: top-level files are read before the deep ones they sort after
+        assert 'README.md' in read
+        assert 'zz_top.py' in read
+        assert len(read) < 22
+        assert stats['partial']['reason'] == 'deadline'
+        assert stats['partial']['files_found'] == 22
+        assert stats['deadline'] == {'seconds': 0.3, 'expired': True}
+        # However long each read took, none starts once one has finished past the deadline
+        first_late = min(end for _, end in reads if end >= scanner.processor.deadline_at)
+        assert not [start for start, _ in reads if start > first_late]
@@ -4,6 +4,7 @@ import pytest
 from pathlib import Path
 import tempfile
 import shutil
+import os
 
 import sys
 sys.path.insert(0, 'src/codeprint')
@@ -69,4 +70,31 @@ class TestProjectDetector:
         """Test unknown project type"""
         (temp_dir / "random.txt").touch()
         assert ProjectDetector.detect_project_type(temp_dir) == ProjectType.UNKNOWN
-        
\ No newline at end of file
+        
+    def test_detect_react_project(self, temp_dir):
+        """Test React detection needs package.json plus an App component"""
+        (temp_dir / "package.json").touch()
+        (temp_dir / "src").mkdir()
+        (temp_dir / "src" / "App.tsx").touch()
+        assert ProjectDetector.detect_project_type(temp_dir) == ProjectType.REACT
+    
+    def test_detect_suffix_marker(self, temp_dir):
+        """Test glob markers are matched by suffix"""
+        (temp_dir / "App.csproj").touch()
+        assert ProjectDetector.detect_project_type(temp_dir) == ProjectType.DOTNET
+    
+    def test_detection_cache_invalidated_on_change(self, temp_dir):
+        """Test cached results are refreshed when the directory changes"""
+        assert ProjectDetector.detect_project_type(temp_dir) == ProjectType.UNKNOWN
+        (temp_dir / "go.mod").touch()
+        # Force a distinct mtime even on coarse-grained filesystems
+        os.utime(temp_dir, ns=(0, 10 ** 9))
+        assert ProjectDetector.detect_project_type(temp_dir) == ProjectType.GO
+    
+    def test_list_directory_marks_subdirectories(self, temp_dir):
+        """Test the cached listing records which entries are directories"""
+        (temp_dir / "pkg").mkdir()
+        (temp_dir / "file.txt").touch()
+        listing = ProjectDetector.list_directory(temp_dir)
+        assert listing.dirs == {"pkg"}
+        assert listing.names == {"pkg", "file.txt"}
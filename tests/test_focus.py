@@ -0,0 +1,81 @@
+import pytest
+import sys
+sys.path.insert(0, 'src/codeprint')
+from cli import ImportGraph, FastFileProcessor, ScannerConfig, ProjectType
+from pathlib import Path
+
+
+@pytest.fixture
+def python_project(tmp_path):
+    """Package where main -> app -> (models, utils.helpers) and unused is never imported"""
+    pkg = tmp_path / 'src' / 'pkg'
+    (pkg / 'utils').mkdir(parents=True)
+    (tmp_path / 'main.py').write_text('from pkg import app\n')
+    (pkg / '__init__.py').write_text('')
+    (pkg / 'app.py').write_text('from .models import Model\nfrom pkg.utils import helpers\nimport os\n')
+    (pkg / 'models.py').write_text('from . import db\n')
+    (pkg / 'db.py').write_text('')
+    (pkg / 'utils' / '__init__.py').write_text('')
+    (pkg / 'utils' / 'helpers.py').write_text('')
+    (pkg / 'unused.py').write_text('')
+    return tmp_path
+
+
+class TestImportGraph:
+    """Test suite for ImportGraph"""
+
+    def test_python_hops(self, python_project):
+        """Test Python imports are resolved and limited by hop count"""
+        config = ScannerConfig(show_progress=False, parallel_processing=False)
+        processor = FastFileProcessor(config)
+        files = processor.walk_files(python_project)
+        graph = ImportGraph(python_project, files)
+
+        reachable = graph.reachable([python_project / 'main.py'], 2)
+        rel = [p.relative_to(python_project).as_posix() for p in reachable]
+
+        assert rel[0] == 'main.py'
+        assert 'src/pkg/app.py' in rel
+        assert 'src/pkg/models.py' in rel
+        assert 'src/pkg/utils/helpers.py' in rel
+        assert 'src/pkg/db.py' not in rel  # three hops away
+        assert 'src/pkg/unused.py' not in rel
+
+        deeper = graph.reachable([python_project / 'main.py'], 3)
+        assert python_project / 'src' / 'pkg' / 'db.py' in deeper
+
+    def test_javascript_imports(self, tmp_path):
+        """Test relative import/require specifiers resolve with extensions and index files"""
+        (tmp_path / 'src' / 'components').mkdir(parents=True)
+        (tmp_path / 'src' / 'index.ts').write_text(
+            "import React from 'react';\n"
+            "import { Button } from './components';\n"
+            "const util = require('./util');\n")
+        (tmp_path / 'src' / 'components' / 'index.tsx').write_text("export * from './Button';\n")
+        (tmp_path / 'src' / 'components' / 'Button.tsx').write_text('')
+        (tmp_path / 'src' / 'util.js').write_text('')
+        (tmp_path / 'src' / 'other.js').write_text('')
+
+        files = sorted(p for p in tmp_path.rglob('*') if p.is_file())
+        graph = ImportGraph(tmp_path, files)
+        reachable = graph.reachable([tmp_path / 'src' / 'index.ts'], 5)
+        rel = [p.relative_to(tmp_path).as_posix() for p in reachable]
+
+        assert rel == ['src/index.ts', 'src/components/index.tsx', 'src/util.js',
+                       'src/components/Button.tsx']
+
+    def test_edges_cached(self, python_project):
+        """Test import lists are parsed once per file version"""
+        path = python_project / 'src' / 'pkg' / 'app.py'
+        first = ImportGraph.raw_imports(path)
+        assert ImportGraph.raw_imports(path) is first
+
+    def test_scan_with_focus(self, python_project):
+        """Test --focus limits a scan to reachable files in breadth-first order"""
+        config = ScannerConfig(show_progress=False, parallel_processing=False,
+                               focus=['main.py'], focus_depth=1)
+        processor = FastFileProcessor(config)
+        files = processor.scan_directory(python_project, ProjectType.UNKNOWN)
+
+        assert [f['rel_path'] for f in files] == ['main.py', 'src/pkg/app.py', 'src/pkg/__init__.py']
+        assert processor.focus_stats['entries'] == ['main.py']
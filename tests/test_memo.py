@@ -0,0 +1,136 @@
+import pytest
+import sys
+import os
+from unittest.mock import patch
+sys.path.insert(0, 'src/codeprint')
+from cli import ProjectScanner, ScannerConfig, SnapshotMemo, FastFileProcessor, ProjectDetector, main
+from pathlib import Path
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / 'project'
+    for rel in ('pkg/sub', 'other'):
+        (root / rel).mkdir(parents=True)
+    for i in range(3):
+        (root / 'pkg' / f'mod{i}.py').write_text(f'x = {i}\n')
+        (root / 'pkg' / 'sub' / f'sub{i}.py').write_text(f'y = {i}\n')
+        (root / 'other' / f'other{i}.py').write_text(f'z = {i}\n')
+    return root
+
+
+def run(project, tmp_path, output, **settings):
+    """One memoized CLI run; the output path on a hit, else the scanner and its results"""
+    config = ScannerConfig(show_progress=False, parallel_processing=False, **settings)
+    memo = SnapshotMemo(tmp_path / 'memo.json', project, config)
+    memo.load()
+    scanner = ProjectScanner(config)
+    project_type = scanner.prepare(project)
+    tree, listing = scanner.fingerprint(project, project_type)
+    if scanner.reuse_snapshot(memo, tree, str(tmp_path / output)) is not None:
+        return None
+    name, files, stats = scanner.collect(project, project_type, listing)
+    memo.store(tree, name, files, scanner.save_snapshot(name, files, stats, str(tmp_path / output)))
+    return scanner
+
+
+class TestSnapshotMemo:
+    """Test suite for --memo snapshot reuse"""
+
+    def test_unchanged_tree_reuses_output(self, project, tmp_path):
+        """Test a second run over an unchanged tree copies the stored output without reading files"""
+        run(project, tmp_path, 'first.txt')
+        with patch.object(FastFileProcessor, 'process_file') as process_file:
+            assert run(project, tmp_path, 'second.txt') is None
+        assert process_file.call_count == 0
+        assert (tmp_path / 'second.txt').read_bytes() == (tmp_path / 'first.txt').read_bytes()
+
+    def test_changed_file_reads_only_changed(self, project, tmp_path):
+        """Test one edited file invalidates only its ancestors and is the only file read again"""
+        run(project, tmp_path, 'first.txt')
+        (project / 'pkg' / 'sub' / 'sub1.py').write_text('y = "edited"\n')
+
+        config = ScannerConfig(show_progress=False, parallel_processing=False)
+        memo = SnapshotMemo(tmp_path / 'memo.json', project, config)
+        assert memo.load()
+        scanner = ProjectScanner(config)
+        tree, _ = scanner.fingerprint(project, scanner.prepare(project))
+        unchanged, changed = memo.diff(tree)
+        assert sorted(changed) == ['', 'pkg', 'pkg/sub']
+        assert sorted(unchanged) == ['other']
+
+        scanner = run(project, tmp_path, 'second.txt')
+        assert scanner.content_cache.misses == 1
+        assert scanner.content_cache.hits == 8
+        assert 'y = "edited"' in (tmp_path / 'second.txt').read_text()
+
+    def test_fingerprint_opens_no_files_and_miss_walks_once(self, project, tmp_path):
+        """Test a hit never opens a file, and a miss sniffs the fingerprint's listing instead of walking again"""
+        (project / 'pkg' / 'blob.dat').write_bytes(b'\x00\x01' * 100)
+        run(project, tmp_path, 'first.txt')
+        assert 'blob.dat' not in (tmp_path / 'first.txt').read_text()
+
+        with patch.object(FastFileProcessor, 'is_binary_file') as is_binary_file, \
+                patch.object(FastFileProcessor, 'process_file') as process_file:
+            assert run(project, tmp_path, 'second.txt') is None
+        assert is_binary_file.call_count == 0
+        assert process_file.call_count == 0
+
+        (project / 'other' / 'other0.py').write_text('z = "edited"\n')
+        original = FastFileProcessor.read_directory
+        listed = []
+
+        def record_listing(self, root_path, dir_path, *args):
+            listed.append(dir_path.name)
+            return original(self, root_path, dir_path, *args)
+
+        with patch.object(FastFileProcessor, 'read_directory', record_listing):
+            run(project, tmp_path, 'third.txt')
+        assert sorted(listed) == ['other', 'pkg', 'project', 'sub']
+        assert 'blob.dat' not in (tmp_path / 'third.txt').read_text()
+        assert 'z = "edited"' in (tmp_path / 'third.txt').read_text()
+
+    def test_new_and_touched_files_change_fingerprint(self, project):
+        """Test the root hash covers file names, sizes and mtimes"""
+        files = sorted(p for p in project.rglob('*.py'))
+        before = SnapshotMemo.build_tree(project, files)['']['hash']
+        assert SnapshotMemo.build_tree(project, files)['']['hash'] == before
+
+        st = os.stat(files[0])
+        os.utime(files[0], ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        touched = SnapshotMemo.build_tree(project, files)['']['hash']
+        assert touched != before
+
+        (project / 'other' / 'new.py').write_text('')
+        assert SnapshotMemo.build_tree(project, files + [project / 'other' / 'new.py'])['']['hash'] != touched
+
+    def test_settings_change_starts_over(self, project, tmp_path):
+        """Test a memo made with other settings is neither reused nor used to seed reads"""
+        run(project, tmp_path, 'first.txt')
+        config = ScannerConfig(show_progress=False, parallel_processing=False, max_lines_per_file=5)
+        assert not SnapshotMemo(tmp_path / 'memo.json', project, config).load()
+
+        scanner = run(project, tmp_path, 'second.txt', max_lines_per_file=5)
+        assert scanner is not None and scanner.content_cache is None
+
+    def test_cli_reuses_snapshot_written_into_tree(self, project, tmp_path, monkeypatch, capsys):
+        """Test --memo twice with the default output location: the first snapshot does not count as a change"""
+        monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+        monkeypatch.chdir(project)
+        prompts = []
+        monkeypatch.setattr(ProjectDetector, 'should_ignore_xml',
+                            staticmethod(lambda project_type, interactive=True: prompts.append(project_type) or False))
+        # Timestamped names can repeat within a second
+        names = iter(['project_snapshot_1.txt', 'project_snapshot_2.txt'])
+        monkeypatch.setattr(ProjectScanner, 'default_output_file', lambda self: next(names))
+        monkeypatch.setattr(sys, 'argv', ['codeprint', '.', '--memo', '--no-progress'])
+        main()
+        assert len(prompts) == 1
+        capsys.readouterr()
+
+        main()
+        assert 'No changes since last run' in capsys.readouterr().out
+        assert len(prompts) == 2
+        first, second = project / 'project_snapshot_1.txt', project / 'project_snapshot_2.txt'
+        assert 'project_snapshot_' not in second.read_text()
+        assert second.read_bytes() == first.read_bytes()
@@ -0,0 +1,159 @@
+import pytest
+import sys
+import json
+import hashlib
+import subprocess
+import textwrap
+from unittest.mock import patch
+sys.path.insert(0, 'src/codeprint')
+from cli import ContentSpill, SpilledContent, FastFileProcessor, FileRecord, ProjectScanner, ScannerConfig, parse_size
+from pathlib import Path
+
+
+class TestContentSpill:
+    """Test suite for the --max-memory content spill"""
+
+    def test_parse_size(self):
+        """Test size suffixes, with megabytes as the default unit"""
+        assert parse_size('512K') == 512 * 1024
+        assert parse_size('2g') == 2 * 1024 ** 3
+        assert parse_size('64MB') == 64 * 1024 ** 2
+        assert parse_size('16') == 16 * 1024 ** 2
+
+    def test_spills_past_budget(self, tmp_path):
+        """Test held content beyond half the budget goes to disk and reads back intact"""
+        for i in range(4):
+            (tmp_path / f'file{i}.txt').write_text(f'{i}' * 900 + '\ncut\n')
+        config = ScannerConfig(show_progress=False, parallel_processing=False, max_memory=4000,
+                               max_lines_per_file=1)
+        processor = FastFileProcessor(config)
+        files = processor.scan_directory(tmp_path)
+
+        assert [type(f.data) for f in files] == [bytes, bytes, SpilledContent, SpilledContent]
+        assert processor.spill.spilled_files == 2
+        assert [f['content'] for f in files] == \
+            [f'{i}' * 900 + '\n\n# [Truncated at 1 lines]' for i in range(4)]
+
+    @pytest.mark.skipif(sys.platform != 'linux', reason="peak RSS is reported in KB on Linux only")
+    def test_scan_under_rss_limit(self, tmp_path):
+        """Test a scan of 48 MB of text stays well under that in peak RSS"""
+        project = tmp_path / 'project'
+        project.mkdir()
+        line = 'x' * 99 + '\n'
+        for i in range(60):
+            (project / f'file{i:02d}.txt').write_text(f'marker {i}\n' + line * 8000 + 'cut\n')
+        output = tmp_path / 'out.txt'
+
+        script = textwrap.dedent(f'''
+            import json, resource, sys
+            sys.path.insert(0, 'src/codeprint')
+            from pathlib import Path
+            from cli import ProjectScanner, ScannerConfig
+            config = ScannerConfig(show_progress=False, max_files=1000, max_lines_per_file=8001,
+                                   max_memory=8 * 1024 * 1024, use_gitignore=False)
+            baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            scanner = ProjectScanner(config)
+            name, files, stats = scanner.collect(Path({str(project)!r}))
+            scanner.write_snapshot(Path({str(output)!r}), name, files, stats)
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            print(json.dumps({{'growth_kb': peak - baseline, 'files': stats['files_processed'],
+                               'spilled': stats['spilled']['files']}}))
+        ''')
+        result = subprocess.run([sys.executable, '-c', script], stdout=subprocess.PIPE, check=True)
+        report = json.loads(result.stdout.decode().strip().splitlines()[-1])
+
+        assert report['files'] == 60
+        assert report['spilled'] > 40
+        # Holding every file would cost 48 MB before any rendering overhead
+        assert report['growth_kb'] < 32 * 1024
+        text = output.read_text()
+        assert 'marker 0\n' in text and 'marker 59\n' in text
+
+
+class TestFileRecord:
+    """Test suite for lazily loaded file records"""
+
+    def test_plain_content_read_at_render_time(self, tmp_path):
+        """Test unchanged files hold no content and transformed ones hold bytes"""
+        (tmp_path / 'plain.py').write_text('x = 1\n')
+        (tmp_path / 'long.py').write_text('a = 1\nb = 2\nc = 3\n')
+        config = ScannerConfig(show_progress=False, parallel_processing=False, max_lines_per_file=2)
+        files = FastFileProcessor(config).scan_directory(tmp_path)
+        long, plain = files
+
+        assert plain.data is None
+        assert plain['content'] == 'x = 1\n'
+        assert isinstance(long.data, bytes)
+        assert long['content'].startswith('a = 1\nb = 2\n\n# [Truncated')
+        assert plain['rel_path'] == 'plain.py' and plain.root is long.root
+        assert 'redactions' not in plain and plain.get('redactions', {}) == {}
+
+    def test_state_round_trip(self, tmp_path):
+        """Test checkpoint state keeps held content and omits content that is on disk"""
+        path = tmp_path / 'a.py'
+        path.write_text('pass\n')
+        mtime = path.stat().st_mtime_ns
+        lazy = FileRecord(path, 5, mtime, 1, hashlib.sha256(b'pass\n').hexdigest())
+        held = FileRecord(path, 5, mtime, 1, 'h', truncated=True, data='kept'.encode('utf-8'))
+
+        assert 'content' not in lazy.state()
+        assert FileRecord.from_state(path, lazy.state())['content'] == 'pass\n'
+        assert FileRecord.from_state(path, held.state())['content'] == 'kept'
+
+    def test_changed_files_not_rendered(self, tmp_path):
+        """Test files removed or rewritten between collect and save get a placeholder, not new content"""
+        project = tmp_path / 'project'
+        project.mkdir()
+        for name in ('kept.py', 'removed.py', 'rewritten.py'):
+            (project / name).write_text(f'# {name}\n')
+        config = ScannerConfig(show_progress=False, parallel_processing=False, use_gitignore=False)
+        scanner = ProjectScanner(config)
+        name, files, stats = scanner.collect(project)
+
+        (project / 'removed.py').unlink()
+        (project / 'rewritten.py').write_text('\n'.join(f'line {i}' for i in range(5000)))
+        output = tmp_path / 'out.txt'
+        scanner.write_snapshot(output, name, files, stats)
+
+        text = output.read_text(encoding='utf-8')
+        assert '# kept.py\n' in text
+        assert text.count(FileRecord.STALE.decode('utf-8')) == 2
+        assert 'line 4999' not in text
+
+    def test_bytes_path_matches_text_mode(self, tmp_path):
+        """Test content, line counts and truncation match a text-mode read for awkward files"""
+        samples = {
+            'crlf.py': b'a = 1\r\nb = 2\r\n' * 4,
+            'cr.py': b'a\rb\rc\r',
+            'invalid.py': b'ok = "\xff"\r\xff\nend',
+            'formfeed.py': b'a\x0cb\nc\n',
+            'unicode.py': 'name = "café"\n'.encode('utf-8') * 6,
+        }
+        for name, data in samples.items():
+            (tmp_path / name).write_bytes(data)
+        config = ScannerConfig(show_progress=False, parallel_processing=False, max_lines_per_file=5)
+        files = FastFileProcessor(config).scan_directory(tmp_path)
+
+        assert len(files) == len(samples)
+        for record in files:
+            with open(record.path, 'r', encoding='utf-8', errors='ignore') as f:
+                text = f.read()
+            lines = text.splitlines()
+            assert record['lines'] == len(lines)
+            if len(lines) > 5:
+                assert record['content'] == '\n'.join(lines[:5]) + '\n\n# [Truncated at 5 lines]'
+            else:
+                assert record['content'] == text
+
+    def test_snapshot_written_without_decoding(self, tmp_path):
+        """Test txt snapshots copy file content as bytes instead of decoding it"""
+        project = tmp_path / 'project'
+        project.mkdir()
+        (project / 'a.py').write_text('name = "é"\n', encoding='utf-8')
+        config = ScannerConfig(show_progress=False, parallel_processing=False, use_gitignore=False)
+        scanner = ProjectScanner(config)
+        name, files, stats = scanner.collect(project)
+        output = tmp_path / 'out.txt'
+        with patch.object(FileRecord, 'text', side_effect=AssertionError('decoded')):
+            scanner.write_snapshot(output, name, files, stats)
+        assert 'name = "é"\n' in output.read_text(encoding='utf-8')
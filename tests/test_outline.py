@@ -0,0 +1,99 @@
+import pytest
+import sys
+sys.path.insert(0, 'src/codeprint')
+from cli import OutlineExtractor, FastFileProcessor, ScannerConfig
+from pathlib import Path
+
+
+class TestOutlineExtractor:
+    """Test suite for OutlineExtractor"""
+    
+    def test_python_outline(self):
+        """Test Python outlines keep imports, signatures and first docstring lines"""
+        source = (
+            '"""Module summary.\n\nMore detail."""\n'
+            'import os\n'
+            'from typing import (\n    List,\n)\n'
+            '\n'
+            'CONSTANT = 1\n'
+            '\n'
+            '@decorator\n'
+            'class Thing(Base):\n'
+            '    """A thing."""\n'
+            '    def method(self,\n'
+            '               value: int) -> int:\n'
+            '        """Do it.\n\n        Details."""\n'
+            '        return value * 2\n'
+            '\n'
+            'async def main():\n'
+            '    await run()\n'
+        )
+        outline = OutlineExtractor.outline(source, 'python')
+        
+        assert outline.splitlines()[:3] == ['"""Module summary."""', 'import os', 'from typing import List']
+        assert '@decorator\nclass Thing(Base):\n    """A thing."""' in outline
+        assert '    def method(self,\n               value: int) -> int:\n        """Do it."""\n        ...' in outline
+        assert 'async def main():\n    ...' in outline
+        assert 'CONSTANT' not in outline
+        assert 'return value' not in outline
+        compile(outline, '<outline>', 'exec')
+    
+    def test_python_one_line_definitions(self):
+        """Test one-line def and class forms end at their own colon"""
+        source = (
+            'class Empty: pass\n'
+            'if True:\n'
+            '    x = 1\n'
+            'class Thing:\n'
+            '    def m(self): return 1\n'
+            '    async def n(self):\n'
+            '        # setup\n'
+            '        return 2\n'
+            'def f(): """Doc."""\n'
+        )
+        outline = OutlineExtractor.outline(source, 'python')
+        
+        assert outline.splitlines() == [
+            'class Empty:', '    ...', '',
+            'class Thing:', '    def m(self):', '        ...',
+            '    async def n(self):', '        ...', '',
+            'def f():', '    """Doc."""', '    ...',
+        ]
+        compile(outline, '<outline>', 'exec')
+    
+    def test_go_outline(self):
+        """Test the regex extractor keeps import blocks, doc lines and signatures"""
+        source = (
+            'package main\n\n'
+            'import (\n    "fmt"\n)\n\n'
+            '// Run starts the server.\n'
+            'func Run(addr string) error {\n'
+            '    fmt.Println(addr)\n'
+            '    return nil\n'
+            '}\n'
+        )
+        outline = OutlineExtractor.outline(source, 'go')
+        assert outline == (
+            'package main\nimport (\n    "fmt"\n)\n'
+            '// Run starts the server.\nfunc Run(addr string) error'
+        )
+    
+    def test_unsupported_language(self):
+        """Test unsupported languages have no outline"""
+        assert OutlineExtractor.outline('# Title\n', 'markdown') is None
+    
+    def test_large_file_outlined_instead_of_truncated(self, tmp_path):
+        """Test files over the threshold are outlined rather than cut"""
+        statements = ''.join(f'    x += {n}\n' for n in range(20))
+        body = ''.join(f'def func_{i}(x):\n{statements}    return x\n\n' for i in range(50))
+        path = tmp_path / 'big.py'
+        path.write_text(body)
+        
+        config = ScannerConfig(max_lines_per_file=200, outline_threshold=0)
+        record = FastFileProcessor(config).process_file(path)
+        
+        assert record['outlined'] is True
+        assert record['truncated'] is False
+        assert record['lines'] == 50 * 23
+        assert 'def func_49(x):' in record['content']
+        assert 'return x' not in record['content']
@@ -1,7 +1,9 @@
 import pytest
+import json
+import hashlib
 import sys
 sys.path.insert(0, 'src/codeprint')
-from cli import OutputGenerator
+from cli import OutputGenerator, DirectoryTree, SnapshotArchive, SnapshotIndex, ProjectScanner, ScannerConfig, OutputFormat
 from pathlib import Path
 
 class TestOutputGenerator:
@@ -61,3 +63,97 @@ class TestOutputGenerator:
         assert ('```python' in output or '```py' in output)
         assert 'def main():' in output
         assert '## Summary' in output
+    
+    def test_directory_tree_full_depth_and_sorted(self):
+        """Test the tree keeps every level and is independent of input order"""
+        files = [
+            {'path': Path('/nonexistent/b.txt'), 'rel_path': 'b.txt'},
+            {'path': Path('/nonexistent/pkg/sub/deep.py'), 'rel_path': 'pkg/sub/deep.py'},
+            {'path': Path('/nonexistent/a.txt'), 'rel_path': 'a.txt'},
+            {'path': Path('/nonexistent/pkg/init.py'), 'rel_path': 'pkg/init.py'},
+        ]
+        lines = DirectoryTree.from_files(files).render("{indent}{name}/", "{indent}{name}")
+        assert lines == [
+            "pkg/",
+            "  sub/",
+            "    deep.py",
+            "  init.py",
+            "a.txt",
+            "b.txt",
+        ]
+        reordered = DirectoryTree.from_files(list(reversed(files)))
+        assert reordered.render("{indent}{name}/", "{indent}{name}") == lines
+    
+    def test_generate_jsonl_output(self, sample_files, sample_stats):
+        """Test JSON Lines format generation"""
+        output = OutputGenerator.generate_jsonl('TestProject', sample_files, sample_stats)
+        records = [json.loads(line) for line in output.splitlines()]
+        
+        assert [r['type'] for r in records] == ['header', 'file', 'file', 'trailer']
+        assert records[0]['project'] == 'TestProject'
+        assert records[1]['path'] == 'src/main.py'
+        assert records[1]['language'] == 'python'
+        assert records[1]['truncated'] is False
+        assert records[1]['content'] == 'def main():\n    print("Hello")'
+        assert records[1]['sha256'] == hashlib.sha256(records[1]['content'].encode('utf-8')).hexdigest()
+        assert records[2]['language'] == 'markdown'
+        assert records[-1]['files_processed'] == 2
+    
+    def test_archive_round_trip(self, sample_files, sample_stats, tmp_path):
+        """Test archive files can be sliced out by path"""
+        archive_path = tmp_path / "snapshot.cpk"
+        SnapshotArchive.write(archive_path, 'TestProject', sample_files, sample_stats)
+        
+        with SnapshotArchive(archive_path) as archive:
+            assert archive.project == 'TestProject'
+            assert archive.paths() == ['README.md', 'src/main.py']
+            assert archive.read_text('src/main.py') == 'def main():\n    print("Hello")'
+            assert archive.entries['README.md']['language'] == 'markdown'
+            with pytest.raises(KeyError):
+                archive.read('missing.py')
+
+    def test_archive_lookup_skips_json_index(self, sample_stats, tmp_path):
+        """Test single-file reads binary-search the path table without parsing the JSON index"""
+        names = ['a.py', 'b/ü.py', 'b/z.py', 'c.md', 'src/x.py', 'Z.txt', 'é.txt']
+        files = [{'path': name, 'rel_path': name, 'content': f'# {name}\n', 'size': 10, 'lines': 1}
+                 for name in names]
+        archive_path = tmp_path / "snapshot.cpk"
+        SnapshotArchive.write(archive_path, 'TestProject', files, sample_stats)
+
+        with SnapshotArchive(archive_path) as archive:
+            for name in names:
+                assert archive.read_text(name) == f'# {name}\n'
+            for missing in ('', 'a', 'b', 'zz.py', 'src/x.pyc'):
+                with pytest.raises(KeyError):
+                    archive.read(missing)
+            assert archive.paths() == sorted(names)
+            assert archive._index is None
+            assert set(archive.entries) == set(names)
+
+    def test_archive_rejects_other_files(self, tmp_path):
+        """Test non-archive files are rejected"""
+        not_archive = tmp_path / "snapshot.txt"
+        not_archive.write_text("Project Snapshot: x")
+        with pytest.raises(ValueError):
+            SnapshotArchive(not_archive)
+    
+    @pytest.mark.parametrize("output_format", [OutputFormat.TXT, OutputFormat.MCP, OutputFormat.JSONL])
+    def test_sidecar_index_offsets(self, sample_files, sample_stats, tmp_path, output_format):
+        """Test the .idx sidecar points at each file's section without changing the output"""
+        scanner = ProjectScanner(ScannerConfig(output_format=output_format, write_index=True))
+        snapshot = tmp_path / "snapshot.out"
+        scanner.write_output(snapshot, scanner.render_chunks('TestProject', sample_files, sample_stats))
+        
+        index = SnapshotIndex.load(snapshot)
+        assert set(index.sections) == {'src/main.py', 'README.md'}
+        section = index.read_section(snapshot, 'src/main.py').decode('utf-8')
+        assert 'main.py' in section
+        # JSONL escapes the quotes inside its content string
+        code = 'print(\\"Hello\\")' if output_format == OutputFormat.JSONL else 'print("Hello")'
+        assert code in section
+        assert '# Test Project' not in section
+        
+        if output_format == OutputFormat.TXT:
+            expected = OutputGenerator.generate_txt('TestProject', sample_files, sample_stats)
+            # Only the timestamp line may differ between the two renders
+            assert snapshot.read_text(encoding='utf-8').splitlines()[2:] == expected.splitlines()[2:]
@@ -0,0 +1,107 @@
+import pytest
+import sys
+import shutil
+import subprocess
+from unittest.mock import patch
+sys.path.insert(0, 'src/codeprint')
+from cli import GitRevision, ProjectScanner, ScannerConfig, ContentCache, main
+from pathlib import Path
+
+
+pytestmark = pytest.mark.skipif(shutil.which('git') is None, reason="git is not installed")
+
+
+def git(repo, *args):
+    subprocess.run(['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com',
+                    '-c', 'commit.gpgsign=false', *args], cwd=repo, check=True,
+                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Repository with a v1 tag, a later commit and uncommitted changes"""
+    root = tmp_path / 'repo'
+    (root / 'src').mkdir(parents=True)
+    (root / 'src' / 'app.py').write_text('version = 1\n')
+    (root / 'src' / 'copy.py').write_text('version = 1\n')
+    (root / 'big.txt').write_text('x' * 5000)
+    (root / 'setup.py').write_text('from setuptools import setup\n')
+    git(root, 'init', '-q')
+    git(root, 'add', '.')
+    git(root, 'commit', '-q', '-m', 'v1')
+    git(root, 'tag', 'v1')
+    (root / 'src' / 'app.py').write_text('version = 2\n')
+    git(root, 'commit', '-q', '-am', 'v2')
+    (root / 'src' / 'app.py').write_text('version = "dirty"\n')
+    (root / 'untracked.py').write_text('new = True\n')
+    return root
+
+
+def scan(path, rev, content_cache=None):
+    config = ScannerConfig(show_progress=False, parallel_processing=False, max_file_size=4096, rev=rev)
+    return ProjectScanner(config, content_cache=content_cache).collect(path)
+
+
+class TestGitRevision:
+    """Test suite for --rev snapshots"""
+
+    def test_snapshot_of_tag(self, repo):
+        """Test a tag is read from the object store, not the working tree"""
+        name, files, stats = scan(repo, 'v1')
+
+        assert name == 'repo@v1'
+        assert [f['rel_path'] for f in files] == ['setup.py', 'src/app.py', 'src/copy.py']
+        assert files[1]['content'] == 'version = 1\n'
+        assert stats['rev']['name'] == 'v1'
+        assert stats['project_type'] == 'python'
+        assert (repo / 'src' / 'app.py').read_text() == 'version = "dirty"\n'
+
+        _, files, _ = scan(repo, 'HEAD')
+        assert files[1]['content'] == 'version = 2\n'
+
+    def test_blobs_filtered_before_reading(self, repo):
+        """Test oversized blobs are skipped on their listed size and identical blobs read once"""
+        requested = []
+        original = GitRevision.read_blobs
+
+        def record_blobs(self, shas):
+            requested.extend(shas)
+            return original(self, shas)
+
+        with patch.object(GitRevision, 'read_blobs', record_blobs):
+            _, files, _ = scan(repo, 'v1')
+
+        # setup.py plus one blob shared by app.py and copy.py; big.txt is never read
+        assert len(files) == 3
+        assert len(requested) == 2
+
+    def test_blob_sha_cache(self, repo):
+        """Test a blob unchanged between revisions comes from the content cache"""
+        cache = ContentCache()
+        scan(repo, 'v1', cache)
+        _, files, _ = scan(repo, 'HEAD', cache)
+
+        assert cache.hits == 2  # setup.py and src/copy.py
+        assert files[1]['content'] == 'version = 2\n'
+
+    def test_subdirectory(self, repo):
+        """Test scanning a subdirectory lists paths relative to it"""
+        _, files, _ = scan(repo / 'src', 'v1')
+        assert [f['rel_path'] for f in files] == ['app.py', 'copy.py']
+
+    def test_unknown_revision(self, repo):
+        """Test an unknown revision is reported as a ValueError"""
+        with pytest.raises(ValueError, match='unknown git revision: v9'):
+            scan(repo, 'v9')
+
+    def test_interrupted_scan_has_no_resume_hint(self, repo, tmp_path, monkeypatch, capsys):
+        """Test an interrupted --rev scan does not suggest --resume, which --rev rejects"""
+        monkeypatch.setenv('HOME', str(tmp_path / 'home'))
+        monkeypatch.setattr(GitRevision, 'read_blobs', lambda self, shas: (_ for _ in ()).throw(KeyboardInterrupt))
+        monkeypatch.setattr(sys, 'argv', ['codeprint', str(repo), '--rev', 'v1', '--no-progress',
+                                          '-o', str(tmp_path / 'out.txt')])
+        with pytest.raises(SystemExit):
+            main()
+        out = capsys.readouterr().out
+        assert 'partial snapshot written' in out
+        assert '--resume' not in out
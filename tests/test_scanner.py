@@ -2,11 +2,13 @@ import pytest
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
 import tempfile
+import os
 import shutil
 
 import sys
 sys.path.insert(0, 'src/codeprint')
-from cli import ProjectScanner, ScannerConfig, OutputFormat
+from cli import (ProjectScanner, ScannerConfig, OutputFormat, BatchScanner, InteractiveCLI, Prefetch,
+                 FastFileProcessor, SymlinkPolicy, IOConcurrency, ProjectType, main)
 
 class TestProjectScanner:
     """Test suite for ProjectScanner"""
@@ -120,3 +122,194 @@ class TestProjectScanner:
         
         assert stats['files_processed'] <= 5
 
+
+    def test_monorepo_subtree_ignore_rules(self, temp_project, scanner_config):
+        """Test nested projects get their own ignore rules, scoped to their subtree"""
+        web = temp_project / "web"
+        (web / "node_modules" / "react").mkdir(parents=True)
+        (web / "package.json").write_text("{}")
+        (web / "index.js").write_text("console.log('web')")
+        (web / "node_modules" / "react" / "index.js").write_text("module.exports = 'react'")
+        # node_modules outside the JavaScript subtree is not pruned by its rules
+        (temp_project / "tools" / "node_modules").mkdir(parents=True)
+        (temp_project / "tools" / "node_modules" / "keep.py").write_text("kept = True")
+        
+        scanner = ProjectScanner(scanner_config)
+        output, stats = scanner.scan(temp_project)
+        
+        assert stats['subprojects'] == {'web': 'javascript'}
+        assert "console.log('web')" in output
+        assert "module.exports = 'react'" not in output
+        assert "kept = True" in output
+    
+    def test_batch_scan(self, temp_project, scanner_config):
+        """Test batch mode writes one output per root plus a summary"""
+        other = temp_project / "other_repo"
+        other.mkdir()
+        (other / "go.mod").write_text("module example.com/other")
+        (other / "main.go").write_text("package main")
+        out_dir = temp_project / "snapshots"
+        
+        summary = BatchScanner(scanner_config).scan_all(
+            [temp_project / "src", other, temp_project / "missing"], out_dir)
+        
+        assert summary['roots'] == 3
+        assert summary['succeeded'] == 2
+        assert summary['failed'] == 1
+        assert (out_dir / "batch_summary.json").exists()
+        assert "package main" in (out_dir / "other_repo_snapshot.txt").read_text()
+        assert "def helper():" in (out_dir / "src_snapshot.txt").read_text()
+        # The caller's config is never mutated by the per-root scans
+        assert not scanner_config.ignore_dirs
+
+    def test_batch_keeps_explicit_current_directory(self, temp_project, monkeypatch):
+        """Test an explicit . root is scanned alongside the --batch file, and only when given"""
+        batch_file = temp_project / "repos.txt"
+        batch_file.write_text(str(temp_project / "src") + "\n")
+        monkeypatch.chdir(temp_project)
+        scanned = []
+        summary = {'wall_time': 0.0, 'succeeded': 0, 'roots': 0, 'total_files': 0,
+                   'summary_path': 'batch_summary.json', 'failed': 0}
+        monkeypatch.setattr(BatchScanner, 'scan_all',
+                            lambda self, roots, output_dir: scanned.append(roots) or summary)
+
+        for argv in (['.', '--batch', str(batch_file)], ['--batch', str(batch_file)]):
+            monkeypatch.setattr(sys, 'argv', ['codeprint', *argv, '--no-progress'])
+            main()
+
+        assert scanned == [[temp_project.resolve(), (temp_project / "src").resolve()],
+                           [(temp_project / "src").resolve()]]
+
+    def test_interactive_warm_index(self, temp_project, scanner_config):
+        """Test repeated interactive scans reuse the warm index until something changes"""
+        scanner_config.interactive_mode = True
+        cli = InteractiveCLI(scanner_config)
+        
+        _, files, _ = cli.collect_warm(temp_project)
+        with patch('cli.FastFileProcessor.process_file') as process_file:
+            _, again, _ = cli.collect_warm(temp_project)
+        assert again is files
+        process_file.assert_not_called()
+        
+        # Touching a file invalidates the index; only that file is re-read
+        main = temp_project / "src" / "main.py"
+        main.write_text("def main():\n    print('Changed')")
+        os.utime(main, ns=(main.stat().st_atime_ns, main.stat().st_mtime_ns + 10**9))
+        _, files, _ = cli.collect_warm(temp_project)
+        assert any("Changed" in f['content'] for f in files)
+        
+        # Each directory gets its own ignore state; the session config is untouched
+        (temp_project / "other").mkdir()
+        (temp_project / "other" / "cache.pyc").write_text("not ignored here")
+        _, files, _ = cli.collect_warm(temp_project / "other")
+        assert [f['rel_path'] for f in files] == ["cache.pyc"]
+        assert not scanner_config.ignore_patterns
+    
+    def test_interactive_settings_change_rereads(self, temp_project, scanner_config):
+        """Test records cached under other processing settings are not reused after a settings change"""
+        scanner_config.interactive_mode = True
+        cli = InteractiveCLI(scanner_config)
+        
+        _, files, _ = cli.collect_warm(temp_project)
+        assert not [f for f in files if f['rel_path'] == 'src/main.py'][0]['truncated']
+        scanner_config.max_lines_per_file = 1
+        _, files, _ = cli.collect_warm(temp_project)
+        assert [f for f in files if f['rel_path'] == 'src/main.py'][0]['truncated']
+    
+    def test_interactive_prefetch(self, temp_project, scanner_config):
+        """Test a scan attaches to the read-ahead started on cd, and cancelled work is dropped"""
+        scanner_config.interactive_mode = True
+        cli = InteractiveCLI(scanner_config)
+        
+        cli.start_prefetch(temp_project)
+        assert cli.prefetch.done.wait(10)
+        with patch('cli.FastFileProcessor.process_file') as process_file:
+            _, files, _ = cli.collect_warm(temp_project)
+        process_file.assert_not_called()
+        assert "def helper():" in [f['content'] for f in files if f['rel_path'] == 'src/utils.py'][0]
+        
+        cancelled = Prefetch(temp_project / "src", scanner_config, cli.executor, cli.content_cache_for(scanner_config))
+        cancelled.cancel()
+        cancelled.start()
+        assert cancelled.result(timeout=10) is None
+        cli.executor.shutdown()
+    
+    @pytest.mark.skipif(not hasattr(os, 'symlink') or os.name == 'nt', reason="needs POSIX symlinks")
+    def test_symlink_policy(self, tmp_path, scanner_config):
+        """Test symlink policies, loop protection and single reads of linked files"""
+        root = tmp_path / "project"
+        outside = tmp_path / "datasets"
+        root.mkdir()
+        outside.mkdir()
+        (root / "a.py").write_text("a = 1")
+        (outside / "big.py").write_text("big = 1")
+        os.link(str(root / "a.py"), str(root / "hard.py"))
+        os.symlink(str(root / "a.py"), str(root / "link.py"))
+        os.symlink(str(root), str(root / "loop"))
+        os.symlink(str(outside), str(root / "data"))
+        
+        def walk(policy):
+            scanner_config.symlinks = policy
+            processor = FastFileProcessor(scanner_config)
+            paths = [p.relative_to(root).as_posix() for p in processor.walk_files(root)]
+            return paths, processor.duplicates_skipped
+        
+        assert walk(SymlinkPolicy.SKIP) == (["a.py"], 1)
+        assert walk(SymlinkPolicy.FILES) == (["a.py"], 2)
+        assert walk(SymlinkPolicy.FOLLOW) == (["a.py", "data/big.py"], 2)
+    
+    def test_parallel_walk_matches_serial(self, tmp_path, scanner_config):
+        """Test walker threads give the serial walk's files, order, subprojects and dedupe"""
+        root = tmp_path / "project"
+        for i in range(6):
+            for j in range(4):
+                pkg = root / f"pkg{i}" / f"sub{j}"
+                pkg.mkdir(parents=True)
+                (pkg / "mod.py").write_text(f"x = {i}{j}")
+                (pkg / ".hidden.py").write_text("hidden = True")
+        (root / "web" / "node_modules" / "dep").mkdir(parents=True)
+        (root / "web" / "package.json").write_text("{}")
+        (root / "web" / "node_modules" / "dep" / "index.js").write_text("x")
+        (root / "web" / "app.js").write_text("x")
+        os.symlink(str(root), str(root / "pkg1" / "loop"))
+        os.symlink(str(root / "pkg2"), str(root / "again"))
+        
+        def walk(threads, policy, limit, breadth_first):
+            scanner_config.symlinks = policy
+            scanner_config.walker_threads = threads
+            processor = FastFileProcessor(scanner_config)
+            processor.breadth_first = breadth_first
+            files = processor.walk_files(root, limit=limit)
+            return files, processor.subprojects, processor.dir_mtimes, processor.duplicates_skipped
+        
+        for policy in (SymlinkPolicy.FILES, SymlinkPolicy.FOLLOW):
+            for limit in (sys.maxsize, 7):
+                for breadth_first in (False, True):
+                    serial = walk(1, policy, limit, breadth_first)
+                    assert walk(8, policy, limit, breadth_first) == serial
+        full, subprojects, _, _ = walk(8, SymlinkPolicy.FILES, sys.maxsize, False)
+        assert subprojects == {"web": ProjectType.JAVASCRIPT}
+        assert root / "web" / "app.js" in full
+        assert root / "web" / "node_modules" / "dep" / "index.js" not in full
+    
+    def test_io_concurrency_adapts(self):
+        """Test read concurrency follows the wait/CPU ratio of reads within the cap"""
+        slow = IOConcurrency(cap=24, cpus=2)
+        for _ in range(200):
+            slow.record(wall=0.010, cpu=0.0002)  # network mount: mostly waiting
+        assert slow.limit == 24
+        
+        fast = IOConcurrency(cap=24, cpus=2)
+        for _ in range(200):
+            fast.record(wall=0.0001, cpu=0.0001)  # page cache: all CPU
+        assert fast.limit == 2
+    
+    def test_io_concurrency_in_stats(self, temp_project, scanner_config):
+        """Test the chosen read concurrency is reported"""
+        scanner_config.parallel_processing = True
+        scanner_config.max_io_threads = 3
+        _, stats = ProjectScanner(scanner_config).scan(temp_project)
+        
+        assert stats['files_processed'] == 4
+        assert 1 <= stats['io_concurrency']['final'] <= 3
+        assert stats['io_concurrency']['cap'] == 3